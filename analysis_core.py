@@ -0,0 +1,351 @@
+"""
+상태 없는 거래량 밀집도 분석 핵심 함수
+불변 가격 배열(PriceSeries)을 받아 결과를 반환하는 순수 함수 모음으로,
+하나의 데이터를 여러 스레드/요청이 복사나 잠금 없이 동시에 분석할 수 있음
+(StockDensityAnalyzer는 이 함수들을 감싼 얇은 래퍼)
+"""
+
+import hashlib
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from volume_profile import (TOUCH_CANDIDATES, TOUCH_UNIT, MultiResolutionProfile, anchored_profiles,
+                            extract_density_zones, freedman_diaconis_num_ranges, kde_density_zones,
+                            kde_support_resistance, suggest_anchors, top_n_indices, volume_kde)
+
+
+def _read_only(values, dtype=float) -> np.ndarray:
+    """쓰기 불가 배열 뷰 (원본이 이미 dtype이면 복사하지 않음, dtype=None이면 원본 형식 유지)"""
+    array = np.asarray(values, dtype=dtype).view()
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True, eq=False)
+class PriceSeries:
+    """
+    분석 대상 종목의 불변 일봉 데이터
+
+    배열은 모두 쓰기 불가이고, 구간 수와 무관한 다중 해상도 프로파일은 처음 필요할 때
+    한 번 만들어 둡니다 (동시에 처음 접근하면 같은 값을 두 번 만들 수 있을 뿐 결과는 같음).
+    """
+
+    dates: pd.DatetimeIndex
+    low: np.ndarray
+    high: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    open: Optional[np.ndarray] = None
+    symbol: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, symbol: Optional[str] = None, start_date: Optional[str] = None,
+                   end_date: Optional[str] = None) -> 'PriceSeries':
+        """
+        OHLCV DataFrame으로 생성
+
+        Args:
+            data: OHLCV 데이터 (Low, High, Close, Volume 컬럼, Open은 있으면 사용)
+            symbol: 종목 코드
+            start_date: 시작 날짜 ('YYYY-MM-DD')
+            end_date: 종료 날짜 ('YYYY-MM-DD')
+        """
+        return cls(
+            dates=pd.DatetimeIndex(data.index),
+            low=_read_only(data['Low']),
+            high=_read_only(data['High']),
+            close=_read_only(data['Close'], dtype=None),
+            volume=_read_only(data['Volume'], dtype=None),
+            open=_read_only(data['Open']) if 'Open' in data else None,
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date
+        )
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    @property
+    def current_price(self) -> float:
+        return float(self.close[-1])
+
+    @cached_property
+    def profile(self) -> MultiResolutionProfile:
+        """구간 수별 재구간화용 다중 해상도 프로파일"""
+        return MultiResolutionProfile(self.low, self.high, self.volume)
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """데이터 내용 해시 (결과 캐시 키, 값이 하나라도 바뀌면 달라짐)"""
+        digest = hashlib.blake2b(digest_size=16)
+        for values in (self.dates.asi8, self.low, self.high, self.close, self.volume):
+            digest.update(str(values.dtype).encode('ascii'))
+            digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()
+
+    @cached_property
+    def auto_num_ranges(self) -> int:
+        """거래량 가중 Freedman–Diaconis 규칙으로 정한 가격 구간 수"""
+        return freedman_diaconis_num_ranges(self.low, self.high, self.volume)
+
+    def frame(self) -> pd.DataFrame:
+        """배열을 공유하는 OHLCV DataFrame (읽기 전용으로 사용)"""
+        columns = {'Open': self.open} if self.open is not None else {}
+        columns.update({'High': self.high, 'Low': self.low, 'Close': self.close, 'Volume': self.volume})
+        return pd.DataFrame(columns, index=self.dates, copy=False)
+
+
+def resolve_num_ranges(series: PriceSeries, num_ranges: Union[int, str]) -> int:
+    """
+    구간 수 결정 ('auto'이면 종목 데이터에 맞춰 자동 선택)
+
+    Args:
+        series: 분석 데이터
+        num_ranges: 가격 구간 수 또는 'auto'
+
+    Returns:
+        int: 가격 구간 수
+    """
+    if num_ranges == 'auto':
+        return series.auto_num_ranges
+    return int(num_ranges)
+
+
+def calculate_price_ranges(series: PriceSeries, num_ranges: Union[int, str] = 20) -> pd.DataFrame:
+    """
+    가격 구간별 거래량
+
+    Args:
+        series: 분석 데이터
+        num_ranges: 가격 구간 수 ('auto'이면 거래량 가중 Freedman–Diaconis 규칙으로 자동 선택)
+
+    Returns:
+        DataFrame: 가격 구간별 거래량 정보
+    """
+    return series.profile.rebin(resolve_num_ranges(series, num_ranges))
+
+
+def find_high_density_zones(price_ranges_df: pd.DataFrame, top_n: int = 5) -> pd.DataFrame:
+    """
+    거래량 상위 구간 (전체 정렬 없이 argpartition으로 부분 선택)
+
+    Args:
+        price_ranges_df: 가격 구간별 거래량 데이터
+        top_n: 상위 몇 개 구간을 반환할지
+
+    Returns:
+        DataFrame: 거래량 밀집 상위 구간
+    """
+    return price_ranges_df.iloc[top_n_indices(price_ranges_df['total_volume'].values, top_n)]
+
+
+def find_merged_density_zones(price_ranges_df: pd.DataFrame, top_n: int = 5, smooth_window: int = 3,
+                              threshold_ratio: float = 1.0) -> pd.DataFrame:
+    """
+    인접한 고거래량 구간을 병합한 밀집 구간
+
+    Returns:
+        DataFrame: 병합된 밀집 구간 (경계, 최대 거래량 가격, 강도)
+    """
+    return extract_density_zones(price_ranges_df, top_n=top_n, smooth_window=smooth_window,
+                                 threshold_ratio=threshold_ratio)
+
+
+def calculate_volume_kde(series: PriceSeries, grid_size: int = 512,
+                         bandwidth: Optional[float] = None) -> pd.DataFrame:
+    """
+    연속 거래량 밀도 (거래량 가중 KDE)
+
+    Returns:
+        DataFrame: 격자 가격별 거래량 밀도 (price, volume_density, density)
+    """
+    return volume_kde(series.low, series.high, series.volume, grid_size=grid_size, bandwidth=bandwidth)
+
+
+def calculate_kde_support_resistance(series: PriceSeries, kde_df: pd.DataFrame, max_levels: int = 3) -> Dict:
+    """
+    연속 밀도 곡선의 봉우리 기반 지지선/저항선
+
+    Returns:
+        Dict: 지지선/저항선 정보 (각 레벨은 price, density, strength 포함)
+    """
+    return kde_support_resistance(kde_df, series.current_price, max_levels=max_levels)
+
+
+def find_kde_density_zones(kde_df: pd.DataFrame, top_n: int = 5) -> pd.DataFrame:
+    """연속 밀도 곡선의 거래량 밀집 구간"""
+    return kde_density_zones(kde_df, top_n=top_n)
+
+
+def calculate_support_resistance(series: PriceSeries, analysis_days: int = 60, min_touches: int = 3,
+                                 max_levels: int = 3) -> Dict:
+    """
+    지지선/저항선 분석
+
+    최근 analysis_days일의 저가~고가를 1000원 단위 가격대로 내려 가격대별 터치 횟수를 세고,
+    터치 상위 20개 가격대 중 min_touches 이상을 현재가 아래(지지)/이상(저항)으로 나눕니다.
+    터치 횟수가 같으면 처음 터치된 날이 빠른 가격대가 앞에 옵니다.
+
+    Args:
+        series: 분석 데이터
+        analysis_days: 분석할 최근 일수
+        min_touches: 최소 터치 횟수
+        max_levels: 최대 표시할 지지선/저항선 개수
+
+    Returns:
+        Dict: 지지선/저항선 정보
+    """
+    low = series.low[-analysis_days:]
+    high = series.high[-analysis_days:]
+    valid = np.isfinite(low) & np.isfinite(high)
+    low_bucket = (low[valid] // TOUCH_UNIT).astype(np.int64)
+    high_bucket = (high[valid] // TOUCH_UNIT).astype(np.int64)
+
+    # 일별 [저가대, 고가대]를 날짜 순서대로 펼친 가격대 목록 (같은 날 안에서는 오름차순)
+    widths = np.maximum(high_bucket - low_bucket + 1, 0)
+    starts = np.cumsum(widths) - widths
+    buckets = np.repeat(low_bucket, widths) + (np.arange(widths.sum()) - np.repeat(starts, widths))
+
+    prices, first_seen, touches = np.unique(buckets, return_index=True, return_counts=True)
+    # 터치 내림차순, 같으면 처음 나타난 순서
+    order = np.lexsort((first_seen, -touches))[:TOUCH_CANDIDATES]
+
+    current_price = series.current_price
+    support_levels = []
+    resistance_levels = []
+    for price, count in zip(prices[order] * TOUCH_UNIT, touches[order]):
+        if count >= min_touches:
+            level = {'price': int(price), 'touches': int(count)}
+            (support_levels if price < current_price else resistance_levels).append(level)
+
+    return {
+        'support_levels': support_levels[:max_levels],
+        'resistance_levels': resistance_levels[:max_levels],
+        'current_price': series.close[-1],
+        'analysis_period': f"최근 {analysis_days}일",
+        'min_touches_used': min_touches
+    }
+
+
+def calculate_anchored_profiles(series: PriceSeries, anchors, num_ranges: Union[int, str] = 20) -> Dict:
+    """
+    기준일(앵커)부터 현재까지의 거래량 프로파일 (여러 앵커 동시 계산)
+
+    Args:
+        series: 분석 데이터
+        anchors: 앵커 날짜 목록 ('YYYY-MM-DD', datetime 등). 휴장일이면 다음 거래일 사용
+        num_ranges: 가격 구간 수 또는 'auto' (모든 앵커가 같은 구간 공유)
+
+    Returns:
+        Dict: 'profiles' (앵커별 가격 구간 거래량), 'summary' (앵커별 일수, 거래량, VWAP, 최대 거래량 가격)
+    """
+    num_ranges = resolve_num_ranges(series, num_ranges)
+    positions = series.dates.searchsorted(pd.to_datetime(list(anchors)))
+    result = anchored_profiles(series.low, series.high, series.volume, positions, num_ranges=num_ranges,
+                               close=series.close)
+    anchor_dates = series.dates[result['anchors']]
+
+    profiles = pd.DataFrame({
+        'anchor': np.repeat(anchor_dates, num_ranges),
+        'range_start': np.tile(result['range_start'], len(anchor_dates)),
+        'range_end': np.tile(result['range_end'], len(anchor_dates)),
+        'range_center': np.tile((result['range_start'] + result['range_end']) / 2, len(anchor_dates)),
+        'total_volume': result['total_volume'].ravel(),
+        'days_count': result['days_count'].ravel()
+    })
+    summary = pd.DataFrame({
+        'anchor': anchor_dates,
+        'days': result['days'],
+        'total_volume': result['volume'],
+        'vwap': result['vwap'],
+        'poc_price': result['poc_price']
+    })
+
+    return {'profiles': profiles, 'summary': summary}
+
+
+def find_anchor_candidates(series: PriceSeries) -> pd.DataFrame:
+    """
+    앵커 후보 (52주 최고가/최저가 일, 큰 갭 발생일)
+
+    Returns:
+        DataFrame: date, position, reason
+    """
+    return suggest_anchors(series.frame())
+
+
+def generate_report(series: PriceSeries, price_ranges_df: pd.DataFrame, high_density_zones: pd.DataFrame,
+                    support_resistance: Optional[Dict] = None) -> str:
+    """
+    분석 보고서 생성
+
+    Args:
+        series: 분석 데이터
+        price_ranges_df: 가격 구간별 거래량 데이터
+        high_density_zones: 거래량 밀집 구간
+        support_resistance: 지지선/저항선 정보 (None이면 기본 설정으로 계산)
+
+    Returns:
+        str: 분석 보고서
+    """
+    if support_resistance is None:
+        support_resistance = calculate_support_resistance(series)
+
+    report = f"""
+=== {series.symbol} 거래량 밀집도 분석 보고서 ===
+분석 기간: {series.start_date} ~ {series.end_date}
+분석 일수: {len(series)}일
+
+【기본 정보】
+- 현재가: {series.close[-1]:,.0f}원
+- 기간 최고가: {series.high.max():,.0f}원
+- 기간 최저가: {series.low.min():,.0f}원
+- 평균 거래량: {series.volume.mean():,.0f}주
+
+【거래량 밀집 구간 TOP 5】
+"""
+
+    for i, (_, zone) in enumerate(high_density_zones.head().iterrows(), 1):
+        report += f"""
+{i}. {zone['range_start']:,.0f} ~ {zone['range_end']:,.0f}원
+   총 거래량: {zone['total_volume']:,.0f}주
+   해당 일수: {zone['days_count']:.0f}일
+   평균 거래량: {zone['avg_volume']:,.0f}주
+"""
+
+    report += "\n【지지선/저항선 분석】"
+
+    if support_resistance['support_levels']:
+        report += "\n<주요 지지선>"
+        for level in support_resistance['support_levels']:
+            report += f"\n- {level['price']:,.0f}원 (터치 {level['touches']}회)"
+
+    if support_resistance['resistance_levels']:
+        report += "\n<주요 저항선>"
+        for level in support_resistance['resistance_levels']:
+            report += f"\n- {level['price']:,.0f}원 (터치 {level['touches']}회)"
+
+    # 거래량 집중도 계산
+    total_volume = price_ranges_df['total_volume'].sum()
+    top_3_volume = high_density_zones.head(3)['total_volume'].sum()
+    concentration_ratio = (top_3_volume / total_volume) * 100
+
+    report += f"""
+
+【거래량 집중도】
+- 상위 3개 구간 거래량 비중: {concentration_ratio:.1f}%
+- 거래 집중도: {"높음" if concentration_ratio > 30 else "보통" if concentration_ratio > 20 else "낮음"}
+
+【투자 참고사항】
+- 거래량이 집중된 구간은 향후 지지/저항 역할을 할 가능성이 높습니다.
+- 현재가 기준으로 위/아래 밀집 구간을 참고하여 매매 전략을 수립하세요.
+- 거래량 집중도가 높을수록 해당 가격대에서 치열한 매매가 이루어졌음을 의미합니다.
+"""
+
+    return report
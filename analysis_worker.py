@@ -0,0 +1,429 @@
+"""
+백그라운드 분석 작업
+Streamlit 화면이 데이터 I/O를 기다리지 않도록 데이터 수집과 분석을 작업 스레드에서 실행하고
+진행 상황(가져온 행 수, 완료 단계) 조회와 취소를 제공하는 모듈
+(종목별 전체 기간 일봉은 HistoryManager가 한 번만 가져와 모든 기간 옵션에 잘라서 제공)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import FinanceDataReader as fdr
+import pandas as pd
+
+import trading_calendar
+from data_cache import DEFAULT_MAX_AGE, default_data_cache, source_breaker, stale_age
+from profiling import profiled
+from stock_density_analyzer import StockDensityAnalyzer
+
+# 세션이 여러 개여도 동시에 도는 수집/분석 수를 제한하는 공용 작업 스레드
+# (대부분 수집 I/O 대기이므로 종목 비교 페이지의 동시 수집을 고려해 넉넉히 둠)
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='analysis')
+
+# 종목별 전체 기간 일봉을 가져오는 작업 스레드 (분석 작업이 미리 가져오기를 기다리므로 분석 스레드와 분리)
+_prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='history')
+
+# 수집 요청 하나가 담당하는 기간 (이 단위로 진행 상황을 갱신하고 취소를 확인)
+FETCH_CHUNK_DAYS = 365
+# 종목마다 한 번에 가져와 둘 기간 (웹 UI 기간 옵션 중 가장 긴 5년, 짧은 기간은 여기서 잘라 씀)
+HISTORY_DAYS = 1825
+
+
+class AnalysisCancelled(Exception):
+    """분석 작업이 취소됨"""
+
+
+def fetch_in_chunks(symbol: str, start_date: str, end_date: str, chunk_days: int = FETCH_CHUNK_DAYS,
+                    on_chunk: Optional[Callable[[int, int, int], None]] = None,
+                    cancel_event: Optional[threading.Event] = None) -> pd.DataFrame:
+    """
+    긴 기간의 주식 데이터를 기간 단위로 나누어 가져오기 (공용 디스크 캐시에 없는 기간만 요청)
+
+    Args:
+        symbol: 종목 코드
+        start_date: 시작 날짜 ('YYYY-MM-DD')
+        end_date: 종료 날짜 ('YYYY-MM-DD')
+        chunk_days: 요청 하나의 기간 (일)
+        on_chunk: 요청마다 (누적 행 수, 완료 요청 수, 전체 요청 수)로 호출할 함수
+        cancel_event: 설정되면 다음 요청 전에 AnalysisCancelled 발생
+
+    Returns:
+        DataFrame: 날짜순 OHLCV 데이터 (비어 있을 수 있음, 저장된 데이터를 대신 반환했으면
+                   data_cache.stale_age로 나이 확인)
+    """
+    cache = default_data_cache()
+    # 캐시가 있으면 빠진 거래일이 있는 기간만 (주말/휴장일만 남았으면 요청 없음)
+    ranges = cache.missing_ranges(symbol, start_date, end_date) if cache is not None else [(start_date, end_date)]
+    if cache is not None and ranges:
+        # 최근 거래일만 빠졌으면 저장된 데이터를 바로 보여 주고 백그라운드에서 갱신
+        stale = cache.stale(symbol, start_date, end_date)
+        if stale is not None:
+            cache.refresh_in_background(symbol, start_date, end_date, fdr.DataReader)
+            if on_chunk is not None:
+                on_chunk(len(stale), 1, 1)
+            return stale
+
+    chunks = []
+    for range_index, (range_start, range_end) in enumerate(ranges):
+        start = datetime.strptime(range_start, '%Y-%m-%d')
+        end = datetime.strptime(range_end, '%Y-%m-%d')
+        while start <= end:
+            chunk_end = min(start + timedelta(days=chunk_days - 1), end)
+            chunks.append((range_index, start.strftime('%Y-%m-%d'), chunk_end.strftime('%Y-%m-%d')))
+            start = chunk_end + timedelta(days=1)
+
+    frames = []
+    range_frames = []
+    rows = 0
+    for i, (range_index, chunk_start, chunk_end) in enumerate(chunks):
+        if cancel_event is not None and cancel_event.is_set():
+            raise AnalysisCancelled()
+        try:
+            frame = source_breaker.call(fdr.DataReader, symbol, chunk_start, chunk_end)
+        except Exception:
+            # 데이터 소스가 실패하면 저장된 데이터를 나이와 관계없이 사용 (없으면 실패)
+            stale = cache.stale(symbol, start_date, end_date, any_age=True) if cache is not None else None
+            if stale is None:
+                raise
+            return stale
+        if frame is not None and not frame.empty:
+            frames.append(frame)
+            range_frames.append(frame)
+            rows += len(frame)
+        if on_chunk is not None:
+            on_chunk(rows, i + 1, len(chunks))
+        # 기간 하나를 다 가져오면 캐시에 합침 (기존 기간과 이어지도록 기간 단위로 저장)
+        if cache is not None and (i + 1 == len(chunks) or chunks[i + 1][0] != range_index):
+            range_start, range_end = ranges[range_index]
+            cache.put(symbol, range_start, range_end,
+                      pd.concat(range_frames) if range_frames else pd.DataFrame())
+            range_frames = []
+
+    if cache is not None:
+        entry = cache.load(symbol)
+        if entry is not None:
+            data = entry['data'].loc[start_date:end_date].copy()
+            if not chunks and on_chunk is not None:
+                on_chunk(len(data), 1, 1)
+            return data
+
+    if not frames:
+        return pd.DataFrame()
+    data = pd.concat(frames)
+    return data[~data.index.duplicated(keep='last')].sort_index()
+
+
+def _slice_dates(data: pd.DataFrame, start_date: str, end_date: str) -> pd.DataFrame:
+    """날짜순 데이터에서 기간 행 범위만 잘라 반환 (iloc 슬라이스이므로 복사 없음)"""
+    start = data.index.searchsorted(pd.Timestamp(start_date), side='left')
+    end = data.index.searchsorted(pd.Timestamp(end_date), side='right')
+    return data.iloc[start:end]
+
+
+class HistoryManager:
+    """
+    종목별 전체 기간 일봉 메모리 보관소
+
+    종목마다 오늘까지 HISTORY_DAYS일(더 이른 시작일을 요청하면 그 날부터)을 한 번 가져와 두고,
+    기간 옵션(1개월~5년)과 직접 입력한 기간은 복사 없이 행 범위만 잘라 반환하므로 기간을 바꿔도
+    다시 수집하지 않습니다. 종목을 고르는 순간 prefetch()로 미리 가져올 수 있으며, 같은 종목의
+    수집은 (미리 가져오기든 get() 요청이든) 한 번에 하나만 실행하고 나머지는 그 결과를 기다립니다.
+    모든 Streamlit 세션이 함께 쓰므로 반환한 데이터는 읽기 전용입니다.
+    """
+
+    def __init__(self, history_days: int = HISTORY_DAYS, max_symbols: int = 32):
+        """
+        Args:
+            history_days: 종목마다 가져올 기간 (일)
+            max_symbols: 메모리에 둘 최대 종목 수 (넘으면 가장 오래 안 쓴 종목부터 제거)
+        """
+        self.history_days = history_days
+        self.max_symbols = max_symbols
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _history_range(self, start_date: Optional[str] = None) -> Tuple[str, str]:
+        """가져올 전체 기간 (한국 시각 기준 오늘까지, 기본 history_days일 전부터)"""
+        today = trading_calendar.now_kst()
+        history_start = (today - timedelta(days=self.history_days)).strftime('%Y-%m-%d')
+        return min(history_start, start_date or history_start), today.strftime('%Y-%m-%d')
+
+    @staticmethod
+    def _covers(entry: Optional[Dict], start_date: str, end_date: str) -> bool:
+        """보관 중인 데이터로 기간을 그대로 제공할 수 있는지 (새로 확정된 일봉이 없고 예전 데이터가 아님)"""
+        if entry is None or not (entry['start_date'] <= start_date and end_date <= entry['end_date']):
+            return False
+        if stale_age(entry['data']) is not None:
+            return False
+        return (trading_calendar.unchanged_since(entry['end_date'], entry['loaded_at'])
+                or time.time() - entry['loaded_at'] <= DEFAULT_MAX_AGE)
+
+    def _lookup(self, symbol: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if not self._covers(entry, start_date, end_date):
+                return None
+            self._entries.move_to_end(symbol)
+            return entry['data']
+
+    def _load(self, symbol: str, start_date: str, end_date: str, on_chunk=None, cancel_event=None) -> pd.DataFrame:
+        """전체 기간을 가져와 보관 (공용 디스크 캐시에 있으면 빠진 거래일만 요청)"""
+        data = fetch_in_chunks(symbol, start_date, end_date, on_chunk=on_chunk, cancel_event=cancel_event)
+        if not data.empty:
+            with self._lock:
+                self._entries[symbol] = {'data': data, 'start_date': start_date, 'end_date': end_date,
+                                         'loaded_at': time.time()}
+                self._entries.move_to_end(symbol)
+                while len(self._entries) > self.max_symbols:
+                    self._entries.popitem(last=False)
+        return data
+
+    def frames(self) -> List[pd.DataFrame]:
+        """보관 중인 종목별 전체 기간 데이터 (메모리 사용량 집계용)"""
+        with self._lock:
+            return [entry['data'] for entry in self._entries.values()]
+
+    def prefetch(self, symbol: str) -> Optional[Future]:
+        """종목 전체 기간을 백그라운드에서 가져오기 시작 (이미 있거나 가져오는 중이면 그대로)"""
+        start_date, end_date = self._history_range()
+        if self._lookup(symbol, start_date, end_date) is not None:
+            return None
+        with self._lock:
+            future = self._loading.get(symbol)
+            if future is None:
+                future = _prefetch_executor.submit(self._load, symbol, start_date, end_date)
+                self._loading[symbol] = future
+                future.add_done_callback(lambda _: self._forget(symbol, future))
+        return future
+
+    def _forget(self, symbol: str, future: Future):
+        with self._lock:
+            if self._loading.get(symbol) is future:
+                del self._loading[symbol]
+
+    def get(self, symbol: str, start_date: str, end_date: str,
+            on_chunk: Optional[Callable[[int, int, int], None]] = None,
+            cancel_event: Optional[threading.Event] = None) -> pd.DataFrame:
+        """
+        기간 데이터 (보관 중인 전체 기간을 잘라 반환, 없으면 전체 기간을 가져와 보관)
+
+        Args:
+            symbol: 종목 코드
+            start_date: 시작 날짜 ('YYYY-MM-DD')
+            end_date: 종료 날짜 ('YYYY-MM-DD')
+            on_chunk: fetch_in_chunks와 같은 진행 상황 콜백
+            cancel_event: 설정되면 AnalysisCancelled 발생
+
+        Returns:
+            DataFrame: 기간 데이터 (전체 기간 데이터의 읽기 전용 슬라이스, 비어 있을 수 있음)
+        """
+        while True:
+            data = self._lookup(symbol, start_date, end_date)
+            if data is not None:
+                data = _slice_dates(data, start_date, end_date)
+                if on_chunk is not None:
+                    on_chunk(len(data), 1, 1)
+                return data
+
+            # 같은 종목을 이미 가져오는 중이면(미리 가져오기나 다른 세션의 요청) 새로 요청하지 않고 기다림
+            with self._lock:
+                future = self._loading.get(symbol)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._loading[symbol] = future
+            if owner:
+                break
+            while not future.done():
+                if cancel_event is not None and cancel_event.is_set():
+                    raise AnalysisCancelled()
+                time.sleep(0.05)
+            # 데이터가 없는 종목이면 그대로 반환, 실패/취소되었거나 기간이 모자라면 다시 확인
+            if not future.cancelled() and future.exception() is None and future.result().empty:
+                return future.result()
+
+        history_start, history_end = self._history_range(start_date)
+        try:
+            data = self._load(symbol, history_start, max(history_end, end_date),
+                              on_chunk=on_chunk, cancel_event=cancel_event)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(data)
+        finally:
+            self._forget(symbol, future)
+        if data.empty:
+            return data
+        return _slice_dates(data, start_date, end_date)
+
+
+# 프로세스(모든 Streamlit 세션) 공용 종목별 일봉 보관소
+history_manager = HistoryManager()
+
+
+class AnalysisJob:
+    """
+    작업 스레드에서 실행되는 종목 분석 하나
+
+    streamlit_app의 분석 파라미터(current_params)를 그대로 받아 수집 → 가격 구간 →
+    밀집 구간 → 지지선/저항선 → (KDE) 순서로 실행하고, 단계 사이와 수집 요청 사이마다
+    취소 여부를 확인합니다. 화면은 progress()로 상태만 읽고, 끝난 작업의 result()를
+    파라미터가 여전히 같을 때만 반영합니다.
+    """
+
+    def __init__(self, params: Dict, stock_name: str, analyzer: Optional[StockDensityAnalyzer] = None,
+                 profile: bool = False):
+        """
+        Args:
+            params: 분석 파라미터 (stock_code, start_date, end_date, num_ranges, top_zones,
+                    sr_days, min_touches, max_sr_levels, use_kde)
+            stock_name: 화면 표시용 종목명
+            analyzer: 같은 종목/기간 데이터를 이미 가진 분석기 (있으면 수집 생략)
+            profile: 이 작업을 프로파일링할지 (STOCK_DENSITY_PROFILE이 켜져 있으면 항상)
+        """
+        self.params = params
+        self.stock_name = stock_name
+        self.profile = profile
+        self.data_key = (params['stock_code'], params['start_date'], params['end_date'])
+        self._analyzer = analyzer
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._future = None
+
+        stages = ['데이터 수집', '가격 구간 분석', '밀집 구간 탐색', '지지선/저항선 분석']
+        if params['use_kde']:
+            stages.append('연속 밀도(KDE) 분석')
+        self._progress = {
+            'stages': stages,
+            'stage': stages[0],
+            'stages_done': 0,
+            'rows': 0,
+            'chunks_done': 0,
+            'chunks_total': 0
+        }
+
+    def start(self) -> 'AnalysisJob':
+        """작업 스레드에서 실행 시작"""
+        self._future = _executor.submit(self._run)
+        return self
+
+    def cancel(self):
+        """취소 요청 (대기 중이면 바로 취소, 실행 중이면 다음 확인 지점에서 중단)"""
+        self._cancel_event.set()
+        if self._future is not None:
+            self._future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def done(self) -> bool:
+        """완료(성공/실패/취소) 여부"""
+        return self._future is not None and self._future.done()
+
+    def progress(self) -> Dict:
+        """
+        진행 상황
+
+        Returns:
+            Dict: stages, stage(현재 단계), stages_done, rows(가져온 행 수),
+                  chunks_done, chunks_total, fraction(0~1 진행률)
+        """
+        with self._lock:
+            progress = dict(self._progress)
+        fetch_fraction = (progress['chunks_done'] / progress['chunks_total']
+                          if progress['chunks_total'] else 0.0)
+        stage_fraction = fetch_fraction if progress['stages_done'] == 0 else 0.0
+        progress['fraction'] = min((progress['stages_done'] + stage_fraction) / len(progress['stages']), 1.0)
+        return progress
+
+    def result(self) -> Dict:
+        """
+        완료된 작업 결과 (작업 중 발생한 예외는 그대로 다시 발생)
+
+        Returns:
+            Dict: analyzer, data_key, analysis_data (데이터가 없으면 analysis_data는 None)
+        """
+        return self._future.result()
+
+    def _update(self, **values):
+        with self._lock:
+            self._progress.update(values)
+
+    def _stage_done(self):
+        if self._cancel_event.is_set():
+            raise AnalysisCancelled()
+        with self._lock:
+            self._progress['stages_done'] += 1
+            done = self._progress['stages_done']
+            if done < len(self._progress['stages']):
+                self._progress['stage'] = self._progress['stages'][done]
+
+    def _run(self) -> Dict:
+        stock_code, start_date, end_date = self.data_key
+        with profiled(f"analysis_{stock_code}_{start_date}_{end_date}", requested=self.profile):
+            return self._analyze()
+
+    def _analyze(self) -> Dict:
+        params = self.params
+        stock_code, start_date, end_date = self.data_key
+
+        analyzer = self._analyzer
+        if analyzer is not None and analyzer.data is not None:
+            data = analyzer.data
+            self._update(rows=len(data))
+        else:
+            data = history_manager.get(
+                stock_code, start_date, end_date,
+                on_chunk=lambda rows, done, total: self._update(rows=rows, chunks_done=done, chunks_total=total),
+                cancel_event=self._cancel_event
+            )
+            if data.empty:
+                return {'analyzer': None, 'data_key': self.data_key, 'analysis_data': None}
+            analyzer = StockDensityAnalyzer()
+            analyzer.set_data(stock_code, start_date, end_date, data)
+        self._stage_done()
+
+        price_ranges = analyzer.calculate_price_ranges(num_ranges=params['num_ranges'])
+        self._stage_done()
+
+        high_density_zones = analyzer.find_high_density_zones(price_ranges, top_n=params['top_zones'])
+        self._stage_done()
+
+        support_resistance = analyzer.calculate_support_resistance(
+            analysis_days=params['sr_days'],
+            min_touches=params['min_touches'],
+            max_levels=params['max_sr_levels']
+        )
+        self._stage_done()
+
+        kde_result = None
+        if params['use_kde']:
+            kde = analyzer.calculate_volume_kde()
+            kde_result = {
+                'kde': kde,
+                'zones': analyzer.find_kde_density_zones(kde, top_n=params['top_zones']),
+                'support_resistance': analyzer.calculate_kde_support_resistance(kde, max_levels=params['max_sr_levels'])
+            }
+            self._stage_done()
+
+        return {
+            'analyzer': analyzer,
+            'data_key': self.data_key,
+            'analysis_data': {
+                'data': data,
+                'price_ranges': price_ranges,
+                'high_density_zones': high_density_zones,
+                'support_resistance': support_resistance,
+                'kde_result': kde_result,
+                'stock_name': self.stock_name,
+                'stock_code': stock_code,
+                'period': f"{start_date} ~ {end_date}"
+            }
+        }
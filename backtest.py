@@ -0,0 +1,242 @@
+"""
+거래량 밀집 구간 / 지지선·저항선 백테스트
+리밸런싱 시점마다 과거 데이터만으로 구간을 다시 계산하고, 이후 일정 기간 동안
+해당 가격대에서 반등했는지(bounce) 돌파됐는지(break)를 배열 연산으로 평가
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from volume_profile import batch_price_profiles, batch_support_resistance
+
+
+def _evaluate(band_low, band_high, is_support, fwd_low, fwd_high, fwd_close_min, fwd_close_max, tolerance):
+    """
+    신호 가격대의 이후 움직임 판정
+
+    지지: 이후 저가가 가격대 상단 이하로 내려오면 터치, 종가가 하단 x (1 - tolerance) 미만이면 돌파
+    저항: 이후 고가가 가격대 하단 이상으로 올라오면 터치, 종가가 상단 x (1 + tolerance) 초과면 돌파
+    터치했지만 돌파되지 않았으면 반등(bounce)
+    """
+    touched = np.where(is_support, fwd_low <= band_high, fwd_high >= band_low)
+    broken = np.where(is_support,
+                      fwd_close_min < band_low * (1 - tolerance),
+                      fwd_close_max > band_high * (1 + tolerance))
+    outcome = np.where(~touched, 'untouched', np.where(broken, 'break', 'bounce'))
+    return touched, outcome
+
+
+def walk_forward_backtest(data: pd.DataFrame, lookback: int = 120, horizon: int = 20, step: int = 5,
+                          num_ranges: int = 20, top_n: int = 5, analysis_days: int = 60,
+                          min_touches: int = 3, max_levels: int = 3,
+                          tolerance: float = 0.01) -> pd.DataFrame:
+    """
+    단일 종목 워크포워드 백테스트
+
+    리밸런싱일 t마다 t까지의 최근 lookback일로 밀집 구간(find_high_density_zones와 같은
+    거래량 상위 구간)과 지지선/저항선(calculate_support_resistance와 같은 터치 방식)을
+    계산하고, t+1 ~ t+horizon 구간의 움직임으로 결과를 판정합니다. 모든 리밸런싱
+    시점을 (시점 x 일) 배열로 묶어 한 번에 계산하므로 일별 파이썬 루프가 없습니다.
+
+    Args:
+        data: OHLCV 데이터 (Low, High, Close, Volume 컬럼)
+        lookback: 구간 계산에 사용할 과거 일수
+        horizon: 결과를 판정할 이후 일수
+        step: 리밸런싱 간격 (거래일)
+        num_ranges: 가격 구간 수
+        top_n: 리밸런싱마다 평가할 밀집 구간 수
+        analysis_days: 지지선/저항선 분석 일수 (lookback 이하)
+        min_touches: 지지선/저항선 최소 터치 횟수
+        max_levels: 지지선/저항선 각각 최대 개수
+        tolerance: 돌파 판정 여유 비율
+
+    Returns:
+        DataFrame: 신호별 결과 (date, signal, side, band_low, band_high, strength,
+                   touched, outcome, forward_return). strength는 신호 종류와 관계없이 창 안의 비중으로,
+                   밀집 구간은 lookback일 거래량 중 구간 거래량 비중, 지지선/저항선은 analysis_days일 중
+                   레벨을 터치한 날의 비중 (0~1). 지지선/저항선은 band_low = band_high = 레벨 가격
+    """
+    columns = ['date', 'signal', 'side', 'band_low', 'band_high', 'strength',
+               'touched', 'outcome', 'forward_return']
+    analysis_days = min(analysis_days, lookback)
+    if len(data) < lookback + horizon:
+        return pd.DataFrame(columns=columns)
+
+    low = data['Low'].to_numpy(dtype=float)
+    high = data['High'].to_numpy(dtype=float)
+    close = data['Close'].to_numpy(dtype=float)
+    volume = data['Volume'].to_numpy(dtype=float)
+
+    # 리밸런싱일 t: 창은 t-lookback+1 ~ t, 판정은 t+1 ~ t+horizon
+    rebalance = np.arange(lookback - 1, len(data) - horizon, step)
+    window_start = rebalance - lookback + 1
+    low_win = sliding_window_view(low, lookback)[window_start]
+    high_win = sliding_window_view(high, lookback)[window_start]
+    volume_win = sliding_window_view(volume, lookback)[window_start]
+
+    fwd_low = sliding_window_view(low[1:], horizon)[rebalance].min(axis=1)
+    fwd_high = sliding_window_view(high[1:], horizon)[rebalance].max(axis=1)
+    fwd_close = sliding_window_view(close[1:], horizon)[rebalance]
+    fwd_close_min, fwd_close_max = fwd_close.min(axis=1), fwd_close.max(axis=1)
+    current = close[rebalance]
+    forward_return = close[rebalance + horizon] / current - 1
+
+    frames = []
+
+    # 1. 밀집 구간: 거래량 상위 top_n 구간 (현재가를 포함하는 구간은 제외)
+    window_profiles = batch_price_profiles(low_win, high_win, volume_win, num_ranges)
+    starts, ends = window_profiles['range_start'], window_profiles['range_end']
+    profiles = window_profiles['total_volume']
+    k = min(top_n, num_ranges)
+    top = np.argpartition(-profiles, k - 1, axis=1)[:, :k]
+    row = np.repeat(np.arange(len(rebalance)), k)
+    col = top.ravel()
+    band_low, band_high = starts[row, col], ends[row, col]
+    outside = (band_high < current[row]) | (band_low > current[row])
+    row, band_low, band_high = row[outside], band_low[outside], band_high[outside]
+    window_volume = volume_win.sum(axis=1)
+    strength = np.divide(profiles[row, col[outside]], window_volume[row],
+                         out=np.zeros(len(row)), where=window_volume[row] > 0)
+    frames.append(('zone', row, band_low, band_high, strength, band_high < current[row]))
+
+    # 2. 지지선/저항선: 1000원 단위 터치 상위 후보 중 최소 터치 이상
+    #    (가격대는 레벨 가격 하나, 돌파 여유는 _evaluate에서 한 번만 적용)
+    recent = slice(lookback - analysis_days, lookback)
+    levels = batch_support_resistance(low_win[:, recent], high_win[:, recent], current,
+                                      min_touches=min_touches, max_levels=max_levels)
+    level = levels['price']
+    frames.append(('level', levels['row'], level, level, levels['touches'] / analysis_days,
+                   levels['is_support']))
+
+    events = []
+    for signal, row, band_low, band_high, strength, is_support in frames:
+        touched, outcome = _evaluate(band_low, band_high, is_support, fwd_low[row], fwd_high[row],
+                                     fwd_close_min[row], fwd_close_max[row], tolerance)
+        events.append(pd.DataFrame({
+            'date': data.index[rebalance[row]],
+            'signal': signal,
+            'side': np.where(is_support, 'support', 'resistance'),
+            'band_low': band_low,
+            'band_high': band_high,
+            'strength': strength,
+            'touched': touched,
+            'outcome': outcome,
+            'forward_return': forward_return[row],
+        }))
+
+    return pd.concat(events, ignore_index=True).sort_values(['date', 'signal'], kind='stable',
+                                                            ignore_index=True)
+
+
+def summarize_backtest(events: pd.DataFrame, by=('signal', 'side')) -> pd.DataFrame:
+    """
+    신호 종류/방향별 적중률 통계
+
+    Args:
+        events: walk_forward_backtest 또는 run_backtest_universe 결과
+        by: 집계 기준 컬럼
+
+    Returns:
+        DataFrame: 기준별 신호 수, 터치율, 반등률(적중률), 돌파율, 평균 이후 수익률
+    """
+    by = list(by)
+    stats = ['signals', 'touched', 'bounces', 'breaks', 'touch_rate', 'hit_rate', 'break_rate',
+             'avg_forward_return']
+    if events.empty:
+        return pd.DataFrame(columns=by + stats)
+
+    grouped = events.assign(
+        bounce=events['outcome'] == 'bounce',
+        broke=events['outcome'] == 'break'
+    ).groupby(by)
+
+    summary = grouped.agg(
+        signals=('outcome', 'size'),
+        touched=('touched', 'sum'),
+        bounces=('bounce', 'sum'),
+        breaks=('broke', 'sum'),
+        avg_forward_return=('forward_return', 'mean')
+    ).reset_index()
+    summary['touch_rate'] = summary['touched'] / summary['signals']
+    touched = summary['touched'].where(summary['touched'] > 0)
+    summary['hit_rate'] = summary['bounces'] / touched
+    summary['break_rate'] = summary['breaks'] / touched
+    return summary[by + stats]
+
+
+def _backtest_symbol(args):
+    """프로세스 풀 작업 단위 (종목 하나)"""
+    symbol, data, params = args
+    events = walk_forward_backtest(data, **params)
+    events.insert(0, 'symbol', symbol)
+    return events
+
+
+def run_backtest_universe(data_by_symbol: Dict[str, pd.DataFrame], max_workers: Optional[int] = None,
+                          **params) -> Dict[str, pd.DataFrame]:
+    """
+    여러 종목 병렬 백테스트
+
+    Args:
+        data_by_symbol: 종목 코드별 OHLCV 데이터
+        max_workers: 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 순차 실행)
+        **params: walk_forward_backtest 파라미터
+
+    Returns:
+        Dict: {'events': 전체 신호별 결과, 'summary': 전체 적중률, 'by_symbol': 종목별 적중률}
+    """
+    tasks = [(symbol, data, params) for symbol, data in data_by_symbol.items()]
+    if max_workers == 1 or len(tasks) <= 1:
+        results = [_backtest_symbol(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_backtest_symbol, tasks))
+
+    results = [result for result in results if not result.empty]
+    events = pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+    return {
+        'events': events,
+        'summary': summarize_backtest(events),
+        'by_symbol': summarize_backtest(events, by=('symbol', 'signal', 'side'))
+    }
+
+
+def main():
+    """주요 종목 최근 3년 백테스트 예제"""
+    from stock_density_analyzer import StockDensityAnalyzer
+
+    stocks = {
+        '005930': '삼성전자',
+        '000660': 'SK하이닉스',
+        '035420': 'NAVER',
+        '005380': '현대차',
+        '012330': '현대모비스'
+    }
+
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=365 * 3)).strftime('%Y-%m-%d')
+
+    print("=== 거래량 밀집 구간 / 지지·저항선 백테스트 ===")
+    data_by_symbol = {}
+    for code, name in stocks.items():
+        data = StockDensityAnalyzer().fetch_data(code, start_date, end_date)
+        if data is not None:
+            data_by_symbol[code] = data
+
+    result = run_backtest_universe(data_by_symbol)
+
+    print("\n=== 전체 적중률 ===")
+    for _, row in result['summary'].iterrows():
+        side = "지지" if row['side'] == 'support' else "저항"
+        signal = "밀집 구간" if row['signal'] == 'zone' else "지지/저항선"
+        print(f"{signal} ({side}): 신호 {row['signals']:,}개, 터치율 {row['touch_rate'] * 100:.1f}%, "
+              f"반등률 {row['hit_rate'] * 100:.1f}%, 돌파율 {row['break_rate'] * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+비대화형 명령행 분석 도구
+프롬프트와 차트 창 없이 여러 종목을 한 번에 분석해 JSON/CSV로 표준 출력에 내보내는
+cron/파이프라인용 인터페이스
+
+사용 예:
+    python cli.py analyze 005930 000660 --days 365 --num-ranges 15 20
+    python cli.py analyze 005930 --format csv --output zones.csv
+    cat requests.jsonl | python cli.py batch
+"""
+
+import os
+
+# 차트 창이 뜨지 않도록 분석기(matplotlib) 불러오기 전에 비대화형 백엔드 지정
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import argparse
+import contextlib
+import hashlib
+import json
+import sys
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+import profiling
+import trading_calendar
+from stock_density_analyzer import StockDensityAnalyzer
+
+# 분석 설정 기본값 (analyze 옵션과 batch 요청에서 생략된 항목)
+DEFAULT_OPTIONS = {
+    'num_ranges': 20,
+    'top_zones': 5,
+    'sr_days': 60,
+    'min_touches': 3,
+    'max_levels': 3,
+    'kde': False
+}
+
+
+class AnalysisSession:
+    """
+    한 번의 실행 동안 종목/기간별 분석기를 보관해 재사용하는 세션
+
+    같은 종목/기간을 설정만 바꿔 여러 번 분석하면 데이터는 한 번만 가져오고,
+    가격 구간은 분석기의 다중 해상도 프로파일로 재구간화만 합니다.
+    분석기의 진행 메시지는 표준 출력(결과)과 섞이지 않도록 표준 오류로 보냅니다.
+    """
+
+    def __init__(self, max_analyzers: Optional[int] = None):
+        """
+        Args:
+            max_analyzers: 보관할 최대 분석기 수 (None이면 제한 없음, 넘으면 가장 오래 안 쓴 것부터 제거)
+        """
+        self.max_analyzers = max_analyzers
+        self._analyzers: 'OrderedDict[Tuple[str, str, str], Optional[StockDensityAnalyzer]]' = OrderedDict()
+
+    def get_analyzer(self, symbol: str, start_date: str, end_date: str) -> Optional[StockDensityAnalyzer]:
+        """종목/기간 데이터를 가진 분석기 (처음 요청할 때만 데이터를 가져옴, 실패하면 None)"""
+        key = (symbol, start_date, end_date)
+        if key in self._analyzers:
+            self._analyzers.move_to_end(key)
+            return self._analyzers[key]
+
+        analyzer = StockDensityAnalyzer()
+        with contextlib.redirect_stdout(sys.stderr):
+            data = analyzer.fetch_data(symbol, start_date, end_date)
+        # 갱신을 기다리지 않고 받은 저장된 데이터는 보관하지 않아 다음 요청 때 갱신된 캐시를 사용
+        if data is not None and data_cache.stale_age(data) is not None:
+            return analyzer
+        self._analyzers[key] = analyzer if data is not None else None
+        if self.max_analyzers is not None and len(self._analyzers) > self.max_analyzers:
+            self._analyzers.popitem(last=False)
+        return self._analyzers[key]
+
+    def analyze(self, symbol: str, start_date: str, end_date: str, num_ranges: Union[int, str] = 20,
+                top_zones: int = 5, sr_days: int = 60, min_touches: int = 3, max_levels: int = 3,
+                kde: bool = False) -> Dict:
+        """
+        종목 하나 분석
+
+        Args:
+            symbol: 종목 코드
+            start_date: 시작 날짜 ('YYYY-MM-DD')
+            end_date: 종료 날짜 ('YYYY-MM-DD')
+            num_ranges: 가격 구간 수 ('auto'이면 자동 선택, 결과에는 실제 구간 수 기록)
+            top_zones: 밀집 구간 수
+            sr_days: 지지선/저항선 분석 일수
+            min_touches: 지지선/저항선 최소 터치 횟수
+            max_levels: 지지선/저항선 각각 최대 개수
+            kde: 연속 밀도(KDE) 밀집 구간 포함 여부
+
+        Returns:
+            Dict: 분석 설정, 현재가, price_ranges, high_density_zones, support_resistance
+                  (kde이면 kde_zones, 저장된 데이터를 대신 썼으면 data_age(초) 추가,
+                  데이터를 가져오지 못하면 error)
+        """
+        result = {
+            'symbol': symbol,
+            'start_date': start_date,
+            'end_date': end_date,
+            'num_ranges': num_ranges,
+            'top_zones': top_zones,
+            'sr_days': sr_days,
+            'min_touches': min_touches,
+            'max_levels': max_levels
+        }
+        with profiling.profiled(f"analysis_{symbol}_{start_date}_{end_date}"):
+            analyzer = self.get_analyzer(symbol, start_date, end_date)
+            if analyzer is None:
+                result['error'] = "데이터를 가져올 수 없습니다"
+                return result
+
+            with contextlib.redirect_stdout(sys.stderr):
+                price_ranges = analyzer.calculate_price_ranges(num_ranges=num_ranges)
+                high_density_zones = analyzer.find_high_density_zones(price_ranges, top_n=top_zones)
+                support_resistance = analyzer.calculate_support_resistance(
+                    analysis_days=sr_days, min_touches=min_touches, max_levels=max_levels
+                )
+                kde_zones = analyzer.find_kde_density_zones(analyzer.calculate_volume_kde(), top_n=top_zones) if kde else None
+
+        result.update({
+            'num_ranges': len(price_ranges),
+            'as_of': analyzer.data.index[-1].strftime('%Y-%m-%d'),
+            'days': len(analyzer.data),
+            'current_price': float(analyzer.data['Close'].iloc[-1]),
+            'price_ranges': price_ranges.to_dict('records'),
+            'high_density_zones': high_density_zones.to_dict('records'),
+            'support_resistance': support_resistance
+        })
+        if kde_zones is not None:
+            result['kde_zones'] = kde_zones.to_dict('records')
+        age = data_cache.stale_age(analyzer.data)
+        if age is not None:
+            result['data_age'] = round(age)
+        return result
+
+
+def _json_default(value):
+    """numpy/pandas 값을 JSON으로 변환"""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.strftime('%Y-%m-%d')
+    raise TypeError(f"JSON으로 변환할 수 없는 값: {type(value).__name__}")
+
+
+def to_json(result) -> str:
+    """분석 결과를 JSON 문자열로 변환"""
+    return json.dumps(result, ensure_ascii=False, default=_json_default)
+
+
+def to_rows(results: List[Dict]) -> pd.DataFrame:
+    """
+    분석 결과를 밀집 구간/지지·저항선 한 줄씩의 표로 펼치기 (CSV 출력용)
+
+    Returns:
+        DataFrame: symbol, as_of, num_ranges, current_price, kind, rank, low, high, strength
+                   (kind는 zone, kde_zone, support, resistance)
+    """
+    rows = []
+    for result in results:
+        if 'error' in result:
+            continue
+        base = {key: result[key] for key in ('symbol', 'as_of', 'num_ranges', 'current_price')}
+        for rank, zone in enumerate(result['high_density_zones'], 1):
+            rows.append(dict(base, kind='zone', rank=rank, low=zone['range_start'],
+                             high=zone['range_end'], strength=zone['total_volume']))
+        for rank, zone in enumerate(result.get('kde_zones', []), 1):
+            rows.append(dict(base, kind='kde_zone', rank=rank, low=zone['zone_start'],
+                             high=zone['zone_end'], strength=zone['strength']))
+        for kind in ('support', 'resistance'):
+            for rank, level in enumerate(result['support_resistance'][f'{kind}_levels'], 1):
+                rows.append(dict(base, kind=kind, rank=rank, low=level['price'],
+                                 high=level['price'], strength=level['touches']))
+    columns = ['symbol', 'as_of', 'num_ranges', 'current_price', 'kind', 'rank', 'low', 'high', 'strength']
+    return pd.DataFrame(rows, columns=columns)
+
+
+def _num_ranges(value: str):
+    """--num-ranges 값 (정수 또는 auto)"""
+    return 'auto' if value == 'auto' else int(value)
+
+
+def _date_range(args) -> Tuple[str, str]:
+    """--start/--end/--days 옵션으로 분석 기간 결정"""
+    end_date = args.end or trading_calendar.now_kst().strftime('%Y-%m-%d')
+    start_date = args.start or (datetime.strptime(end_date, '%Y-%m-%d')
+                                - timedelta(days=args.days)).strftime('%Y-%m-%d')
+    return start_date, end_date
+
+
+def parse_request(request: Dict) -> Tuple[str, str, str, Dict]:
+    """
+    JSON 분석 요청을 analyze 인자로 변환
+
+    요청 예: {"symbol": "005930", "days": 365, "num_ranges": 15}
+    (start_date/end_date 또는 days, 생략한 설정은 DEFAULT_OPTIONS)
+
+    Returns:
+        Tuple: (종목 코드, 시작 날짜, 종료 날짜, 분석 설정)
+
+    Raises:
+        KeyError: symbol이 없을 때
+        ValueError: 날짜 형식이 잘못되었을 때
+    """
+    end_date = request.get('end_date') or trading_calendar.now_kst().strftime('%Y-%m-%d')
+    start_date = request.get('start_date') or (
+        datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=request.get('days', 365))
+    ).strftime('%Y-%m-%d')
+    options = {key: request.get(key, default) for key, default in DEFAULT_OPTIONS.items()}
+    return str(request['symbol']), start_date, end_date, options
+
+
+def request_key(symbol: str, start_date: str, end_date: str, options: Dict) -> str:
+    """분석 요청 키 (종목, 기간, 분석 설정의 해시, 서비스/예열 작업의 결과 보관 키)"""
+    payload = json.dumps([symbol, start_date, end_date, options], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def cmd_analyze(args, session: AnalysisSession) -> int:
+    """analyze: 여러 종목 x 여러 구간 수 분석 결과 출력"""
+    start_date, end_date = _date_range(args)
+    results = [
+        session.analyze(symbol, start_date, end_date, num_ranges=num_ranges, top_zones=args.top_zones,
+                        sr_days=args.sr_days, min_touches=args.min_touches, max_levels=args.max_levels,
+                        kde=args.kde)
+        for symbol in args.symbols
+        for num_ranges in args.num_ranges
+    ]
+
+    with (open(args.output, 'w', encoding='utf-8', newline='') if args.output
+          else contextlib.nullcontext(sys.stdout)) as out:
+        if args.format == 'csv':
+            to_rows(results).to_csv(out, index=False)
+        elif args.format == 'jsonl':
+            for result in results:
+                out.write(to_json(result) + '\n')
+        else:
+            out.write(to_json(results) + '\n')
+
+    for result in results:
+        if 'error' in result:
+            print(f"{result['symbol']}: {result['error']}", file=sys.stderr)
+    return 1 if any('error' in result for result in results) else 0
+
+
+def cmd_batch(args, session: AnalysisSession) -> int:
+    """
+    batch: 한 줄에 JSON 요청 하나씩 읽어 한 줄에 결과 하나씩 출력 (요청 형식은 parse_request)
+    """
+    failed = False
+    source = open(args.input, encoding='utf-8') if args.input else sys.stdin
+    with source:
+        for line in source:
+            if not line.strip():
+                continue
+            try:
+                symbol, start_date, end_date, options = parse_request(json.loads(line))
+                result = session.analyze(symbol, start_date, end_date, **options)
+            except (ValueError, KeyError, TypeError) as e:
+                result = {'request': line.strip(), 'error': f"잘못된 요청: {e}"}
+            failed = failed or 'error' in result
+            sys.stdout.write(to_json(result) + '\n')
+            sys.stdout.flush()
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="주식 거래량 밀집도 분석 (비대화형, JSON/CSV 출력)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    analyze = subparsers.add_parser('analyze', help="종목 분석 결과 출력")
+    analyze.add_argument('symbols', nargs='+', help="종목 코드 (예: 005930 000660)")
+    analyze.add_argument('--start', help="시작 날짜 (YYYY-MM-DD, 없으면 종료일 - days)")
+    analyze.add_argument('--end', help="종료 날짜 (YYYY-MM-DD, 기본 오늘)")
+    analyze.add_argument('--days', type=int, default=365, help="--start가 없을 때 분석 일수 (기본 365)")
+    analyze.add_argument('--num-ranges', type=_num_ranges, nargs='+', default=[DEFAULT_OPTIONS['num_ranges']],
+                         help="가격 구간 수 또는 auto (여러 개면 데이터를 다시 가져오지 않고 각각 분석)")
+    analyze.add_argument('--top-zones', type=int, default=DEFAULT_OPTIONS['top_zones'], help="밀집 구간 수")
+    analyze.add_argument('--sr-days', type=int, default=DEFAULT_OPTIONS['sr_days'], help="지지선/저항선 분석 일수")
+    analyze.add_argument('--min-touches', type=int, default=DEFAULT_OPTIONS['min_touches'], help="최소 터치 횟수")
+    analyze.add_argument('--max-levels', type=int, default=DEFAULT_OPTIONS['max_levels'],
+                         help="지지선/저항선 각각 최대 개수")
+    analyze.add_argument('--kde', action='store_true', help="연속 밀도(KDE) 밀집 구간 포함")
+    analyze.add_argument('--format', choices=['json', 'jsonl', 'csv'], default='json', help="출력 형식")
+    analyze.add_argument('--output', help="저장 경로 (없으면 표준 출력)")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    batch = subparsers.add_parser('batch', help="JSON 요청을 한 줄씩 읽어 결과를 한 줄씩 출력")
+    batch.add_argument('--input', help="요청 파일 (없으면 표준 입력)")
+    batch.set_defaults(handler=cmd_batch)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    """명령행 진입점 (종료 코드: 모든 분석 성공 0, 실패가 있으면 1)"""
+    args = build_parser().parse_args(argv)
+    # 한 번 실행하고 끝나므로 백그라운드 갱신을 기다릴 수 없어 항상 최신 데이터를 기다림
+    # (데이터 소스가 실패하면 저장된 데이터 사용)
+    data_cache.set_max_stale(0)
+    return args.handler(args, AnalysisSession())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""
+주가 데이터 디스크 캐시
+종목별로 가져온 일봉을 한 파일에 모아 두고 요청 기간이 이미 들어 있으면 네트워크 요청 없이
+잘라서 반환하는 모듈 (빠진 거래일만 새로 요청, 분석 결과는 result_cache가 같은 디렉터리에 보관)
+(여러 프로세스가 같은 디렉터리를 공유하므로 파일은 임시 파일에 쓴 뒤 교체)
+
+데이터 소스가 느리거나 실패할 때는 마지막으로 저장한 데이터를 나이(stale_age)와 함께 바로 반환하고
+백그라운드에서 갱신하며(stale-while-revalidate), 연속으로 실패하면 잠시 요청을 보내지 않습니다(회로 차단).
+"""
+
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+import trading_calendar
+
+# 권장 캐시 디렉터리. 캐시는 STOCK_DENSITY_CACHE_DIR 환경 변수로 디렉터리를 지정할 때만 사용
+# (설정하지 않으면 디스크에 쓰지 않고 매번 데이터 소스에서 가져옴)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'stock_density')
+# 장중(확정 전 일봉)에 가져온 데이터/결과 유효 시간 (초). 확정된 일봉까지만 포함하면 만료 없음
+DEFAULT_MAX_AGE = 10 * 60
+# 유효 시간이 지났어도 바로 반환하고 백그라운드에서 갱신할 최대 나이 (초, STOCK_DENSITY_MAX_STALE 환경 변수로
+# 변경, 0이면 항상 갱신을 기다림). 데이터 소스가 실패하면 나이와 관계없이 저장된 데이터를 반환
+DEFAULT_MAX_STALE = 3 * 24 * 60 * 60
+# 데이터 소스가 연속으로 이 횟수만큼 실패하면 BREAKER_COOLDOWN초 동안 요청을 보내지 않음
+BREAKER_FAILURES = 3
+BREAKER_COOLDOWN = 60
+
+
+def atomic_write(path: str, payload: bytes):
+    """임시 파일에 쓴 뒤 교체 (다른 프로세스가 쓰다 만 파일을 읽지 않도록)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class SourceUnavailable(Exception):
+    """데이터 소스가 연속으로 실패해 잠시 요청을 보내지 않는 중 (회로 차단)"""
+
+
+class CircuitBreaker:
+    """
+    데이터 소스 회로 차단기
+
+    연속으로 failures번 실패하면 cooldown초 동안 요청을 보내지 않고 바로 SourceUnavailable을 발생시켜
+    응답 없는 소스를 기다리느라 화면이 멈추지 않게 합니다. cooldown이 지나면 요청 하나만 시험으로
+    보내 성공하면 닫고, 실패하면 다시 cooldown 동안 엽니다.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        """
+        Args:
+            failures: 차단할 연속 실패 횟수
+            cooldown: 차단 시간 (초)
+        """
+        self.failures = failures
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """'closed'(정상), 'open'(차단 중), 'half_open'(시험 요청 가능)"""
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'open' if time.monotonic() - self._opened_at < self.cooldown else 'half_open'
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        차단 중이 아니면 func(*args, **kwargs) 실행 (예외는 실패로 기록한 뒤 그대로 발생)
+
+        Raises:
+            SourceUnavailable: 차단 중일 때
+        """
+        with self._lock:
+            if self._opened_at is not None:
+                remaining = self.cooldown - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise SourceUnavailable(f"데이터 소스 연속 실패로 {remaining:.0f}초 동안 요청을 보내지 않습니다")
+                # 시험 요청 하나만 통과시키고 나머지는 결과가 나올 때까지 계속 차단
+                self._opened_at = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._failures += 1
+                if self._failures >= self.failures:
+                    self._opened_at = time.monotonic()
+            raise
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+        return result
+
+
+# 프로세스의 모든 수집이 함께 쓰는 데이터 소스(fdr.DataReader) 차단기
+source_breaker = CircuitBreaker()
+
+
+def stale_age(data: pd.DataFrame) -> Optional[float]:
+    """캐시가 갱신을 기다리지 않고 반환한 데이터이면 저장된 지 지난 시간 (초), 아니면 None"""
+    if data is None or not data.attrs.get('stale'):
+        return None
+    return max(0.0, time.time() - data.attrs['fetched_at'])
+
+
+def format_age(seconds: float) -> str:
+    """데이터 나이 표시용 문자열 (예: '15분', '3시간', '2일')"""
+    if seconds < 3600:
+        return f"{max(1, int(seconds // 60))}분"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}시간"
+    return f"{int(seconds // 86400)}일"
+
+
+def _complete_through(data: pd.DataFrame, end_date: str, fetched_at: float) -> str:
+    """
+    가져온 시점에 확정 데이터가 들어 있다고 볼 수 있는 마지막 날짜
+
+    요청 종료일과 그 시점에 확정된 마지막 일봉 중 이른 날짜이며, 데이터 소스가 아직 반영하지 않아
+    마지막 거래일 행이 없으면 실제 마지막 행 날짜로 줄여 다음 요청 때 그 뒤를 다시 가져옵니다.
+    """
+    through = min(pd.Timestamp(end_date).date(), trading_calendar.last_final_bar(fetched_at))
+    if not data.empty:
+        last_row = data.index.max().date()
+        if last_row < trading_calendar.last_trading_day_on_or_before(through):
+            through = last_row
+    return through.isoformat()
+
+
+class DataCache:
+    """
+    종목별 일봉 디스크 캐시
+
+    종목마다 {'data', 'start_date', 'end_date', 'fetched_at', 'complete_through'} 하나를 저장하고,
+    겹치거나 이어지는 기간을 새로 가져오면 합쳐서 더 긴 기간 하나로 유지합니다.
+    complete_through는 확정 일봉이 모두 들어 있는 마지막 날짜로, 거래일 달력과 함께 요청 기간에서
+    빠진 거래일(앞쪽 기간, complete_through 이후)만 골라 가져오는 데 씁니다.
+    """
+
+    def __init__(self, directory: str, max_age: float = DEFAULT_MAX_AGE, max_stale: float = DEFAULT_MAX_STALE,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Args:
+            directory: 캐시 디렉터리
+            max_age: 장중에 가져온 미확정 일봉을 다시 가져오기 전까지의 시간 (초)
+            max_stale: 최근 거래일만 빠졌을 때 저장된 데이터를 바로 반환하고 백그라운드에서 갱신할
+                       최대 나이 (초, 0이면 항상 갱신을 기다림)
+            breaker: 데이터 소스 회로 차단기 (None이면 프로세스 공용 source_breaker)
+        """
+        self.directory = directory
+        self.max_age = max_age
+        self.max_stale = max_stale
+        self.breaker = breaker or source_breaker
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.directory, 'data', f"{symbol}.pkl")
+
+    def load(self, symbol: str) -> Optional[Dict]:
+        """저장된 항목 (없거나 읽을 수 없으면 None)"""
+        try:
+            with open(self._path(symbol), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+
+    def missing_ranges(self, symbol: str, start_date: str, end_date: str,
+                       entry: Optional[Dict] = None) -> List[Tuple[str, str]]:
+        """
+        요청 기간을 채우려면 새로 가져와야 하는 기간 목록 (비어 있으면 캐시로 충분)
+
+        주말/휴장일만 남았거나 장 시작 전이면 가져올 것이 없고, 장중에는 max_age 안에 가져온
+        오늘 미확정 일봉을 그대로 씁니다. 가져온 기간은 기존 기간과 이어지도록 잡습니다.
+
+        Args:
+            symbol: 종목 코드
+            start_date: 시작 날짜 ('YYYY-MM-DD')
+            end_date: 종료 날짜 ('YYYY-MM-DD')
+            entry: 이미 읽은 캐시 항목 (None이면 디스크에서 읽음)
+        """
+        entry = entry if entry is not None else self.load(symbol)
+        if entry is None:
+            return trading_calendar.missing_ranges(start_date, end_date)
+
+        through = entry.get('complete_through') or _complete_through(entry['data'], entry['end_date'],
+                                                                     entry['fetched_at'])
+        if time.time() - entry['fetched_at'] <= self.max_age:
+            partial_day, _ = trading_calendar.latest_bar(entry['fetched_at'])
+            through = max(through, min(entry['end_date'], partial_day.isoformat()))
+        return trading_calendar.missing_ranges(start_date, end_date, entry['start_date'], through)
+
+    def get(self, symbol: str, start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        """
+        요청 기간 데이터 (새로 가져올 거래일이 없을 때만, 아니면 None)
+
+        Args:
+            symbol: 종목 코드
+            start_date: 시작 날짜 ('YYYY-MM-DD')
+            end_date: 종료 날짜 ('YYYY-MM-DD')
+        """
+        entry = self.load(symbol)
+        if entry is None or self.missing_ranges(symbol, start_date, end_date, entry):
+            return None
+        return entry['data'].loc[start_date:end_date].copy()
+
+    def put(self, symbol: str, start_date: str, end_date: str, data: pd.DataFrame):
+        """
+        가져온 데이터 저장 (기존 기간과 겹치거나 이어지면 합치고, 떨어져 있으면 교체)
+
+        Args:
+            symbol: 종목 코드
+            start_date: 요청한 시작 날짜
+            end_date: 요청한 종료 날짜
+            data: 가져온 데이터 (기존 기간에 이어지는 빈 데이터는 그 기간에 거래가 없었다는 뜻으로 기록)
+        """
+        old = self.load(symbol)
+        adjacent = (old is not None and old['start_date'] <= _next_day(end_date)
+                    and start_date <= _next_day(old['end_date']))
+        if data is None or data.empty:
+            if not adjacent:
+                return
+            data = old['data'].iloc[:0]
+        entry = {'data': data, 'start_date': start_date, 'end_date': end_date, 'fetched_at': time.time()}
+        if adjacent:
+            merged = pd.concat([old['data'], data])
+            entry['data'] = merged[~merged.index.duplicated(keep='last')].sort_index()
+            entry['start_date'] = min(start_date, old['start_date'])
+            # 유효 시간과 확정 범위는 가장 최근 날짜를 가져온 쪽 기준
+            if old['end_date'] > end_date:
+                entry['end_date'] = old['end_date']
+                entry['fetched_at'] = old['fetched_at']
+                entry['complete_through'] = old.get('complete_through')
+        if not entry.get('complete_through'):
+            entry['complete_through'] = _complete_through(entry['data'], entry['end_date'], entry['fetched_at'])
+        atomic_write(self._path(symbol), pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def stale(self, symbol: str, start_date: str, end_date: str, any_age: bool = False) -> Optional[pd.DataFrame]:
+        """
+        갱신을 기다리지 않고 반환할 수 있는 저장된 데이터 (stale_age로 나이 확인, 없으면 None)
+
+        Args:
+            symbol: 종목 코드
+            start_date: 시작 날짜
+            end_date: 종료 날짜
+            any_age: True이면 나이와 빠진 기간에 관계없이 저장된 데이터 반환 (데이터 소스 실패 시)
+                     False이면 시작일부터 모두 있고 max_stale 안에 저장했을 때만
+        """
+        entry = self.load(symbol)
+        if entry is None:
+            return None
+        if not any_age and (self.max_stale <= 0 or entry['start_date'] > start_date
+                            or time.time() - entry['fetched_at'] > self.max_stale):
+            return None
+        data = entry['data'].loc[start_date:end_date].copy()
+        if data.empty:
+            return None
+        data.attrs.update(stale=True, fetched_at=entry['fetched_at'])
+        return data
+
+    def _fetch_missing(self, symbol: str, start_date: str, end_date: str, reader: Callable) -> Optional[pd.DataFrame]:
+        """빠진 기간을 회로 차단기를 거쳐 가져와 저장 (마지막으로 가져온 데이터 반환)"""
+        data = None
+        for gap_start, gap_end in self.missing_ranges(symbol, start_date, end_date):
+            data = self.breaker.call(reader, symbol, gap_start, gap_end)
+            self.put(symbol, gap_start, gap_end, data)
+        return data
+
+    def refresh_in_background(self, symbol: str, start_date: str, end_date: str, reader: Callable):
+        """빠진 기간을 작업 스레드에서 가져와 저장 (같은 종목이 이미 갱신 중이면 생략)"""
+        key = (self.directory, symbol)
+        with _refresh_lock:
+            if key in _refreshing:
+                return
+            _refreshing.add(key)
+
+        def run():
+            try:
+                self._fetch_missing(symbol, start_date, end_date, reader)
+            except Exception:
+                # 실패는 회로 차단기에 기록되고 다음 요청 때 다시 시도
+                pass
+            finally:
+                with _refresh_lock:
+                    _refreshing.discard(key)
+
+        threading.Thread(target=run, name=f'refresh-{symbol}', daemon=True).start()
+
+    def fetch(self, symbol: str, start_date: str, end_date: str, reader: Callable) -> pd.DataFrame:
+        """
+        캐시에 빠진 기간만 reader(symbol, start_date, end_date)로 가져와 저장한 뒤 요청 기간 반환
+
+        최근 거래일만 빠졌고 max_stale 안에 저장한 데이터가 있으면 기다리지 않고 그 데이터를 반환하며
+        백그라운드에서 갱신합니다. reader가 실패하면(회로 차단 포함) 저장된 데이터를 나이와 관계없이
+        반환하고, 저장된 데이터도 없으면 예외를 그대로 발생시킵니다.
+
+        Returns:
+            DataFrame: 요청 기간 데이터 (reader가 빈 데이터를 주면 그대로 반환, 저장된 데이터를 대신
+                       반환했으면 stale_age로 나이 확인)
+        """
+        if self.missing_ranges(symbol, start_date, end_date):
+            data = self.stale(symbol, start_date, end_date)
+            if data is not None:
+                self.refresh_in_background(symbol, start_date, end_date, reader)
+                return data
+            try:
+                data = self._fetch_missing(symbol, start_date, end_date, reader)
+            except Exception:
+                data = self.stale(symbol, start_date, end_date, any_age=True)
+                if data is None:
+                    raise
+                return data
+        else:
+            data = None
+        entry = self.load(symbol)
+        if entry is None:
+            return data if data is not None else pd.DataFrame()
+        return entry['data'].loc[start_date:end_date].copy()
+
+
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+
+def _next_day(date: str) -> str:
+    return (pd.Timestamp(date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+_default_dir = os.path.expanduser(os.environ.get('STOCK_DENSITY_CACHE_DIR', ''))
+_max_stale = float(os.environ.get('STOCK_DENSITY_MAX_STALE', DEFAULT_MAX_STALE))
+
+
+def cache_dir() -> Optional[str]:
+    """공용 캐시 디렉터리 (사용하지 않으면 None)"""
+    return _default_dir or None
+
+
+def set_cache_dir(directory: Optional[str]):
+    """공용 캐시 디렉터리 변경 (None이면 이 프로세스에서 캐시 사용 안 함, 예: 테스트 데이터 사용 시)"""
+    global _default_dir
+    _default_dir = directory
+
+
+def set_max_stale(seconds: float):
+    """
+    이 프로세스의 공용 데이터 캐시가 갱신을 기다리지 않고 반환할 최대 나이 변경
+    (0이면 항상 기다림, 예: 백그라운드 갱신이 끝나기 전에 끝나는 명령행 실행이나 예열 작업)
+    """
+    global _max_stale
+    _max_stale = seconds
+
+
+def default_data_cache() -> Optional[DataCache]:
+    """공용 데이터 캐시 (사용하지 않으면 None)"""
+    return DataCache(_default_dir, max_stale=_max_stale) if _default_dir else None
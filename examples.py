@@ -81,7 +81,8 @@ def batch_analysis_example():
         try:
             data = analyzer.fetch_data(code, start_date, end_date)
             if data is not None:
-                price_ranges = analyzer.calculate_price_ranges(num_ranges=10)
+                # 종목마다 변동폭이 달라 구간 수는 데이터에 맞춰 자동 선택
+                price_ranges = analyzer.calculate_price_ranges(num_ranges='auto')
                 high_density = analyzer.find_high_density_zones(price_ranges, top_n=3)
                 
                 # 상위 거래량 밀집 구간 정보 저장
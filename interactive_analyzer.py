@@ -122,9 +122,11 @@ def get_analysis_options():
     # 가격 구간 수
     while True:
         try:
-            num_ranges = input("가격 구간 수 (기본 20, 10-50 권장): ").strip()
+            num_ranges = input("가격 구간 수 (기본 20, 10-50 권장, auto: 자동): ").strip()
             if not num_ranges:
                 num_ranges = 20
+            elif num_ranges.lower() == 'auto':
+                num_ranges = 'auto'
             else:
                 num_ranges = int(num_ranges)
                 if num_ranges < 5 or num_ranges > 100:
@@ -234,6 +236,21 @@ def run_analysis(symbol, name, start_date, end_date, period_name, num_ranges, to
             except Exception as e:
                 print(f"⚠️ 차트 생성 중 오류: {e}")
         
+        # 구간 수만 바꿔 다시 보기 (데이터 재수집 없이 즉시 재구간화)
+        while True:
+            new_ranges = input("\n🔁 다른 가격 구간 수로 다시 보시겠습니까? (숫자 또는 auto 입력, Enter: 건너뛰기): ").strip()
+            if not new_ranges:
+                break
+            if new_ranges.lower() == 'auto':
+                new_ranges = 'auto'
+            elif not new_ranges.isdigit() or not 5 <= int(new_ranges) <= 100:
+                print("❌ 5-100 사이의 값이나 auto를 입력해주세요.")
+                continue
+            else:
+                new_ranges = int(new_ranges)
+            price_ranges = analyzer.calculate_price_ranges(num_ranges=new_ranges)
+            analyzer.find_high_density_zones(price_ranges, top_n=top_zones)
+        
         print("\n✅ 분석이 완료되었습니다!")
         return True
         
@@ -0,0 +1,405 @@
+"""
+Streamlit 앱 동시 사용자 부하 테스트
+streamlit.testing(AppTest)으로 streamlit_app.py를 브라우저 없이 여러 세션에서 동시에 실행하고,
+fdr.DataReader 대신 응답 지연을 흉내 내는 로컬 합성 데이터로 종목 선택 → 기간 변경 → 슬라이더 조작
+시나리오를 재생해 단계별 응답 시간 백분위, 처리량, 세션당 메모리를 보고하는 모듈
+(한 컨테이너가 몇 명까지 감당하는지, 변경 전후 용량이 어떻게 달라지는지 측정)
+
+한계: AppTest는 재실행마다 프로세스 전역 상태(Runtime)를 바꾸므로 세션들의 스크립트 재실행을 한 번에
+하나씩만 실행합니다. 분석 작업은 서버에서처럼 백그라운드에서 동시에 진행되지만, 세션이 늘면 응답 시간
+(seconds)의 상당 부분이 다른 세션의 재실행을 기다린 시간이 됩니다. 그래서 기다린 시간(lock_wait)을
+따로 기록하고 이를 뺀 처리 시간(service)의 백분위도 함께 보고합니다. service는 재실행이 동시에 도는
+실제 `streamlit run` 서버의 응답 시간에 가깝지만 재실행끼리의 CPU 경쟁은 빠져 있으므로, 실제 서버 용량은
+브라우저 부하 도구로 서버를 직접 호출해 확인해야 합니다. 변경 전후 비교에는 service를,
+동시 세션 수에 따른 포화 여부에는 lock_wait 비중을 봅니다.
+
+사용 예:
+    python load_test.py --sessions 20
+    python load_test.py --sessions 50 --scenario browse kde --ramp 10 --source-latency 0.3
+    python load_test.py --sessions 10 --output steps.csv
+"""
+
+import os
+
+# 분석기(matplotlib) 불러오기 전에 비대화형 백엔드 지정
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import argparse
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import types
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from stock_lists import POPULAR_STOCKS
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'streamlit_app.py')
+
+# 합성 데이터 요청 하나의 기본 지연 (초, 실제 데이터 소스 응답 시간 흉내)
+STUB_LATENCY = 0.2
+
+_run_lock = threading.Lock()
+# 스레드(세션)별로 _run_lock을 기다린 누적 시간 (초)
+_lock_wait = threading.local()
+
+# 사용자 조작 시나리오: ('stock', None)은 세션에 배정된 종목 검색/선택, ('period', 옵션),
+# ('slider', 레이블, 값), ('checkbox', 레이블, 값). 각 단계는 분석 결과가 화면에 반영될 때까지 잼
+SCENARIOS = {
+    'browse': [
+        ('stock', None),
+        ('period', '최근 1년'),
+        ('period', '최근 5년'),
+        ('slider', '가격 구간 수', 25),
+        ('slider', '상위 밀집 구간 수', 7),
+    ],
+    'tune': [
+        ('stock', None),
+        ('slider', '가격 구간 수', 15),
+        ('slider', '가격 구간 수', 30),
+        ('slider', '최소 터치 횟수', 4),
+        ('slider', '최대 표시 개수', 5),
+    ],
+    'kde': [
+        ('stock', None),
+        ('period', '최근 2년'),
+        ('checkbox', '🌊 연속 밀도(KDE) 모드', True),
+        ('slider', '상위 밀집 구간 수', 8),
+    ],
+}
+
+
+def synthetic_reader(latency: float = STUB_LATENCY) -> Callable:
+    """
+    fdr.DataReader 대신 쓸 합성 일봉 함수
+
+    종목 코드로 시드를 정한 무작위 보행 가격이므로 같은 종목/날짜는 항상 같은 값이고,
+    요청마다 latency초를 기다려 네트워크 응답 시간을 흉내 냅니다.
+    """
+    def read(symbol: str, start=None, end=None) -> pd.DataFrame:
+        time.sleep(latency)
+        dates = pd.bdate_range('2015-01-01', pd.Timestamp.now().normalize())
+        rng = np.random.default_rng(zlib.crc32(str(symbol).encode('utf-8')))
+        close = 20000 * np.exp(np.cumsum(rng.normal(0, 0.018, len(dates))))
+        spread = close * rng.uniform(0.005, 0.03, len(dates))
+        frame = pd.DataFrame({
+            'Open': np.round(close + rng.normal(0, 0.3, len(dates)) * spread),
+            'High': np.round(close + spread),
+            'Low': np.round(close - spread),
+            'Close': np.round(close),
+            'Volume': rng.integers(100_000, 5_000_000, len(dates)),
+        }, index=dates).astype('int64')
+        frame['Change'] = frame['Close'].pct_change().fillna(0.0)
+        frame.index.name = 'Date'
+        return frame.loc[start:end]
+
+    return read
+
+
+def install_stub_reader(latency: float = STUB_LATENCY):
+    """FinanceDataReader.DataReader를 합성 데이터 함수로 교체 (패키지가 없으면 이름만 등록)"""
+    try:
+        import FinanceDataReader as fdr
+    except ImportError:
+        fdr = types.ModuleType('FinanceDataReader')
+        sys.modules['FinanceDataReader'] = fdr
+    fdr.DataReader = synthetic_reader(latency)
+
+
+def share_script_cache():
+    """
+    모든 AppTest 세션이 스크립트 컴파일 결과 하나를 공유하도록 설정
+
+    AppTest는 실행마다 ScriptCache를 새로 만들어 매번 스크립트를 다시 컴파일하지만, 실제 서버는
+    런타임 하나의 캐시를 모든 세션이 씁니다. 같은 캐시를 쓰게 해 측정값이 서버와 같아지게 하고,
+    여러 스레드가 동시에 컴파일할 때 생기는 파이썬 3.11 AST 오류도 피합니다.
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    shared = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: shared
+
+
+def _run(at, timeout: Optional[float] = None):
+    """
+    스크립트 한 번 재실행
+
+    AppTest는 실행할 때마다 Runtime 인스턴스 같은 프로세스 전역 상태를 바꾸므로 재실행은 한 번에
+    하나씩만 합니다. 분석은 재실행이 끝난 뒤에도 백그라운드 작업에서 계속되므로 세션들의 분석은
+    서버에서처럼 동시에 진행되고, 재실행 차례를 기다린 시간은 _waited()로 따로 셉니다.
+    """
+    requested = time.perf_counter()
+    with _run_lock:
+        _lock_wait.seconds = _waited() + time.perf_counter() - requested
+        at.run(timeout=timeout)
+
+
+def _waited() -> float:
+    """현재 스레드가 지금까지 재실행 차례를 기다린 누적 시간 (초)"""
+    return getattr(_lock_wait, 'seconds', 0.0)
+
+
+def _rss_bytes() -> int:
+    """현재 프로세스 상주 메모리 (바이트, /proc이 없으면 최대 상주 메모리)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _widget(at, kind: str, label: str):
+    for widget in getattr(at, kind):
+        if widget.label == label:
+            return widget
+    raise LookupError(f"{kind} '{label}'을(를) 찾을 수 없습니다")
+
+
+def _settle(at, timeout: float, poll: float):
+    """분석 작업이 끝나 결과가 화면에 반영될 때까지 재실행 (브라우저의 진행 상황 갱신 흉내)"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        _run(at, timeout)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        state = at.session_state
+        if state['analysis_job'] is None and state['analysis_done']:
+            return
+        if time.perf_counter() > deadline:
+            raise TimeoutError("분석 결과를 기다리다 시간이 초과되었습니다")
+        time.sleep(poll)
+
+
+def _apply(at, step: Tuple, stock: Tuple[str, str]):
+    """시나리오 단계 하나를 위젯에 반영"""
+    action = step[0]
+    if action == 'stock':
+        name, code = stock
+        at.text_input[0].input(name)
+        _run(at)
+        # 여러 종목이 검색되면 목록에서 선택 (하나만 검색되면 자동 선택)
+        if any(widget.key == 'stock_search_results' for widget in at.selectbox):
+            at.selectbox(key='stock_search_results').set_value(f"{name} ({code})")
+    elif action == 'period':
+        _widget(at, 'selectbox', '분석 기간을 선택하세요:').set_value(step[1])
+    elif action == 'slider':
+        _widget(at, 'slider', step[1]).set_value(step[2])
+    elif action == 'checkbox':
+        _widget(at, 'checkbox', step[1]).check() if step[2] else _widget(at, 'checkbox', step[1]).uncheck()
+    else:
+        raise ValueError(f"알 수 없는 단계: {action}")
+
+
+def run_session(index: int, scenario: str, stock: Tuple[str, str], timeout: float = 120.0,
+                think: float = 0.5, poll: float = 0.1, start_delay: float = 0.0) -> Tuple[List[Dict], object]:
+    """
+    세션 하나로 시나리오 재생
+
+    Args:
+        index: 세션 번호
+        scenario: SCENARIOS 이름
+        stock: (종목명, 종목 코드)
+        timeout: 단계 하나의 최대 대기 시간 (초)
+        think: 단계 사이 평균 대기 시간 (초, 사용자가 결과를 보는 시간)
+        poll: 결과를 기다릴 때 재실행 간격 (초)
+        start_delay: 시작 전 대기 시간 (초, 세션을 나눠 시작할 때)
+
+    Returns:
+        Tuple[List[Dict], AppTest]: 단계별 기록 (session, scenario, step, action, seconds, lock_wait,
+                                   service, ok, error)과 메모리 측정이 끝날 때까지 세션을 유지하기 위한
+                                   AppTest. lock_wait는 다른 세션의 재실행을 기다린 시간,
+                                   service는 seconds에서 lock_wait를 뺀 시간
+    """
+    from streamlit.testing.v1 import AppTest
+
+    time.sleep(start_delay)
+    rng = random.Random(index)
+    rows = []
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    def record(step: int, action: str, started: Tuple[float, float], error: Optional[str] = None):
+        seconds = time.perf_counter() - started[0]
+        lock_wait = _waited() - started[1]
+        rows.append({'session': index, 'scenario': scenario, 'step': step, 'action': action,
+                     'seconds': seconds, 'lock_wait': lock_wait, 'service': seconds - lock_wait,
+                     'ok': error is None, 'error': error})
+
+    started = (time.perf_counter(), _waited())
+    try:
+        _run(at, timeout)
+        record(0, 'load', started)
+    except Exception as e:
+        record(0, 'load', started, str(e))
+        return rows, at
+
+    for step_number, step in enumerate(SCENARIOS[scenario], 1):
+        action = step[0] if step[0] == 'stock' else f"{step[0]}:{step[1]}"
+        started = (time.perf_counter(), _waited())
+        try:
+            _apply(at, step, stock)
+            _settle(at, timeout, poll)
+            record(step_number, action, started)
+        except Exception as e:
+            record(step_number, action, started, str(e) or type(e).__name__)
+            break
+        time.sleep(rng.uniform(0.5, 1.5) * think)
+    return rows, at
+
+
+def summarize(steps: pd.DataFrame) -> pd.DataFrame:
+    """
+    단계 종류별 응답 시간 백분위
+
+    Returns:
+        DataFrame: action, count, errors, p50, p90, p95, p99, max (응답 시간, 초),
+                   wait_mean, wait_share (재실행 차례를 기다린 평균 시간과 응답 시간 중 비중),
+                   service_p50, service_p90, service_p95, service_p99 (기다린 시간을 뺀 처리 시간, 초),
+                   마지막 행은 전체(all)
+    """
+    def percentiles(values: np.ndarray) -> List[float]:
+        return list(np.percentile(values, [50, 90, 95, 99])) if len(values) else [np.nan] * 4
+
+    def row(action: str, frame: pd.DataFrame) -> Dict:
+        ok = frame.loc[frame['ok']]
+        seconds = ok['seconds'].to_numpy()
+        quantiles = percentiles(seconds)
+        service = percentiles(ok['service'].to_numpy())
+        total = seconds.sum()
+        return {'action': action, 'count': len(frame), 'errors': int((~frame['ok']).sum()),
+                'p50': quantiles[0], 'p90': quantiles[1], 'p95': quantiles[2], 'p99': quantiles[3],
+                'max': seconds.max() if len(seconds) else np.nan,
+                'wait_mean': ok['lock_wait'].mean() if len(ok) else np.nan,
+                'wait_share': ok['lock_wait'].sum() / total if total > 0 else np.nan,
+                'service_p50': service[0], 'service_p90': service[1], 'service_p95': service[2],
+                'service_p99': service[3]}
+
+    rows = [row(action, frame) for action, frame in steps.groupby('action', sort=False)]
+    rows.append(row('all', steps))
+    return pd.DataFrame(rows)
+
+
+def run_load_test(sessions: int, scenarios: List[str], ramp: float = 0.0, think: float = 0.5,
+                  timeout: float = 120.0, symbols: Optional[List[Tuple[str, str]]] = None) -> Dict:
+    """
+    여러 세션을 동시에 실행
+
+    세션마다 시나리오와 종목을 번갈아 배정해 같은 종목을 보는 세션과 다른 종목을 보는 세션이 섞이게 합니다.
+
+    Args:
+        sessions: 동시 세션 수
+        scenarios: 번갈아 배정할 시나리오 이름 목록
+        ramp: 모든 세션이 시작될 때까지 걸리는 시간 (초, 0이면 동시에 시작)
+        think: 단계 사이 평균 대기 시간 (초)
+        timeout: 단계 하나의 최대 대기 시간 (초)
+        symbols: (종목명, 종목 코드) 목록 (None이면 인기 종목)
+
+    Returns:
+        Dict: steps(단계별 기록 DataFrame), summary(summarize 결과), elapsed, throughput(초당 완료 단계),
+              rss_per_session, state_per_session(세션 슬롯 크기 평균), memory(메모리 관리 지표)
+    """
+    from session_memory import memory_governor
+
+    share_script_cache()
+    symbols = symbols or [(name, code) for name, code in POPULAR_STOCKS.items() if code != 'custom']
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix='session') as executor:
+        futures = [
+            executor.submit(run_session, i, scenarios[i % len(scenarios)], symbols[i % len(symbols)],
+                            timeout=timeout, think=think, start_delay=ramp * i / max(sessions, 1))
+            for i in range(sessions)
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    # 세션(AppTest)이 살아 있는 동안 메모리 측정
+    memory = memory_governor.metrics()
+    rss_after = _rss_bytes()
+    steps = pd.DataFrame([row for rows, _ in results for row in rows])
+    completed = int(steps.loc[steps['ok'] & (steps['action'] != 'load')].shape[0])
+    report = {
+        'steps': steps,
+        'summary': summarize(steps),
+        'elapsed': elapsed,
+        'throughput': completed / elapsed if elapsed > 0 else 0.0,
+        'rss_per_session': (rss_after - rss_before) / sessions,
+        'state_per_session': memory['session_bytes'] / max(memory['sessions'], 1),
+        'memory': memory
+    }
+    del results
+    return report
+
+
+def _print_report(report: Dict, sessions: int):
+    summary = report['summary'].copy()
+    for column in ['p50', 'p90', 'p95', 'p99', 'max', 'wait_mean',
+                   'service_p50', 'service_p90', 'service_p95', 'service_p99']:
+        summary[column] = summary[column].map(lambda value: f"{value:.2f}")
+    summary['wait_share'] = summary['wait_share'].map(lambda value: f"{value:.0%}")
+    print(summary.to_string(index=False))
+    print("\n(p50~max는 재실행 차례를 기다린 시간을 포함한 응답 시간, service_*는 그 시간을 뺀 처리 시간. "
+          "재실행을 한 번에 하나씩 실행하는 측정 방식의 한계는 load_test.py 설명 참고)")
+    memory = report['memory']
+    print(f"\n세션 {sessions}개, {report['elapsed']:.1f}초, 처리량 {report['throughput']:.2f}단계/초")
+    print(f"세션당 메모리: 상주 메모리 증가 {report['rss_per_session'] / 1024 ** 2:.1f}MB, "
+          f"분석 상태 {report['state_per_session'] / 1024 ** 2:.2f}MB "
+          f"(공용 데이터 {memory['shared_bytes'] / 1024 ** 2:.1f}MB, 중복 제거 {memory['dedup_hits']}회)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Streamlit 앱 동시 사용자 부하 테스트 (합성 데이터 사용)")
+    parser.add_argument('--sessions', type=int, default=10, help="동시 세션 수")
+    parser.add_argument('--scenario', nargs='+', choices=sorted(SCENARIOS), default=['browse'],
+                        help="세션에 번갈아 배정할 시나리오")
+    parser.add_argument('--ramp', type=float, default=0.0, help="모든 세션이 시작될 때까지 걸리는 시간 (초)")
+    parser.add_argument('--think', type=float, default=0.5, help="단계 사이 평균 대기 시간 (초)")
+    parser.add_argument('--timeout', type=float, default=120.0, help="단계 하나의 최대 대기 시간 (초)")
+    parser.add_argument('--source-latency', type=float, default=STUB_LATENCY,
+                        help="합성 데이터 요청 하나의 지연 (초)")
+    parser.add_argument('--cache-dir', help="공용 캐시 디렉터리 (기본: 실행마다 빈 임시 디렉터리). "
+                                             "합성 데이터가 저장되므로 실제 사용하는 캐시 디렉터리는 지정하지 마세요")
+    parser.add_argument('--output', help="단계별 기록 CSV 파일")
+    return parser
+
+
+def main(argv=None) -> int:
+    """명령행 진입점 (종료 코드: 실패한 단계가 없으면 0, 있으면 1)"""
+    args = build_parser().parse_args(argv)
+    install_stub_reader(args.source_latency)
+
+    import data_cache
+
+    with tempfile.TemporaryDirectory(prefix='stock_density_load_') as tmp:
+        data_cache.set_cache_dir(os.path.expanduser(args.cache_dir) if args.cache_dir else tmp)
+        # 분석기 진행 메시지가 결과 표와 섞이지 않게 표준 출력을 잠시 돌림
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            report = run_load_test(args.sessions, args.scenario, ramp=args.ramp, think=args.think,
+                                   timeout=args.timeout)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    _print_report(report, args.sessions)
+    steps = report['steps']
+    if args.output:
+        steps.to_csv(args.output, index=False, encoding='utf-8-sig')
+        print(f"단계별 기록이 {args.output}에 저장되었습니다. ({len(steps)}행)", file=sys.stderr)
+    errors = steps.loc[~steps['ok'], 'error'].value_counts()
+    for error, count in errors.items():
+        print(f"  실패 {count}회: {error}", file=sys.stderr)
+    return 0 if errors.empty else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
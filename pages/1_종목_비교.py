@@ -0,0 +1,256 @@
+"""
+주식 거래량 밀집도 분석기 - 종목 비교 페이지
+관심 종목 목록을 동시에 분석하고, 현재가 기준 상대 가격으로 맞춘 거래량 프로파일과
+밀집 구간을 나란히 비교 (끝난 종목부터 바로 표시)
+"""
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+from datetime import timedelta
+from analysis_worker import AnalysisJob
+from profile_index import relative_profile_vector
+import trading_calendar
+
+# 페이지 설정
+st.set_page_config(
+    page_title="종목 비교 - 주식 거래량 밀집도 분석기",
+    page_icon="📊",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# 업종별 관심 종목 (메인 페이지 인기 종목 기준)
+SECTOR_WATCHLISTS = {
+    "반도체": {"삼성전자": "005930", "SK하이닉스": "000660"},
+    "인터넷/게임": {"NAVER": "035420", "카카오": "035720", "크래프톤": "259960",
+                 "펄어비스": "263750", "컴투스": "078340", "위메이드": "112040"},
+    "자동차": {"현대차": "005380", "기아": "000270", "현대모비스": "012330", "현대글로비스": "086280"},
+    "2차전지/화학": {"LG에너지솔루션": "373220", "삼성SDI": "006400", "LG화학": "051910",
+                  "SK이노베이션": "096770", "포스코케미칼": "003670"},
+    "금융": {"KB금융": "105560", "신한지주": "055550", "하나금융지주": "086790"},
+    "바이오": {"삼성바이오로직스": "207940", "셀트리온": "068270"},
+    "산업재/소재": {"POSCO홀딩스": "005490", "삼성물산": "028260", "두산에너빌리티": "034020",
+                "CJ대한통운": "000120"},
+    "통신/유틸리티/소비재": {"SK텔레콤": "017670", "한국전력": "015760", "KT&G": "033780",
+                      "LG전자": "066570"}
+}
+
+ALL_STOCKS = {name: code for stocks in SECTOR_WATCHLISTS.values() for name, code in stocks.items()}
+
+PERIOD_OPTIONS = {
+    "최근 3개월": 90,
+    "최근 6개월": 180,
+    "최근 1년": 365,
+    "최근 2년": 730,
+    "최근 3년": 1095
+}
+
+
+def comparison_row(job: AnalysisJob, pct_range: float, bins: int):
+    """
+    끝난 분석 작업 하나를 비교용 결과로 변환
+
+    Returns:
+        Dict: name, code, current_price, vector(상대 가격 격자 프로파일), zones(현재가 대비 거래량 상위 구간),
+              support, resistance (가장 가까운 지지선/저항선), error
+    """
+    row = {'name': job.stock_name, 'code': job.params['stock_code'], 'error': None}
+    try:
+        result = job.result()
+    except Exception as e:
+        row['error'] = str(e)
+        return row
+    if result['analysis_data'] is None:
+        row['error'] = "데이터를 가져올 수 없습니다"
+        return row
+
+    analysis = result['analysis_data']
+    current_price = float(analysis['data']['Close'].iloc[-1])
+    zones = analysis['high_density_zones']
+    total_volume = analysis['price_ranges']['total_volume'].sum()
+    support_resistance = analysis['support_resistance']
+
+    row.update({
+        'current_price': current_price,
+        'vector': relative_profile_vector(analysis['data'], pct_range=pct_range, bins=bins),
+        'zones': pd.DataFrame({
+            'zone_low_pct': (zones['range_start'].values / current_price - 1) * 100,
+            'zone_high_pct': (zones['range_end'].values / current_price - 1) * 100,
+            'share': zones['total_volume'].values / total_volume * 100 if total_volume > 0 else 0.0
+        }),
+        'support': max((level['price'] for level in support_resistance['support_levels']), default=None),
+        'resistance': min((level['price'] for level in support_resistance['resistance_levels']), default=None)
+    })
+    return row
+
+
+def render_comparison():
+    """끝난 종목까지의 비교 결과 표시 (완료 순서대로 추가)"""
+    jobs = st.session_state.compare_jobs
+    settings = st.session_state.compare_settings
+    results = st.session_state.compare_results
+
+    for code, job in jobs.items():
+        if code not in results and job.done():
+            results[code] = comparison_row(job, settings['pct_range'], settings['bins'])
+            st.session_state.compare_order.append(code)
+
+    finished = len(results)
+    if finished < len(jobs):
+        running = [job for code, job in jobs.items() if code not in results]
+        rows_fetched = sum(job.progress()['rows'] for job in running)
+        st.progress(finished / len(jobs),
+                    text=f"⏳ {finished}/{len(jobs)}개 종목 분석 완료 · 진행 중 {rows_fetched:,}일 데이터 수집")
+    else:
+        st.success(f"✅ {len(jobs)}개 종목 분석 완료")
+
+    ordered = [results[code] for code in st.session_state.compare_order]
+    failed = [row for row in ordered if row['error']]
+    rows = [row for row in ordered if not row['error']]
+    for row in failed:
+        st.warning(f"⚠️ {row['name']} ({row['code']}): {row['error']}")
+    if not rows:
+        return
+
+    # 현재가 기준 상대 가격 격자
+    edges = np.linspace(-settings['pct_range'], settings['pct_range'], settings['bins'] + 1) * 100
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    col1, col2 = st.columns([3, 2])
+
+    with col1:
+        st.markdown("### 🌡️ 현재가 기준 거래량 프로파일")
+        heatmap = go.Figure(
+            go.Heatmap(
+                z=np.vstack([row['vector'] for row in rows]) * 100,
+                x=centers,
+                y=[f"{row['name']}" for row in rows],
+                colorscale='Viridis',
+                colorbar=dict(title="비중 (%)"),
+                hovertemplate='%{y}<br>현재가 대비 %{x:+.1f}%<br>거래량 비중 %{z:.2f}%<extra></extra>'
+            )
+        )
+        heatmap.add_vline(x=0, line_color="white", line_dash="dash")
+        heatmap.update_layout(
+            height=max(300, 40 * len(rows) + 120),
+            xaxis_title="현재가 대비 가격 (%)",
+            yaxis=dict(autorange="reversed"),
+            margin=dict(t=20)
+        )
+        st.plotly_chart(heatmap, use_container_width=True)
+
+    with col2:
+        st.markdown("### 🎯 종목별 밀집 구간")
+        table = []
+        for row in rows:
+            top = row['zones'].iloc[0]
+            table.append({
+                "종목": f"{row['name']} ({row['code']})",
+                "현재가": f"{row['current_price']:,.0f}원",
+                "1위 구간 (현재가 대비)": f"{top['zone_low_pct']:+.1f}% ~ {top['zone_high_pct']:+.1f}%",
+                "상위 3개 집중도": f"{row['zones']['share'].head(3).sum():.1f}%",
+                "지지선": f"{row['support']:,.0f}원" if row['support'] is not None else "-",
+                "저항선": f"{row['resistance']:,.0f}원" if row['resistance'] is not None else "-"
+            })
+        st.dataframe(pd.DataFrame(table), use_container_width=True, hide_index=True)
+
+    with st.expander("📋 종목별 상위 밀집 구간 상세", expanded=False):
+        for row in rows:
+            st.markdown(f"**{row['name']} ({row['code']})**")
+            detail = [{
+                "순위": f"{i}위",
+                "현재가 대비": f"{zone['zone_low_pct']:+.1f}% ~ {zone['zone_high_pct']:+.1f}%",
+                "거래량 비중": f"{zone['share']:.1f}%"
+            } for i, (_, zone) in enumerate(row['zones'].iterrows(), 1)]
+            st.dataframe(pd.DataFrame(detail), use_container_width=True, hide_index=True)
+
+
+@st.fragment(run_every=1.0)
+def render_comparison_live():
+    """분석 중인 종목이 있는 동안 1초마다 결과 섹션만 갱신 (모두 끝나면 전체 재실행)"""
+    render_comparison()
+    if len(st.session_state.compare_results) == len(st.session_state.compare_jobs):
+        st.rerun()
+
+
+st.markdown("# 📊 종목 비교")
+st.caption("관심 종목을 동시에 분석해 현재가 기준으로 맞춘 거래량 프로파일과 밀집 구간을 나란히 비교합니다")
+
+# 세션 상태 초기화
+if 'compare_jobs' not in st.session_state:
+    st.session_state.compare_jobs = {}
+if 'compare_results' not in st.session_state:
+    st.session_state.compare_results = {}
+if 'compare_order' not in st.session_state:
+    st.session_state.compare_order = []
+if 'compare_settings' not in st.session_state:
+    st.session_state.compare_settings = None
+
+# 사이드바 설정
+st.sidebar.header("📊 비교 설정")
+
+sector = st.sidebar.selectbox("업종", options=list(SECTOR_WATCHLISTS.keys()))
+watchlist = st.sidebar.multiselect(
+    "비교 종목",
+    options=list(ALL_STOCKS.keys()),
+    default=list(SECTOR_WATCHLISTS[sector].keys()),
+    key=f"watchlist_{sector}",
+    help="업종을 고르면 해당 종목이 채워지며, 다른 종목을 추가하거나 뺄 수 있습니다"
+)
+
+selected_period = st.sidebar.selectbox("분석 기간", options=list(PERIOD_OPTIONS.keys()), index=2)
+num_ranges = st.sidebar.slider("가격 구간 수", min_value=10, max_value=30, value=15)
+top_zones = st.sidebar.slider("상위 밀집 구간 수", min_value=3, max_value=10, value=5)
+pct_range = st.sidebar.slider(
+    "비교 가격 범위 (현재가 대비 ±%)",
+    min_value=10,
+    max_value=50,
+    value=30,
+    step=5,
+    help="프로파일을 맞춰 비교할 현재가 기준 가격 범위입니다"
+) / 100
+
+compare_button = st.sidebar.button(
+    "🔍 비교 시작",
+    type="primary",
+    use_container_width=True,
+    disabled=not watchlist
+)
+
+if compare_button:
+    # 이전 비교 작업 취소 후 종목별 작업을 한 번에 제출
+    for job in st.session_state.compare_jobs.values():
+        job.cancel()
+
+    days = PERIOD_OPTIONS[selected_period]
+    today = trading_calendar.now_kst()
+    end_date_str = today.strftime('%Y-%m-%d')
+    start_date_str = (today - timedelta(days=days)).strftime('%Y-%m-%d')
+    st.session_state.compare_settings = {'pct_range': pct_range, 'bins': 60}
+    st.session_state.compare_results = {}
+    st.session_state.compare_order = []
+    st.session_state.compare_jobs = {
+        ALL_STOCKS[name]: AnalysisJob({
+            'stock_code': ALL_STOCKS[name],
+            'start_date': start_date_str,
+            'end_date': end_date_str,
+            'num_ranges': num_ranges,
+            'top_zones': top_zones,
+            'sr_days': days,
+            'min_touches': 3,
+            'max_sr_levels': 3,
+            'use_full_period': True,
+            'use_kde': False
+        }, name).start()
+        for name in watchlist
+    }
+
+if st.session_state.compare_jobs:
+    if len(st.session_state.compare_results) < len(st.session_state.compare_jobs):
+        render_comparison_live()
+    else:
+        render_comparison()
+else:
+    st.info("📌 사이드바에서 업종과 종목을 고른 뒤 '🔍 비교 시작'을 눌러주세요")
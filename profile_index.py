@@ -0,0 +1,228 @@
+"""
+거래량 프로파일 유사도 검색
+종목별 거래량 프로파일을 현재가 대비 상대 가격 격자로 정규화해 벡터로 저장하고
+"지금 005930과 비슷한 모양의 프로파일을 가진 종목"을 찾는 최근접 이웃 인덱스
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from volume_profile import MultiResolutionProfile, top_n_indices
+
+
+def relative_profile_vector(data: pd.DataFrame, pct_range: float = 0.3, bins: int = 60,
+                            lookback: Optional[int] = None) -> np.ndarray:
+    """
+    현재가 대비 상대 가격 격자 위의 거래량 프로파일 벡터
+
+    현재 종가 기준 -pct_range ~ +pct_range 범위를 bins개 구간으로 나누고,
+    calculate_price_ranges와 같은 정의(저가~고가가 겹치는 구간에 거래량 합산)로
+    구간별 거래량을 구한 뒤 합이 1이 되도록 정규화합니다. 가격 수준과 거래량 규모가
+    다른 종목끼리도 모양만 비교할 수 있습니다.
+
+    Args:
+        data: OHLCV 데이터
+        pct_range: 현재가 대비 격자 범위 (0.3이면 ±30%)
+        bins: 격자 구간 수
+        lookback: 사용할 최근 일수 (None이면 전체)
+
+    Returns:
+        ndarray: 길이 bins의 정규화된 프로파일 (거래량이 없으면 0 벡터)
+    """
+    if lookback is not None:
+        data = data.tail(lookback)
+    current_price = float(data['Close'].iloc[-1])
+    edges = current_price * (1 + np.linspace(-pct_range, pct_range, bins + 1))
+
+    profile = MultiResolutionProfile(data['Low'].values, data['High'].values, data['Volume'].values)
+    volume, _ = profile.overlap_totals(edges)
+    volume = volume.astype(float)
+    total = volume.sum()
+    return volume / total if total > 0 else volume
+
+
+class ProfileIndex:
+    """
+    정규화된 거래량 프로파일 벡터 인덱스
+
+    벡터는 단위 길이로 정규화해 (용량 x 차원) float32 행렬 한 장에 모아 두고,
+    질의는 행렬-벡터 곱 한 번과 argpartition으로 코사인 유사도 상위 k개를 정확히
+    찾습니다. 수천 종목 x 수십 차원이면 질의 한 번이 밀리초 이하입니다.
+    종목 추가/갱신/삭제는 해당 행만 바꾸므로 새 일봉이 들어올 때 종목 단위로
+    점진 갱신할 수 있습니다.
+    """
+
+    def __init__(self, pct_range: float = 0.3, bins: int = 60, lookback: Optional[int] = 250,
+                 capacity: int = 256):
+        """
+        Args:
+            pct_range: 현재가 대비 격자 범위
+            bins: 격자 구간 수 (벡터 차원)
+            lookback: 프로파일에 사용할 최근 일수
+            capacity: 초기 행렬 용량 (부족하면 두 배씩 늘어남)
+        """
+        self.pct_range = pct_range
+        self.bins = bins
+        self.lookback = lookback
+        self._vectors = np.zeros((capacity, bins), dtype=np.float32)
+        self._symbols: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._updated: Dict[str, object] = {}
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._rows
+
+    @property
+    def symbols(self) -> List[str]:
+        """인덱스에 들어 있는 종목 코드 목록"""
+        return list(self._symbols)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """단위 길이로 정규화된 프로파일 행렬 (종목 수 x 차원)"""
+        return self._vectors[:len(self._symbols)]
+
+    def vectorize(self, data: pd.DataFrame) -> np.ndarray:
+        """인덱스 설정으로 OHLCV 데이터를 단위 길이 벡터로 변환"""
+        vector = relative_profile_vector(data, self.pct_range, self.bins, self.lookback)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm > 0 else vector).astype(np.float32)
+
+    def update(self, symbol: str, data: pd.DataFrame):
+        """
+        종목 벡터 추가 또는 갱신 (새 일봉이 들어오면 해당 종목만 다시 호출)
+
+        Args:
+            symbol: 종목 코드
+            data: 최신 OHLCV 데이터
+        """
+        self.set_vector(symbol, self.vectorize(data))
+        self._updated[symbol] = data.index[-1]
+
+    def update_many(self, data_by_symbol: Dict[str, pd.DataFrame]):
+        """여러 종목 벡터 추가 또는 갱신"""
+        for symbol, data in data_by_symbol.items():
+            if data is not None and not data.empty:
+                self.update(symbol, data)
+
+    def set_vector(self, symbol: str, vector: np.ndarray):
+        """이미 계산된 단위 길이 벡터를 그대로 저장"""
+        row = self._rows.get(symbol)
+        if row is None:
+            row = len(self._symbols)
+            if row == len(self._vectors):
+                grown = np.zeros((max(1, 2 * len(self._vectors)), self.bins), dtype=np.float32)
+                grown[:row] = self._vectors
+                self._vectors = grown
+            self._symbols.append(symbol)
+            self._rows[symbol] = row
+        self._vectors[row] = vector
+
+    def remove(self, symbol: str):
+        """종목 삭제 (마지막 행을 빈자리로 옮겨 행렬을 연속으로 유지)"""
+        row = self._rows.pop(symbol)
+        last = len(self._symbols) - 1
+        if row != last:
+            moved = self._symbols[last]
+            self._vectors[row] = self._vectors[last]
+            self._symbols[row] = moved
+            self._rows[moved] = row
+        self._symbols.pop()
+        self._vectors[last] = 0
+        self._updated.pop(symbol, None)
+
+    def last_updated(self, symbol: str):
+        """종목 벡터를 만든 데이터의 마지막 일자"""
+        return self._updated.get(symbol)
+
+    def query(self, target, k: int = 10, exclude_self: bool = True) -> pd.DataFrame:
+        """
+        프로파일 모양이 가장 비슷한 종목 찾기
+
+        Args:
+            target: 종목 코드(인덱스에 있는 종목), OHLCV DataFrame 또는 벡터
+            k: 반환할 종목 수
+            exclude_self: 종목 코드로 질의할 때 자기 자신 제외 여부
+
+        Returns:
+            DataFrame: symbol, similarity (코사인 유사도, 내림차순)
+        """
+        skip = None
+        if isinstance(target, str):
+            vector = self._vectors[self._rows[target]]
+            skip = self._rows[target] if exclude_self else None
+        elif isinstance(target, pd.DataFrame):
+            vector = self.vectorize(target)
+        else:
+            vector = np.asarray(target, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm > 0 else vector
+
+        scores = self.matrix @ vector
+        if skip is not None:
+            scores[skip] = -np.inf
+        top = top_n_indices(scores, min(k, len(scores) - (skip is not None)))
+        return pd.DataFrame({
+            'symbol': [self._symbols[i] for i in top],
+            'similarity': scores[top].astype(float)
+        })
+
+    def save(self, path: str):
+        """인덱스를 .npz 파일로 저장"""
+        np.savez_compressed(
+            path,
+            vectors=self.matrix,
+            symbols=np.array(self._symbols, dtype=str),
+            updated=np.array([str(self._updated.get(s, '')) for s in self._symbols], dtype=str),
+            config=np.array([self.pct_range, self.bins, -1 if self.lookback is None else self.lookback])
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'ProfileIndex':
+        """save로 저장한 인덱스 불러오기"""
+        with np.load(path) as saved:
+            pct_range, bins, lookback = saved['config']
+            index = cls(pct_range=float(pct_range), bins=int(bins),
+                        lookback=None if lookback < 0 else int(lookback),
+                        capacity=max(1, len(saved['symbols'])))
+            for symbol, vector, updated in zip(saved['symbols'], saved['vectors'], saved['updated']):
+                index.set_vector(str(symbol), vector)
+                if updated:
+                    index._updated[str(symbol)] = pd.Timestamp(str(updated))
+        return index
+
+
+def main():
+    """인기 종목 중 삼성전자와 프로파일이 비슷한 종목 찾기 예제"""
+    from stock_density_analyzer import StockDensityAnalyzer
+    from interactive_analyzer import POPULAR_STOCKS
+
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+
+    print("=== 거래량 프로파일 유사 종목 검색 ===")
+    index = ProfileIndex()
+    names = {}
+    for code, name in POPULAR_STOCKS.values():
+        data = StockDensityAnalyzer().fetch_data(code, start_date, end_date)
+        if data is not None:
+            index.update(code, data)
+            names[code] = name
+
+    if '005930' not in index:
+        print("삼성전자 데이터를 가져오지 못했습니다.")
+        return
+
+    print("\n삼성전자(005930)와 프로파일이 비슷한 종목:")
+    for _, row in index.query('005930', k=5).iterrows():
+        print(f"  - {names.get(row['symbol'], row['symbol'])} ({row['symbol']}): 유사도 {row['similarity']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+분석 실행 프로파일링
+특정 종목/기간 분석이 느릴 때 원인을 찾기 위해, 분석 한 번(또는 Streamlit 재실행 한 번)을 실행하는
+스레드의 호출 스택을 일정 간격으로 표본 추출해 플레임 그래프용 접힌 스택 파일(.folded)과
+상위 함수 요약(.txt)을 저장하는 모듈
+
+STOCK_DENSITY_PROFILE 환경 변수로 모든 실행을 켜거나, 'request'로 설정해 웹 UI 주소에 ?profile=1을
+붙인 세션만 켭니다 (환경 변수가 없으면 주소 요청도 무시하므로 방문자가 서버에 파일을 쓰게 할 수 없음).
+디렉터리마다 최근 MAX_PROFILES개만 남기고 오래된 프로파일은 지웁니다.
+꺼져 있으면 환경 변수 하나를 읽는 것 외에는 하는 일이 없습니다.
+
+플레임 그래프 보기:
+    flamegraph.pl <파일>.folded > flame.svg   (또는 https://www.speedscope.app 에 파일 열기)
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from data_cache import DEFAULT_CACHE_DIR
+
+# 켜기/끄기와 저장 위치 환경 변수: 비어 있거나 '0'이면 꺼짐(주소 요청도 무시), '1'이면 모든 실행을
+# 기본 디렉터리에, 'request' 또는 'request:<디렉터리>'이면 요청한 실행(웹 UI ?profile=1)만,
+# 그 밖의 값은 모든 실행을 그 디렉터리에 저장
+PROFILE_ENV = 'STOCK_DENSITY_PROFILE'
+DEFAULT_PROFILE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'profiles')
+# 디렉터리에 남길 최근 프로파일 수 (각각 .folded, .txt 파일 두 개)
+MAX_PROFILES = 50
+# 표본 추출 간격 (초)
+SAMPLE_INTERVAL = 0.005
+# stop()이 불리지 않아도 표본 추출을 멈추는 최대 시간 (초, 중간에 끊긴 Streamlit 재실행 대비)
+MAX_SECONDS = 300
+# 요약에 넣을 함수 수
+TOP_FUNCTIONS = 25
+
+_ON = {'1', 'true', 'on', 'yes'}
+_OFF = {'0', 'false', 'off', 'no'}
+_REQUEST = 'request'
+# 이 모듈이 저장한 파일 이름 ({시각}_{설명}.folded/.txt), 정리할 때 다른 파일은 건드리지 않음
+_PROFILE_FILE = re.compile(r'^\d{8}-\d{6}-\d{6}_[\w.-]+\.(folded|txt)$')
+
+
+def profile_dir(requested: bool = False) -> Optional[str]:
+    """
+    프로파일 저장 디렉터리 (프로파일링하지 않으면 None)
+
+    Args:
+        requested: 실행 단위로 요청했는지 (웹 UI ?profile=1, 환경 변수가 'request'일 때만 유효)
+    """
+    value = os.environ.get(PROFILE_ENV, '').strip()
+    if not value or value.lower() in _OFF:
+        return None
+    if value.lower() in _ON:
+        return DEFAULT_PROFILE_DIR
+    mode, _, directory = value.partition(':')
+    if mode.lower() == _REQUEST:
+        if not requested:
+            return None
+        return os.path.expanduser(directory) if directory else DEFAULT_PROFILE_DIR
+    return os.path.expanduser(value)
+
+
+def prune_profiles(directory: str, keep: int = MAX_PROFILES) -> int:
+    """
+    디렉터리에서 최근 keep개 프로파일만 남기고 삭제 (이 모듈이 저장한 파일만)
+
+    Returns:
+        int: 삭제한 프로파일 수
+    """
+    try:
+        names = [name for name in os.listdir(directory) if _PROFILE_FILE.match(name)]
+    except OSError:
+        return 0
+    # 파일 이름이 저장 시각으로 시작하므로 이름순이 시간순
+    bases = sorted({name.rsplit('.', 1)[0] for name in names})
+    old = set(bases[:max(len(bases) - keep, 0)])
+    for name in names:
+        if name.rsplit('.', 1)[0] in old:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+    return len(old)
+
+
+def _frame_label(code) -> str:
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> Tuple[str, ...]:
+    """바깥 호출부터 안쪽 호출 순서의 함수 이름"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    스레드 하나의 호출 스택 표본 추출기
+
+    별도 스레드가 interval초마다 대상 스레드의 현재 스택을 읽어 같은 스택끼리 횟수를 셉니다.
+    대상 스레드 코드는 바꾸지 않으므로 켜져 있을 때도 부담이 작고, 여러 분석이 동시에 각자의
+    스레드를 프로파일링할 수 있습니다. 대상 스레드가 끝나거나 max_seconds가 지나면 스스로 멈춥니다.
+    """
+
+    def __init__(self, label: str, directory: str, thread_id: Optional[int] = None,
+                 interval: float = SAMPLE_INTERVAL, max_seconds: float = MAX_SECONDS):
+        """
+        Args:
+            label: 파일 이름에 넣을 실행 설명 (예: 'analysis_005930_2024-01-01_2024-12-31')
+            directory: 저장 디렉터리
+            thread_id: 대상 스레드 (None이면 만드는 스레드)
+            interval: 표본 추출 간격 (초)
+            max_seconds: 최대 표본 추출 시간 (초)
+        """
+        self.label = re.sub(r'[^\w.-]+', '_', label)
+        self.directory = directory
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self.elapsed = 0.0
+        self.paths: Optional[Tuple[str, str]] = None
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._started = 0.0
+
+    def start(self) -> 'SamplingProfiler':
+        """표본 추출 시작"""
+        self._started_at = time.time()
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, name='profiler', daemon=True)
+        self._sampler.start()
+        return self
+
+    def _sample(self):
+        deadline = self._started + self.max_seconds
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or time.perf_counter() > deadline:
+                break
+            self.stacks[_stack(frame)] += 1
+            del frame
+
+    def stop(self) -> Optional[Tuple[str, str]]:
+        """
+        표본 추출을 멈추고 결과 저장 (여러 번 불러도 한 번만 저장)
+
+        Returns:
+            Tuple[str, str]: (접힌 스택 파일, 요약 파일) 경로 (저장하지 못하면 None)
+        """
+        if self._sampler is None:
+            return self.paths
+        self._stop.set()
+        self._sampler.join()
+        self._sampler = None
+        self.elapsed = time.perf_counter() - self._started
+        self.paths = self._save()
+        return self.paths
+
+    def __enter__(self) -> 'SamplingProfiler':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def folded(self) -> List[str]:
+        """플레임 그래프 도구(flamegraph.pl, speedscope, inferno)가 읽는 '함수;함수;함수 횟수' 줄"""
+        return [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+
+    def hot_functions(self, top_n: int = TOP_FUNCTIONS) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        표본이 많은 함수
+
+        Returns:
+            Dict: 'self'(그 함수 자체를 실행 중이던 표본 수), 'total'(호출한 함수까지 포함한 표본 수)
+                  각각 (함수, 표본 수) 목록
+        """
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            if not stack:
+                continue
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        return {'self': own.most_common(top_n), 'total': total.most_common(top_n)}
+
+    def summary(self, top_n: int = TOP_FUNCTIONS) -> str:
+        """상위 함수 요약 텍스트"""
+        samples = sum(self.stacks.values())
+        started = datetime.fromtimestamp(self._started_at).strftime('%Y-%m-%d %H:%M:%S')
+        lines = [
+            f"프로파일: {self.label}",
+            f"시작: {started}, 소요 {self.elapsed:.2f}초, 표본 {samples}개 ({self.interval * 1000:g}ms 간격)"
+        ]
+        hot = self.hot_functions(top_n)
+        for title, key in [("자기 시간 상위 함수", 'self'), ("누적 시간 상위 함수 (호출한 함수 포함)", 'total')]:
+            lines += ["", title, "  표본    비율  함수"]
+            for label, count in hot[key]:
+                lines.append(f"{count:>6} {count / max(samples, 1):>7.1%}  {label}")
+        return '\n'.join(lines) + '\n'
+
+    def _save(self) -> Optional[Tuple[str, str]]:
+        stamp = datetime.fromtimestamp(self._started_at).strftime('%Y%m%d-%H%M%S-%f')
+        base = os.path.join(self.directory, f"{stamp}_{self.label}")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(f"{base}.folded", 'w', encoding='utf-8') as f:
+                f.write('\n'.join(self.folded()) + '\n')
+            with open(f"{base}.txt", 'w', encoding='utf-8') as f:
+                f.write(self.summary())
+        except OSError:
+            return None
+        prune_profiles(self.directory, MAX_PROFILES)
+        return f"{base}.folded", f"{base}.txt"
+
+
+def start(label: str, requested: bool = False) -> Optional[SamplingProfiler]:
+    """
+    현재 스레드 프로파일링 시작 (켜져 있지 않으면 None)
+
+    Args:
+        label: 실행 설명
+        requested: 실행 단위로 요청했는지 (환경 변수가 'request'이면 요청한 실행만 프로파일링)
+    """
+    directory = profile_dir(requested)
+    if directory is None:
+        return None
+    return SamplingProfiler(label, directory).start()
+
+
+@contextmanager
+def profiled(label: str, requested: bool = False) -> Iterator[Optional[SamplingProfiler]]:
+    """with 블록 하나를 프로파일링 (켜져 있지 않으면 아무것도 하지 않고 None)"""
+    profiler = start(label, requested)
+    try:
+        yield profiler
+    finally:
+        if profiler is not None:
+            profiler.stop()
@@ -0,0 +1,238 @@
+"""
+내용 주소 기반 분석 결과 캐시
+입력 일봉 배열의 해시와 분석 설정으로 만든 키에 결과(프로파일, 밀집 구간, 지지/저항선, 보고서)를
+저장해 프로세스와 재시작을 넘어 재사용하는 모듈. 데이터가 한 행이라도 바뀌면 키가 달라지므로
+따로 무효화할 필요가 없고, 디스크 사용량은 최근에 쓰지 않은 항목부터 지워 한도 안으로 유지합니다.
+HTTP 서비스와 예열 작업의 요청 키별 결과(ResultStore)도 같은 캐시와 한도를 씁니다.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+import data_cache
+import trading_calendar
+
+# 계산 방식이 바뀌면 올려서 이전 결과를 쓰지 않도록 하는 버전
+CACHE_VERSION = 1
+# 디스크 캐시 최대 크기 (바이트)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# 프로세스 메모리에 함께 두는 최근 결과 크기 (바이트)
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+
+
+def frame_digest(frame: pd.DataFrame) -> str:
+    """DataFrame 내용(인덱스, 컬럼명, 값) 해시"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([str(column) for column in frame.columns]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def cache_key(kind: str, fingerprint: str, params: Dict) -> str:
+    """
+    결과 키
+
+    Args:
+        kind: 결과 종류 ('price_ranges', 'zones', 'support_resistance', 'report' 등)
+        fingerprint: 입력 데이터 해시 (PriceSeries.fingerprint)
+        params: 분석 설정 (JSON으로 변환 가능한 값)
+    """
+    payload = json.dumps([CACHE_VERSION, kind, fingerprint, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    디스크 LRU 결과 캐시 (+ 프로세스 메모리 LRU)
+
+    결과는 pickle로 <directory>/analysis/<키 앞 2자리>/<키>.pkl에 저장합니다. 읽을 때 파일 수정 시각을
+    갱신해 마지막 사용 시각으로 쓰고, 전체 크기가 max_bytes를 넘으면 가장 오래 쓰지 않은 파일부터
+    90%까지 지웁니다. 메모리에는 직렬화한 바이트를 두므로 호출한 쪽이 결과를 고쳐도 캐시는 바뀌지 않습니다.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 memory_bytes: int = DEFAULT_MEMORY_BYTES):
+        """
+        Args:
+            directory: 캐시 디렉터리 (data_cache와 공유)
+            max_bytes: 디스크 캐시 최대 크기
+            memory_bytes: 메모리 캐시 최대 크기
+        """
+        self.root = os.path.join(directory, 'analysis')
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._memory_size = 0
+        self._disk_size: Optional[int] = None
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evicted': 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.pkl")
+
+    def _remember(self, key: str, payload: bytes):
+        with self._lock:
+            if key in self._memory:
+                self._memory_size -= len(self._memory.pop(key))
+            if len(payload) > self.memory_bytes:
+                return
+            self._memory[key] = payload
+            self._memory_size += len(payload)
+            while self._memory_size > self.memory_bytes:
+                _, old = self._memory.popitem(last=False)
+                self._memory_size -= len(old)
+
+    def get(self, key: str) -> Optional[Any]:
+        """저장된 결과 (없으면 None)"""
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return pickle.loads(payload)
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                payload = f.read()
+            os.utime(path)
+            value = pickle.loads(payload)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            self.stats['misses'] += 1
+            return None
+        self.stats['disk_hits'] += 1
+        self._remember(key, payload)
+        return value
+
+    def put(self, key: str, value: Any):
+        """결과 저장 (한도를 넘으면 오래 쓰지 않은 항목 삭제)"""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, payload)
+        data_cache.atomic_write(self._path(key), payload)
+
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(size for _, size, _ in self._scan())
+            else:
+                self._disk_size += len(payload)
+            over = self._disk_size > self.max_bytes
+        if over:
+            self.evict()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """저장된 결과가 있으면 반환, 없으면 계산해서 저장"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _scan(self):
+        """(경로, 크기, 마지막 사용 시각) 목록"""
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for bucket in os.scandir(self.root):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith('.pkl'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self):
+        """디스크 사용량이 max_bytes의 90% 이하가 될 때까지 가장 오래 쓰지 않은 항목부터 삭제"""
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_size = total
+            self.stats['evicted'] += evicted
+
+    def clear_memory(self):
+        """메모리 캐시 비우기"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+
+
+class ResultStore:
+    """
+    요청 키별 분석 결과(JSON 문자열) 보관소 (HTTP 서비스, 예열 작업)
+
+    데이터 해시 대신 요청 키(종목, 기간, 설정)로 찾으므로 결과의 end_date 기준으로 데이터 캐시와 같은
+    유효 시간 규칙(거래일 달력)을 적용합니다. 저장은 ResultCache에 맡겨 디스크 한도와 LRU 삭제를
+    분석 결과와 함께 받습니다.
+    """
+
+    def __init__(self, cache: ResultCache, max_age: float = data_cache.DEFAULT_MAX_AGE):
+        """
+        Args:
+            cache: 결과를 저장할 캐시
+            max_age: 장중(미확정 일봉 포함) 결과 유효 시간 (초)
+        """
+        self.cache = cache
+        self.max_age = max_age
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return cache_key('request', key, {})
+
+    def get(self, key: str) -> Optional[str]:
+        """보관 중인 유효한 결과 JSON (없으면 None)"""
+        entry = self.cache.get(self._key(key))
+        if entry is None:
+            return None
+        # 저장 이후 요청 기간 안에 새로 확정된 일봉이 없으면 유효, 장중 결과는 max_age 동안만 유효
+        if not (trading_calendar.unchanged_since(entry['end_date'], entry['saved_at'])
+                or time.time() - entry['saved_at'] <= self.max_age):
+            return None
+        return entry['result']
+
+    def put(self, key: str, end_date: str, result: str):
+        """결과 JSON 저장"""
+        self.cache.put(self._key(key), {'end_date': end_date, 'saved_at': time.time(), 'result': result})
+
+
+_caches: Dict[str, ResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def default_result_cache() -> Optional[ResultCache]:
+    """공용 캐시 디렉터리의 결과 캐시 (프로세스당 하나, 캐시를 쓰지 않으면 None)"""
+    directory = data_cache.cache_dir()
+    if directory is None:
+        return None
+    with _caches_lock:
+        if directory not in _caches:
+            max_bytes = int(os.environ.get('STOCK_DENSITY_RESULT_CACHE_BYTES', DEFAULT_MAX_BYTES))
+            _caches[directory] = ResultCache(directory, max_bytes=max_bytes)
+        return _caches[directory]
+
+
+def default_result_store() -> Optional[ResultStore]:
+    """공용 결과 캐시 위의 요청 키별 결과 보관소 (캐시를 쓰지 않으면 None)"""
+    cache = default_result_cache()
+    return ResultStore(cache) if cache is not None else None
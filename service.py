@@ -0,0 +1,395 @@
+"""
+로컬 HTTP 분석 서비스
+다른 시스템이 밀집 구간/지지·저항선을 JSON으로 요청할 수 있도록 StockDensityAnalyzer를
+HTTP API로 제공하는 서비스 (표준 라이브러리 asyncio 서버 + 분석용 프로세스 풀)
+
+엔드포인트:
+    GET  /health          상태 (작업자 수, 실행/대기 중 요청 수, 캐시 적중 등)
+    POST /analyze         분석 요청 하나 (cli.parse_request 형식)
+    POST /batch           {"requests": [...]} 또는 요청 목록, 결과 목록 반환
+    GET  /results/<key>   이전 분석 결과 (응답의 key)
+
+사용 예:
+    python service.py --port 8000 --workers 4
+    curl -X POST localhost:8000/analyze -d '{"symbol": "005930", "days": 365}'
+    python service.py --fixture fixtures/   # 네트워크 없이 CSV 데이터로 부하 테스트
+"""
+
+import os
+
+# 분석기(matplotlib) 불러오기 전에 비대화형 백엔드 지정
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+import cli
+import data_cache
+import result_cache
+
+# 요청 본문 최대 크기
+MAX_BODY_BYTES = 1 << 20
+# /batch 한 번에 받는 최대 요청 수
+MAX_BATCH_SIZE = 100
+
+# 작업 프로세스마다 하나씩 두는 분석 세션 (같은 종목/기간 데이터 재사용)
+_session: Optional[cli.AnalysisSession] = None
+
+
+class ServiceBusy(Exception):
+    """대기열이 가득 차 요청을 받을 수 없음"""
+
+
+def fixture_reader(directory: str) -> Callable:
+    """
+    fdr.DataReader 대신 쓰는 CSV 데이터 소스
+
+    directory/<종목코드>.csv (날짜 인덱스 + Open/High/Low/Close/Volume 컬럼,
+    fdr.DataReader(...).to_csv()로 저장한 형식)에서 기간을 잘라 반환합니다.
+    파일이 없으면 빈 DataFrame을 반환해 fetch_data가 실패로 처리합니다.
+    """
+    frames: Dict[str, pd.DataFrame] = {}
+
+    def read(symbol: str, start=None, end=None) -> pd.DataFrame:
+        if symbol not in frames:
+            path = os.path.join(directory, f"{symbol}.csv")
+            if not os.path.exists(path):
+                return pd.DataFrame()
+            frames[symbol] = pd.read_csv(path, index_col=0, parse_dates=True).sort_index()
+        return frames[symbol].loc[start:end].copy()
+
+    return read
+
+
+def _init_worker(fixture_dir: Optional[str], max_analyzers: int):
+    """작업 프로세스 초기화 (세션 생성, 픽스처 데이터 소스 연결)"""
+    global _session
+    if fixture_dir:
+        import stock_density_analyzer
+        stock_density_analyzer.fdr.DataReader = fixture_reader(fixture_dir)
+        # 테스트 데이터가 공용 캐시에 섞이지 않도록 캐시 사용 안 함
+        data_cache.set_cache_dir(None)
+    _session = cli.AnalysisSession(max_analyzers=max_analyzers)
+
+
+def _ready() -> bool:
+    """작업 프로세스 준비 확인용 빈 작업"""
+    return _session is not None
+
+
+def _analyze(key: str, symbol: str, start_date: str, end_date: str, options: Dict) -> Tuple[str, bool, bool]:
+    """작업 프로세스에서 분석하고 JSON 문자열로 반환 (성공 여부, 최신 데이터 여부 포함)"""
+    result = _session.analyze(symbol, start_date, end_date, **options)
+    result['key'] = key
+    return cli.to_json(result), 'error' not in result, 'data_age' not in result
+
+
+class AnalysisService:
+    """
+    분석 요청을 프로세스 풀로 보내는 비동기 서비스
+
+    동시에 실행하는 분석은 max_concurrent개로 제한하고, 나머지는 max_queue개까지 대기시킨 뒤
+    그 이상은 503으로 거절합니다. 같은 요청이 실행 중이면 새로 계산하지 않고 결과를 함께 기다리며,
+    성공한 결과는 요청 키별로 최근 cache_size개를 메모리에 보관하고 공용 결과 보관소(data_cache)에도
+    저장하므로, 예열 작업(warmup.py)이나 다른 서비스 프로세스가 계산한 결과를 그대로 돌려줍니다.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_concurrent: Optional[int] = None,
+                 max_queue: int = 64, cache_size: int = 256, fixture_dir: Optional[str] = None,
+                 max_analyzers: int = 32):
+        """
+        Args:
+            workers: 분석 프로세스 수 (None이면 CPU 수)
+            max_concurrent: 동시에 실행할 분석 수 (None이면 workers)
+            max_queue: 실행을 기다릴 수 있는 최대 요청 수
+            cache_size: 메모리에 보관할 결과 수
+            fixture_dir: fdr.DataReader 대신 쓸 CSV 디렉터리 (부하 테스트용)
+            max_analyzers: 프로세스마다 보관할 종목/기간별 분석기 수
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrent = max_concurrent or self.workers
+        self.max_queue = max_queue
+        self.cache_size = cache_size
+        # fork로 만든 작업 프로세스는 그 시점에 열린 클라이언트 소켓을 물려받아 연결이 닫히지 않으므로 spawn 사용
+        self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                            mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=_init_worker, initargs=(fixture_dir, max_analyzers))
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._results: 'OrderedDict[str, str]' = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.active = 0
+        self.waiting = 0
+        self.store = None if fixture_dir else result_cache.default_result_store()
+        self.stats = {'requests': 0, 'computed': 0, 'cache_hits': 0, 'store_hits': 0, 'joined': 0,
+                      'rejected': 0, 'errors': 0}
+
+    def cached(self, key: str) -> Optional[str]:
+        """메모리에 보관 중인 결과 JSON (없으면 None)"""
+        if key not in self._results:
+            return None
+        self._results.move_to_end(key)
+        return self._results[key]
+
+    def _remember(self, key: str, text: str):
+        self._results[key] = text
+        if len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+
+    async def _load_stored(self, key: str) -> Optional[str]:
+        """공용 결과 보관소의 결과 JSON (없으면 None, 파일 읽기는 스레드에서)"""
+        if self.store is None:
+            return None
+        return await asyncio.to_thread(self.store.get, key)
+
+    async def analyze(self, request: Dict) -> Tuple[str, bool]:
+        """
+        분석 요청 하나 처리
+
+        Returns:
+            Tuple[str, bool]: (결과 JSON, 성공 여부)
+
+        Raises:
+            ServiceBusy: 대기열이 가득 찼을 때
+            KeyError, ValueError, TypeError, AttributeError: 요청 형식이 잘못되었을 때
+        """
+        self.stats['requests'] += 1
+        symbol, start_date, end_date, options = cli.parse_request(request)
+        key = cli.request_key(symbol, start_date, end_date, options)
+
+        text = self.cached(key)
+        if text is not None:
+            self.stats['cache_hits'] += 1
+            return text, True
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats['joined'] += 1
+        else:
+            if self.active + self.waiting >= self.max_concurrent + self.max_queue:
+                self.stats['rejected'] += 1
+                raise ServiceBusy("대기 중인 요청이 너무 많습니다")
+            # 작업이 시작되기 전에 같은 이벤트 루프 차례에 들어온 요청도 대기열 한도에 포함
+            self.waiting += 1
+            task = asyncio.ensure_future(self._compute(key, symbol, start_date, end_date, options))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # 요청한 연결이 끊겨도 같은 요청을 기다리는 다른 연결을 위해 계산은 계속
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, symbol: str, start_date: str, end_date: str,
+                       options: Dict) -> Tuple[str, bool]:
+        try:
+            text = await self._load_stored(key)
+            if text is not None:
+                self.stats['store_hits'] += 1
+                self._remember(key, text)
+                return text, True
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            text, ok, current = await loop.run_in_executor(self.executor, _analyze, key, symbol, start_date,
+                                                           end_date, options)
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+        self.stats['computed'] += 1
+        # 저장된 데이터로 바로 응답한 결과(data_age)는 보관하지 않아 갱신 후 요청에서 다시 계산
+        if ok and current:
+            self._remember(key, text)
+            if self.store is not None:
+                await asyncio.to_thread(self.store.put, key, end_date, text)
+        return text, ok
+
+    def health(self) -> Dict:
+        """서비스 상태"""
+        return dict(self.stats, status='ok', workers=self.workers, max_concurrent=self.max_concurrent,
+                    active=self.active, waiting=self.waiting, cached=len(self._results))
+
+    async def _analyze_item(self, request) -> str:
+        """/batch 요청 하나 (실패도 결과 목록에 error로 포함)"""
+        try:
+            text, _ = await self.analyze(request)
+            return text
+        except ServiceBusy as e:
+            return cli.to_json({'request': request, 'error': str(e)})
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
+            return cli.to_json({'request': request, 'error': f"잘못된 요청: {e}"})
+        except Exception as e:
+            return cli.to_json({'request': request, 'error': f"분석 실패: {e}"})
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, str, Dict[str, str]]:
+        """
+        요청 경로별 처리
+
+        Returns:
+            Tuple: (상태 코드, JSON 본문, 추가 헤더)
+        """
+        if path == '/health':
+            if method != 'GET':
+                return _error(HTTPStatus.METHOD_NOT_ALLOWED, "GET만 지원합니다")
+            return HTTPStatus.OK, cli.to_json(self.health()), {}
+
+        if path.startswith('/results/'):
+            if method != 'GET':
+                return _error(HTTPStatus.METHOD_NOT_ALLOWED, "GET만 지원합니다")
+            key = path[len('/results/'):]
+            text = self.cached(key) or await self._load_stored(key)
+            if text is None:
+                return _error(HTTPStatus.NOT_FOUND, "보관 중인 결과가 없습니다")
+            return HTTPStatus.OK, text, {}
+
+        if path not in ('/analyze', '/batch'):
+            return _error(HTTPStatus.NOT_FOUND, "없는 경로입니다")
+        if method != 'POST':
+            return _error(HTTPStatus.METHOD_NOT_ALLOWED, "POST만 지원합니다")
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError as e:
+            return _error(HTTPStatus.BAD_REQUEST, f"JSON 형식 오류: {e}")
+
+        if path == '/batch':
+            requests = payload.get('requests') if isinstance(payload, dict) else payload
+            if not isinstance(requests, list):
+                return _error(HTTPStatus.BAD_REQUEST, "requests 목록이 필요합니다")
+            if len(requests) > MAX_BATCH_SIZE:
+                return _error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                              f"한 번에 최대 {MAX_BATCH_SIZE}개까지 요청할 수 있습니다")
+            texts = await asyncio.gather(*(self._analyze_item(request) for request in requests))
+            return HTTPStatus.OK, '[' + ','.join(texts) + ']', {}
+
+        try:
+            text, ok = await self.analyze(payload)
+        except ServiceBusy as e:
+            return _error(HTTPStatus.SERVICE_UNAVAILABLE, str(e), {'Retry-After': '1'})
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
+            return _error(HTTPStatus.BAD_REQUEST, f"잘못된 요청: {e}")
+        except Exception as e:
+            return _error(HTTPStatus.INTERNAL_SERVER_ERROR, f"분석 실패: {e}")
+        # 데이터 소스에서 데이터를 가져오지 못한 경우
+        return (HTTPStatus.OK if ok else HTTPStatus.BAD_GATEWAY), text, {}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """HTTP/1.1 연결 처리 (keep-alive 지원)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await _write_response(writer, *_error(HTTPStatus.BAD_REQUEST, "잘못된 요청 줄입니다"), False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    await _write_response(writer, *_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                                          "요청 본문 크기가 올바르지 않습니다"), False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, text, extra = await self.dispatch(method.upper(), target.split('?', 1)[0], body)
+                await _write_response(writer, status, text, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8000):
+        """서버 실행 (중단될 때까지)"""
+        # 첫 요청이 작업 프로세스 시작(모듈 불러오기)을 기다리지 않도록 미리 띄움
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _ready) for _ in range(self.workers)))
+
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"분석 서비스 시작: http://{host}:{port} (작업 프로세스 {self.workers}개, "
+              f"동시 실행 {self.max_concurrent}개, 대기열 {self.max_queue}개)")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        """작업 프로세스 종료"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, str, Dict[str, str]]:
+    return status, cli.to_json({'error': message}), headers or {}
+
+
+async def _write_response(writer: asyncio.StreamWriter, status: int, text: str, headers: Dict[str, str],
+                          keep_alive: bool):
+    body = text.encode('utf-8')
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+             "Content-Type: application/json; charset=utf-8",
+             f"Content-Length: {len(body)}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+    await writer.drain()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="주식 거래량 밀집도 분석 HTTP 서비스")
+    parser.add_argument('--host', default='127.0.0.1', help="수신 주소 (기본 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8000, help="수신 포트 (기본 8000)")
+    parser.add_argument('--workers', type=int, help="분석 프로세스 수 (기본 CPU 수)")
+    parser.add_argument('--max-concurrent', type=int, help="동시에 실행할 분석 수 (기본 작업 프로세스 수)")
+    parser.add_argument('--max-queue', type=int, default=64, help="대기열 크기 (넘으면 503)")
+    parser.add_argument('--cache-size', type=int, default=256, help="메모리에 보관할 결과 수")
+    parser.add_argument('--fixture', help="fdr.DataReader 대신 쓸 CSV 디렉터리 (<종목코드>.csv)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    async def run():
+        service = AnalysisService(workers=args.workers, max_concurrent=args.max_concurrent,
+                                  max_queue=args.max_queue, cache_size=args.cache_size,
+                                  fixture_dir=args.fixture)
+        try:
+            await service.serve(args.host, args.port)
+        finally:
+            service.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n분석 서비스를 종료합니다.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+Streamlit 세션 메모리 관리
+세션마다 들고 있는 분석 상태(분석기, 분석 결과, 차트 캐시)의 크기를 재고, 같은 내용의 결과 표는
+공용 저장소의 한 객체로 합치며, 전체 크기가 예산을 넘으면 오래 쉬고 있는 세션의 무거운 상태부터
+비웠다가 그 세션이 돌아오면 같은 파라미터로 다시 만드는 모듈
+"""
+
+import os
+import sys
+import threading
+import time
+import types
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from analysis_worker import history_manager
+from result_cache import frame_digest
+
+# 전체 세션 분석 상태 예산 (MB, STOCK_DENSITY_SESSION_BUDGET_MB 환경 변수로 변경)
+DEFAULT_BUDGET_MB = 512
+# 이 시간(초) 이상 재실행이 없던 세션만 비움
+IDLE_SECONDS = 300
+# 같은 세션 크기를 다시 재기 전 최소 간격 (초, 결과가 바뀌면 바로 다시 잼)
+MEASURE_INTERVAL = 10
+
+
+def _root(array: np.ndarray) -> np.ndarray:
+    """뷰를 따라가 실제 메모리를 가진 배열"""
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def _frame_arrays(frame) -> List[np.ndarray]:
+    """DataFrame/Series의 값 배열 (숫자형 열은 원본 블록의 뷰)"""
+    if isinstance(frame, pd.Series):
+        return [frame.to_numpy()]
+    return [frame[column].to_numpy() for column in frame.columns]
+
+
+def deep_size(obj, shared_roots: Optional[set] = None, seen: Optional[set] = None, max_depth: int = 12) -> int:
+    """
+    객체가 차지하는 메모리 추정 (바이트)
+
+    컨테이너와 객체 속성을 따라가며 numpy 배열은 실제 메모리를 가진 배열 기준으로 한 번만 세고,
+    shared_roots에 든 배열(공용 저장소가 가진 데이터의 뷰)은 세지 않습니다.
+
+    Args:
+        obj: 잴 객체
+        shared_roots: 세지 않을 배열 id 집합
+        seen: 이미 센 객체 id 집합 (여러 객체를 함께 잴 때 공유)
+        max_depth: 따라갈 최대 깊이
+    """
+    shared_roots = shared_roots if shared_roots is not None else set()
+    seen = seen if seen is not None else set()
+    # 잰 동안 임시 배열이 해제되어 id가 재사용되지 않도록 보관
+    keep = []
+
+    def size(value, depth: int) -> int:
+        if value is None or id(value) in seen or depth > max_depth:
+            return 0
+        seen.add(id(value))
+        if isinstance(value, np.ndarray):
+            root = _root(value)
+            if id(root) in shared_roots or (root is not value and id(root) in seen):
+                return 0
+            seen.add(id(root))
+            if root.dtype == object:
+                return root.nbytes + sum(sys.getsizeof(item) for item in root.ravel()[:10000])
+            return root.nbytes
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            total = value.index.memory_usage(deep=True)
+            arrays = _frame_arrays(value)
+            keep.append(arrays)
+            for array in arrays:
+                total += size(array, depth + 1)
+            return total
+        if isinstance(value, pd.Index):
+            return value.memory_usage(deep=True)
+        total = sys.getsizeof(value)
+        if isinstance(value, (str, bytes, int, float, bool, type, types.ModuleType, types.FunctionType,
+                              types.MethodType, types.BuiltinFunctionType)):
+            return total
+        if isinstance(value, dict):
+            return total + sum(size(k, depth + 1) + size(v, depth + 1) for k, v in value.items())
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return total + sum(size(item, depth + 1) for item in value)
+        if hasattr(value, '__dict__'):
+            return total + size(vars(value), depth + 1)
+        return total
+
+    return size(obj, 0)
+
+
+class SharedFrames:
+    """
+    내용이 같은 결과 표(DataFrame)를 한 객체로 합치는 공용 저장소
+
+    내용 해시로 찾아 이미 있는 객체를 돌려주며, 약한 참조로 보관하므로 어느 세션도 쓰지 않으면 사라집니다.
+    여러 세션이 같은 종목/설정을 분석하면 가격 구간, 밀집 구간, KDE 표를 세션마다 따로 두지 않습니다.
+    """
+
+    def __init__(self):
+        self._frames: 'weakref.WeakValueDictionary[str, pd.DataFrame]' = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'saved_bytes': 0}
+
+    def intern(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """같은 내용의 공용 객체 (없으면 frame을 등록하고 그대로 반환)"""
+        digest = frame_digest(frame)
+        with self._lock:
+            shared = self._frames.get(digest)
+            if shared is None:
+                self._frames[digest] = frame
+                return frame
+            if shared is not frame:
+                self.stats['hits'] += 1
+                self.stats['saved_bytes'] += int(frame.memory_usage(deep=True).sum())
+            return shared
+
+    def frames(self) -> List[pd.DataFrame]:
+        with self._lock:
+            return list(self._frames.values())
+
+
+class SessionSlot:
+    """
+    세션 하나의 무거운 분석 상태
+
+    analyzer, analysis_data, data_key를 들고 있다가 MemoryGovernor가 비우면(evicted) 다시 만들 때 쓸
+    분석 파라미터(params, stock_name)만 남깁니다. st.session_state에 하나씩 두고 화면은 이 객체를 통해
+    분석 결과에 접근합니다.
+    """
+
+    def __init__(self):
+        self.analyzer = None
+        self.analysis_data: Optional[Dict] = None
+        self.data_key = None
+        self.params: Optional[Dict] = None
+        self.stock_name: Optional[str] = None
+        self.evicted = False
+        self.size = 0
+        self.last_active = time.time()
+        self._measured_at = 0.0
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """분석 결과만 비움 (파라미터가 바뀌었을 때, 분석기는 같은 데이터 재사용을 위해 유지)"""
+        with self._lock:
+            self.analysis_data = None
+            self.params = None
+            self.evicted = False
+            self._measured_at = 0.0
+
+
+class MemoryGovernor:
+    """
+    프로세스 전체 세션 분석 상태 예산 관리
+
+    세션을 다시 실행할 때마다 touch()로 사용 시각과 크기를 갱신하고, 전체 크기(세션별 상태 +
+    공용 데이터)가 예산을 넘으면 IDLE_SECONDS 이상 쉬고 있는 세션을 오래된 순서로 비웁니다.
+    세션 크기에는 공용 저장소(종목별 전체 기간 일봉, 합쳐진 결과 표)가 가진 배열을 세지 않습니다.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None, idle_seconds: float = IDLE_SECONDS,
+                 shared_sources: Iterable[Callable[[], List[pd.DataFrame]]] = ()):
+        """
+        Args:
+            budget_bytes: 전체 예산 (None이면 STOCK_DENSITY_SESSION_BUDGET_MB 또는 DEFAULT_BUDGET_MB)
+            idle_seconds: 비울 수 있는 세션의 최소 유휴 시간 (초)
+            shared_sources: 공용 데이터(DataFrame 목록)를 돌려주는 함수들
+        """
+        if budget_bytes is None:
+            budget_bytes = int(float(os.environ.get('STOCK_DENSITY_SESSION_BUDGET_MB', DEFAULT_BUDGET_MB))
+                               * 1024 * 1024)
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self.shared = SharedFrames()
+        self._shared_sources = list(shared_sources) + [self.shared.frames]
+        self._slots: 'weakref.WeakSet[SessionSlot]' = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self.stats = {'evictions': 0, 'evicted_bytes': 0, 'rebuilds': 0}
+
+    def new_slot(self) -> SessionSlot:
+        """새 세션 상태 등록 (세션이 끝나 상태가 사라지면 자동으로 빠짐)"""
+        slot = SessionSlot()
+        with self._lock:
+            self._slots.add(slot)
+        return slot
+
+    def store(self, slot: SessionSlot, analyzer, data_key, analysis_data: Dict, params: Dict, stock_name: str):
+        """
+        끝난 분석 결과를 세션 상태에 저장 (결과 표는 공용 저장소 객체로 합침)
+
+        일봉 데이터('data')는 종목별 전체 기간 일봉의 뷰이므로 그대로 둡니다.
+        """
+        for key, value in analysis_data.items():
+            if key != 'data' and isinstance(value, pd.DataFrame):
+                analysis_data[key] = self.shared.intern(value)
+        kde_result = analysis_data.get('kde_result')
+        if kde_result:
+            for key, value in kde_result.items():
+                if isinstance(value, pd.DataFrame):
+                    kde_result[key] = self.shared.intern(value)
+
+        with slot._lock:
+            rebuilt = slot.evicted
+            slot.analyzer = analyzer
+            slot.data_key = data_key
+            slot.analysis_data = analysis_data
+            slot.params = params
+            slot.stock_name = stock_name
+            slot.evicted = False
+            slot._measured_at = 0.0
+        if rebuilt:
+            with self._lock:
+                self.stats['rebuilds'] += 1
+
+    def _shared_roots(self) -> Dict[int, int]:
+        """공용 데이터가 가진 배열 id → 크기"""
+        roots = {}
+        for source in self._shared_sources:
+            for frame in source():
+                for array in _frame_arrays(frame):
+                    # 숫자형 열만 (object 열은 호출마다 새 배열이 만들어져 공유 여부를 알 수 없음)
+                    if array.dtype != object:
+                        root = _root(array)
+                        roots[id(root)] = root.nbytes
+        return roots
+
+    def measure(self, slot: SessionSlot, shared_roots: Optional[Dict[int, int]] = None) -> int:
+        """세션 상태 크기를 재서 slot.size에 기록"""
+        shared_roots = shared_roots if shared_roots is not None else self._shared_roots()
+        shared_ids = set(shared_roots)
+        seen = {id(frame) for frame in self.shared.frames()}
+        with slot._lock:
+            slot.size = deep_size([slot.analyzer, slot.analysis_data], shared_ids, seen)
+            slot._measured_at = time.time()
+        return slot.size
+
+    def touch(self, slot: SessionSlot):
+        """
+        세션 재실행 시 호출: 사용 시각과 크기를 갱신하고 예산을 넘으면 쉬고 있는 다른 세션을 비움
+        """
+        slot.last_active = time.time()
+        shared_roots = self._shared_roots()
+        if time.time() - slot._measured_at >= MEASURE_INTERVAL:
+            self.measure(slot, shared_roots)
+        self.enforce(shared_roots)
+
+    def enforce(self, shared_roots: Optional[Dict[int, int]] = None):
+        """전체 크기가 예산 이하가 될 때까지 오래 쉰 세션의 무거운 상태를 비움"""
+        shared_roots = shared_roots if shared_roots is not None else self._shared_roots()
+        with self._lock:
+            slots = list(self._slots)
+        total = sum(shared_roots.values()) + sum(slot.size for slot in slots)
+        if total <= self.budget_bytes:
+            return
+
+        now = time.time()
+        idle = sorted((slot for slot in slots
+                       if not slot.evicted and slot.analysis_data is not None
+                       and now - slot.last_active >= self.idle_seconds),
+                      key=lambda slot: slot.last_active)
+        for slot in idle:
+            if total <= self.budget_bytes:
+                break
+            with slot._lock:
+                freed = slot.size
+                slot.analyzer = None
+                slot.analysis_data = None
+                slot.data_key = None
+                slot.evicted = True
+                slot.size = 0
+            total -= freed
+            with self._lock:
+                self.stats['evictions'] += 1
+                self.stats['evicted_bytes'] += freed
+
+    def metrics(self) -> Dict:
+        """
+        메모리/비우기 지표
+
+        Returns:
+            Dict: sessions, evicted_sessions, session_bytes, shared_bytes, total_bytes, budget_bytes,
+                  shared_frames, dedup_hits, dedup_saved_bytes, evictions, evicted_bytes, rebuilds
+        """
+        shared_roots = self._shared_roots()
+        with self._lock:
+            slots = list(self._slots)
+            stats = dict(self.stats)
+        session_bytes = sum(slot.size for slot in slots)
+        shared_bytes = sum(shared_roots.values())
+        return {
+            'sessions': len(slots),
+            'evicted_sessions': sum(1 for slot in slots if slot.evicted),
+            'session_bytes': session_bytes,
+            'shared_bytes': shared_bytes,
+            'total_bytes': session_bytes + shared_bytes,
+            'budget_bytes': self.budget_bytes,
+            'shared_frames': len(self.shared.frames()),
+            'dedup_hits': self.shared.stats['hits'],
+            'dedup_saved_bytes': self.shared.stats['saved_bytes'],
+            **stats
+        }
+
+
+# 프로세스(모든 Streamlit 세션) 공용 관리자 (종목별 전체 기간 일봉을 공용 데이터로 취급)
+memory_governor = MemoryGovernor(shared_sources=[history_manager.frames])
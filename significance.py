@@ -0,0 +1,264 @@
+"""
+밀집 구간 / 지지선·저항선 유의성 추정
+일봉을 블록 단위로 복원 추출(블록 부트스트랩)해 프로파일을 수백~수천 번 다시 계산하고,
+원래 구간과 레벨이 재표본에서도 유지되는 비율을 신뢰도로 붙이는 모듈
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+import analysis_core as core
+from analysis_core import PriceSeries
+from volume_profile import TOUCH_CANDIDATES, TOUCH_UNIT
+
+
+def block_bootstrap_indices(n_days: int, n_resamples: int, block_length: int,
+                            rng: np.random.Generator) -> np.ndarray:
+    """
+    순환 블록 부트스트랩 표본 위치
+
+    연속된 block_length일 블록의 시작일을 무작위로 뽑아 이어 붙이므로 거래량이 며칠씩
+    몰리는 자기상관 구조가 재표본에서도 유지됩니다. 끝을 넘는 블록은 처음으로 이어집니다.
+
+    Args:
+        n_days: 원본 일수
+        n_resamples: 재표본 수
+        block_length: 블록 길이 (일)
+        rng: 난수 생성기
+
+    Returns:
+        ndarray: (n_resamples, n_days) 일 위치
+    """
+    block_length = max(1, min(block_length, n_days))
+    n_blocks = -(-n_days // block_length)
+    starts = rng.integers(0, n_days, size=(n_resamples, n_blocks))
+    positions = starts[:, :, None] + np.arange(block_length)
+    return (positions.reshape(n_resamples, -1)[:, :n_days]) % n_days
+
+
+def _resampled_totals(first: np.ndarray, last: np.ndarray, weights: np.ndarray, n_bins: int,
+                      indices: np.ndarray) -> np.ndarray:
+    """
+    재표본별 구간 합계
+
+    일마다 걸치는 첫/마지막 구간(first, last)은 원본 격자에서 한 번만 구해 두고,
+    재표본은 그 일들을 다시 고르는 것뿐이므로 차분 배열 bincount 한 번으로 모든 재표본을 집계합니다.
+
+    Returns:
+        ndarray: (재표본 수, n_bins) 구간별 가중치 합계
+    """
+    n_resamples = indices.shape[0]
+    row_offset = (np.arange(n_resamples) * (n_bins + 1))[:, None]
+    size = n_resamples * (n_bins + 1)
+    sampled_weights = weights[indices].ravel()
+    diff = (np.bincount((row_offset + first[indices]).ravel(), weights=sampled_weights, minlength=size)
+            - np.bincount((row_offset + last[indices] + 1).ravel(), weights=sampled_weights, minlength=size))
+    return np.cumsum(diff.reshape(n_resamples, -1), axis=1)[:, :n_bins]
+
+
+def _bootstrap_batch(args) -> np.ndarray:
+    """프로세스 풀 작업 단위 (재표본 묶음 하나)"""
+    first, last, weights, n_bins, n_resamples, block_length, seed = args
+    rng = np.random.default_rng(seed)
+    indices = block_bootstrap_indices(len(first), n_resamples, block_length, rng)
+    return _resampled_totals(first, last, weights, n_bins, indices)
+
+
+def bootstrap_totals(first: np.ndarray, last: np.ndarray, weights: np.ndarray, n_bins: int,
+                     n_resamples: int = 1000, block_length: Optional[int] = None, batch_size: int = 250,
+                     seed: Optional[int] = None, max_workers: Optional[int] = 1) -> np.ndarray:
+    """
+    블록 부트스트랩 재표본별 구간 합계를 묶음 단위로 계산
+
+    묶음마다 독립된 난수열(SeedSequence.spawn)을 쓰므로 같은 seed면 작업자 수와 관계없이
+    결과가 같습니다.
+
+    Args:
+        first: 일별 첫 구간 번호
+        last: 일별 마지막 구간 번호
+        weights: 일별 가중치 (거래량 또는 터치 1)
+        n_bins: 구간 수
+        n_resamples: 재표본 수
+        block_length: 블록 길이 (None이면 일수의 세제곱근)
+        batch_size: 한 번에 계산할 재표본 수 (메모리 사용량 조절)
+        seed: 난수 시드
+        max_workers: 프로세스 수 (1이면 현재 프로세스에서 순차 실행, None이면 CPU 수)
+
+    Returns:
+        ndarray: (n_resamples, n_bins) 재표본별 구간 합계
+    """
+    n_days = len(first)
+    if block_length is None:
+        block_length = max(1, int(round(n_days ** (1 / 3))))
+
+    sizes = [min(batch_size, n_resamples - start) for start in range(0, n_resamples, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(first, last, weights, n_bins, size, block_length, child) for size, child in zip(sizes, seeds)]
+
+    if max_workers == 1 or len(tasks) <= 1:
+        batches = [_bootstrap_batch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            batches = list(executor.map(_bootstrap_batch, tasks))
+    return np.vstack(batches) if batches else np.empty((0, n_bins))
+
+
+def _in_top(totals: np.ndarray, k: int) -> np.ndarray:
+    """재표본(행)별 상위 k개 구간 여부"""
+    k = min(k, totals.shape[1])
+    top = np.argpartition(-totals, k - 1, axis=1)[:, :k]
+    in_top = np.zeros(totals.shape, dtype=bool)
+    np.put_along_axis(in_top, top, True, axis=1)
+    return in_top
+
+
+def zone_significance(series: PriceSeries, num_ranges: Union[int, str] = 20, top_n: int = 5,
+                      n_resamples: int = 1000, block_length: Optional[int] = None, seed: Optional[int] = None,
+                      max_workers: Optional[int] = 1, batch_size: int = 250) -> pd.DataFrame:
+    """
+    밀집 구간(find_high_density_zones)의 부트스트랩 신뢰도
+
+    원본 가격 구간 경계를 고정한 채 일봉을 블록 부트스트랩으로 다시 뽑아 구간별 거래량을
+    재계산하고, 원래 상위 구간이 재표본에서도 상위 top_n에 드는 비율을 confidence로 둡니다.
+
+    Args:
+        series: 분석 데이터
+        num_ranges: 가격 구간 수 ('auto'이면 자동 선택)
+        top_n: 밀집 구간 수
+        n_resamples: 재표본 수
+        block_length: 블록 길이 (None이면 일수의 세제곱근)
+        seed: 난수 시드
+        max_workers: 프로세스 수 (1이면 순차 실행, None이면 CPU 수)
+        batch_size: 한 번에 계산할 재표본 수
+
+    Returns:
+        DataFrame: 밀집 구간 (find_high_density_zones 컬럼) + share(거래량 비중),
+                   share_low/share_high(재표본 5~95% 구간), confidence(0~1)
+    """
+    num_ranges = core.resolve_num_ranges(series, num_ranges)
+    price_ranges = core.calculate_price_ranges(series, num_ranges)
+    zones = core.find_high_density_zones(price_ranges, top_n).copy()
+
+    starts = price_ranges['range_start'].values
+    ends = price_ranges['range_end'].values
+    valid = np.isfinite(series.low) & np.isfinite(series.high)
+    low, high = series.low[valid], series.high[valid]
+    # 저가~고가가 겹치는 첫/마지막 구간 (calculate_price_ranges와 같은 겹침 기준)
+    first = np.clip(np.searchsorted(ends, low, side='left'), 0, num_ranges - 1)
+    last = np.clip(np.searchsorted(starts, high, side='right') - 1, 0, num_ranges - 1)
+
+    totals = bootstrap_totals(first, last, np.asarray(series.volume, dtype=float)[valid], num_ranges,
+                              n_resamples, block_length, batch_size, seed, max_workers)
+    shares = totals / np.maximum(totals.sum(axis=1, keepdims=True), 1e-12)
+    confidence = _in_top(totals, top_n).mean(axis=0)
+
+    bins = zones.index.values
+    volume = price_ranges['total_volume'].values
+    zones['share'] = volume[bins] / volume.sum() if volume.sum() > 0 else 0.0
+    zones['share_low'] = np.percentile(shares[:, bins], 5, axis=0)
+    zones['share_high'] = np.percentile(shares[:, bins], 95, axis=0)
+    zones['confidence'] = confidence[bins]
+    return zones
+
+
+def level_significance(series: PriceSeries, analysis_days: int = 60, min_touches: int = 3,
+                       max_levels: int = 3, n_resamples: int = 1000, block_length: Optional[int] = None,
+                       seed: Optional[int] = None, max_workers: Optional[int] = 1,
+                       batch_size: int = 250) -> pd.DataFrame:
+    """
+    지지선/저항선(calculate_support_resistance)의 부트스트랩 신뢰도
+
+    최근 analysis_days일을 블록 부트스트랩으로 다시 뽑아 1000원 가격대별 터치 횟수를 재계산하고,
+    원래 레벨이 재표본에서도 터치 상위 20개 후보이면서 min_touches 이상인 비율을 confidence로 둡니다.
+
+    Returns:
+        DataFrame: price, touches, side('support'/'resistance'), touches_low/touches_high
+                   (재표본 5~95% 구간), confidence(0~1)
+    """
+    levels = core.calculate_support_resistance(series, analysis_days, min_touches, max_levels)
+    rows = ([(level['price'], level['touches'], 'support') for level in levels['support_levels']]
+            + [(level['price'], level['touches'], 'resistance') for level in levels['resistance_levels']])
+    result = pd.DataFrame(rows, columns=['price', 'touches', 'side'])
+    if result.empty:
+        return result.assign(touches_low=[], touches_high=[], confidence=[])
+
+    low = series.low[-analysis_days:]
+    high = series.high[-analysis_days:]
+    valid = np.isfinite(low) & np.isfinite(high)
+    low_bucket = (low[valid] // TOUCH_UNIT).astype(np.int64)
+    high_bucket = (high[valid] // TOUCH_UNIT).astype(np.int64)
+    base = low_bucket.min()
+    n_buckets = int(high_bucket.max() - base) + 1
+
+    touches = bootstrap_totals(low_bucket - base, high_bucket - base, np.ones(len(low_bucket)), n_buckets,
+                               n_resamples, block_length, batch_size, seed, max_workers)
+    qualified = _in_top(touches, TOUCH_CANDIDATES) & (touches >= min_touches)
+
+    buckets = (result['price'].values // TOUCH_UNIT - base).astype(np.intp)
+    result['touches_low'] = np.percentile(touches[:, buckets], 5, axis=0)
+    result['touches_high'] = np.percentile(touches[:, buckets], 95, axis=0)
+    result['confidence'] = qualified[:, buckets].mean(axis=0)
+    return result
+
+
+def bootstrap_significance(data: Union[pd.DataFrame, PriceSeries], num_ranges: Union[int, str] = 20,
+                           top_n: int = 5, analysis_days: int = 60, min_touches: int = 3, max_levels: int = 3,
+                           n_resamples: int = 1000, block_length: Optional[int] = None, seed: Optional[int] = None,
+                           max_workers: Optional[int] = 1) -> Dict[str, pd.DataFrame]:
+    """
+    밀집 구간과 지지선/저항선의 부트스트랩 신뢰도를 함께 계산
+
+    Args:
+        data: OHLCV 데이터 또는 이미 만든 PriceSeries
+        num_ranges: 가격 구간 수 ('auto'이면 자동 선택)
+        top_n: 밀집 구간 수
+        analysis_days: 지지선/저항선 분석 일수
+        min_touches: 지지선/저항선 최소 터치 횟수
+        max_levels: 지지선/저항선 각각 최대 개수
+        n_resamples: 재표본 수
+        block_length: 블록 길이 (None이면 일수의 세제곱근)
+        seed: 난수 시드
+        max_workers: 프로세스 수 (1이면 순차 실행, None이면 CPU 수)
+
+    Returns:
+        Dict: 'zones' (zone_significance 결과), 'levels' (level_significance 결과)
+    """
+    series = data if isinstance(data, PriceSeries) else PriceSeries.from_frame(data)
+    return {
+        'zones': zone_significance(series, num_ranges, top_n, n_resamples, block_length, seed, max_workers),
+        'levels': level_significance(series, analysis_days, min_touches, max_levels, n_resamples,
+                                     block_length, seed, max_workers)
+    }
+
+
+def main():
+    """삼성전자 최근 1개월/1년 밀집 구간 신뢰도 비교 예제"""
+    from stock_density_analyzer import StockDensityAnalyzer
+
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+
+    print("=== 밀집 구간 / 지지·저항선 부트스트랩 신뢰도 ===")
+    data = StockDensityAnalyzer().fetch_data('005930', start_date, end_date)
+    if data is None:
+        return
+
+    for label, window in (("최근 1개월", data.tail(21)), ("최근 1년", data)):
+        result = bootstrap_significance(window, num_ranges=15, analysis_days=len(window), seed=0)
+        print(f"\n[{label}] 밀집 구간")
+        for _, zone in result['zones'].iterrows():
+            print(f"  - {zone['range_start']:,.0f} ~ {zone['range_end']:,.0f}원: "
+                  f"비중 {zone['share'] * 100:.1f}% ({zone['share_low'] * 100:.1f}~{zone['share_high'] * 100:.1f}%), "
+                  f"신뢰도 {zone['confidence'] * 100:.0f}%")
+        print(f"[{label}] 지지선/저항선")
+        for _, level in result['levels'].iterrows():
+            side = "지지" if level['side'] == 'support' else "저항"
+            print(f"  - {side} {level['price']:,.0f}원 (터치 {level['touches']}회): 신뢰도 {level['confidence'] * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,9 +11,16 @@ import seaborn as sns
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 import warnings
 
+import analysis_core as core
+from analysis_core import PriceSeries
+from volume_profile import MultiResolutionProfile
+import significance
+from data_cache import default_data_cache, format_age, source_breaker, stale_age
+from result_cache import cache_key, default_result_cache, frame_digest
+
 warnings.filterwarnings('ignore')
 
 # 한글 폰트 설정
@@ -22,13 +29,19 @@ plt.rcParams['axes.unicode_minus'] = False
 
 
 class StockDensityAnalyzer:
-    """주식 거래량 밀집도 분석 클래스"""
+    """
+    주식 거래량 밀집도 분석 클래스
+    
+    데이터 수집과 진행 메시지 출력을 맡고, 계산은 상태 없는 analysis_core 함수에 맡기는 래퍼입니다.
+    """
     
     def __init__(self):
         self.data = None
         self.symbol = None
         self.start_date = None
         self.end_date = None
+        self._series = None
+        self._series_source = None
         
     def fetch_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
         """
@@ -48,65 +61,104 @@ class StockDensityAnalyzer:
             self.end_date = end_date
             
             print(f"종목 {symbol}의 {start_date}부터 {end_date}까지 데이터를 가져오는 중...")
-            self.data = fdr.DataReader(symbol, start_date, end_date)
+            # 공용 디스크 캐시에 기간이 모두 있으면 네트워크 요청 없이 사용 (warmup.py가 미리 채워 둠)
+            # 데이터 소스가 느리거나 실패하면 저장된 데이터를 바로 쓰고 백그라운드에서 갱신
+            cache = default_data_cache()
+            if cache is not None:
+                self.data = cache.fetch(symbol, start_date, end_date, fdr.DataReader)
+            else:
+                self.data = source_breaker.call(fdr.DataReader, symbol, start_date, end_date)
             
             if self.data.empty:
                 raise ValueError("데이터를 가져올 수 없습니다. 종목 코드와 날짜를 확인해주세요.")
                 
             print(f"총 {len(self.data)}일의 데이터를 성공적으로 가져왔습니다.")
+            age = stale_age(self.data)
+            if age is not None:
+                print(f"  ({format_age(age)} 전에 저장한 데이터 사용, 백그라운드에서 갱신 중)")
             return self.data
             
         except Exception as e:
             print(f"데이터 가져오기 실패: {e}")
             return None
-    
-    def calculate_price_ranges(self, num_ranges: int = 20) -> pd.DataFrame:
+
+    def set_data(self, symbol: str, start_date: str, end_date: str, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        이미 가져온 주식 데이터로 분석 대상 설정 (fetch_data 대신 사용)
+
+        Args:
+            symbol: 종목 코드
+            start_date: 시작 날짜 ('YYYY-MM-DD')
+            end_date: 종료 날짜 ('YYYY-MM-DD')
+            data: OHLCV 데이터
+
+        Returns:
+            DataFrame: 주식 데이터
+        """
+        self.symbol = symbol
+        self.start_date = start_date
+        self.end_date = end_date
+        self.data = data
+        return self.data
+
+    def calculate_price_ranges(self, num_ranges: Union[int, str] = 20) -> pd.DataFrame:
         """
         가격 구간별 거래량 분석
         
+        데이터당 한 번 만든 MultiResolutionProfile을 재사용하므로 구간 수만 바꿔
+        다시 호출하면 원본 데이터를 다시 훑지 않고 즉시 재구간화됩니다.
+        num_ranges='auto'이면 종목의 가격 변동폭과 기간에 맞춰 구간 수를 정합니다
+        (거래량 가중 Freedman–Diaconis 규칙, 5~100개).
+        
         Args:
-            num_ranges: 분석할 가격 구간 수
+            num_ranges: 분석할 가격 구간 수 또는 'auto'
             
         Returns:
             DataFrame: 가격 구간별 거래량 정보
         """
+        return self._cached('price_ranges', {'num_ranges': num_ranges},
+                            lambda: core.calculate_price_ranges(self.series, num_ranges))
+    
+    @property
+    def series(self) -> PriceSeries:
+        """
+        현재 데이터의 불변 분석 데이터 (데이터가 바뀔 때만 다시 생성)
+        
+        여러 스레드에서 analysis_core 함수에 그대로 넘겨 동시에 분석할 수 있습니다.
+        
+        Returns:
+            PriceSeries: 분석 데이터
+        """
         if self.data is None:
             raise ValueError("먼저 데이터를 가져와야 합니다.")
         
-        # 최고가와 최저가 기준으로 가격 구간 설정
-        min_price = self.data['Low'].min()
-        max_price = self.data['High'].max()
+        if self._series is None or self._series_source is not self.data:
+            self._series = PriceSeries.from_frame(self.data, self.symbol, self.start_date, self.end_date)
+            self._series_source = self.data
+        return self._series
+    
+    def _cached(self, kind: str, params: Dict, compute):
+        """
+        공용 결과 캐시를 거쳐 계산 (데이터 해시 + 설정이 같으면 프로세스/재시작과 무관하게 재사용)
         
-        # 가격 구간 생성
-        price_bins = np.linspace(min_price, max_price, num_ranges + 1)
-        price_ranges = []
+        Args:
+            kind: 결과 종류
+            params: 결과를 결정하는 설정 (입력 DataFrame은 frame_digest로 넣음)
+            compute: 캐시에 없을 때 호출할 계산 함수
+        """
+        cache = default_result_cache()
+        if cache is None:
+            return compute()
+        return cache.get_or_compute(cache_key(kind, self.series.fingerprint, params), compute)
+    
+    def get_profile(self) -> MultiResolutionProfile:
+        """
+        현재 데이터의 다중 해상도 프로파일 (데이터가 바뀔 때만 다시 생성)
         
-        for i in range(len(price_bins) - 1):
-            range_start = price_bins[i]
-            range_end = price_bins[i + 1]
-            range_center = (range_start + range_end) / 2
-            
-            # 해당 구간에 포함되는 일자들의 거래량 합계
-            condition = (
-                (self.data['Low'] <= range_end) & 
-                (self.data['High'] >= range_start)
-            )
-            
-            volume_in_range = self.data[condition]['Volume'].sum()
-            days_in_range = condition.sum()
-            avg_volume = volume_in_range / days_in_range if days_in_range > 0 else 0
-            
-            price_ranges.append({
-                'range_start': range_start,
-                'range_end': range_end,
-                'range_center': range_center,
-                'total_volume': volume_in_range,
-                'days_count': days_in_range,
-                'avg_volume': avg_volume,
-                'volume_density': volume_in_range / (range_end - range_start) if range_end != range_start else 0
-            })
-        
-        return pd.DataFrame(price_ranges)
+        Returns:
+            MultiResolutionProfile: 구간 수별 재구간화용 프로파일
+        """
+        return self.series.profile
     
     def find_high_density_zones(self, price_ranges_df: pd.DataFrame, top_n: int = 5) -> pd.DataFrame:
         """
@@ -119,8 +171,8 @@ class StockDensityAnalyzer:
         Returns:
             DataFrame: 거래량 밀집 상위 구간
         """
-        # 거래량 밀도 기준으로 정렬
-        top_zones = price_ranges_df.nlargest(top_n, 'total_volume')
+        top_zones = self._cached('zones', {'price_ranges': frame_digest(price_ranges_df), 'top_n': top_n},
+                                 lambda: core.find_high_density_zones(price_ranges_df, top_n))
         
         print(f"\n=== 거래량 상위 {top_n}개 구간 ===")
         for idx, zone in top_zones.iterrows():
@@ -133,6 +185,100 @@ class StockDensityAnalyzer:
         
         return top_zones
     
+    def find_merged_density_zones(self, price_ranges_df: pd.DataFrame, top_n: int = 5,
+                                  smooth_window: int = 3, threshold_ratio: float = 1.0) -> pd.DataFrame:
+        """
+        인접한 고거래량 구간을 병합한 밀집 구간 찾기
+        
+        Args:
+            price_ranges_df: 가격 구간별 거래량 데이터
+            top_n: 상위 몇 개 밀집 구간을 반환할지
+            smooth_window: 평활화 이동평균 창 크기
+            threshold_ratio: 고거래량 판정 기준 (평활화 평균 대비 배수)
+            
+        Returns:
+            DataFrame: 병합된 밀집 구간 (경계, 최대 거래량 가격, 강도)
+        """
+        zones = core.find_merged_density_zones(price_ranges_df, top_n=top_n, smooth_window=smooth_window,
+                                               threshold_ratio=threshold_ratio)
+        
+        print(f"\n=== 병합된 거래량 밀집 구간 상위 {len(zones)}개 ===")
+        for i, (_, zone) in enumerate(zones.iterrows(), 1):
+            print(f"구간 {i}: {zone['zone_start']:,.0f} ~ {zone['zone_end']:,.0f}원")
+            print(f"  - 최대 거래량 가격: {zone['peak_price']:,.0f}원")
+            print(f"  - 병합된 구간 수: {zone['bins_count']:.0f}개")
+            print(f"  - 강도: {zone['strength'] * 100:.1f}%")
+            print()
+        
+        return zones
+    
+    def calculate_volume_kde(self, grid_size: int = 512, bandwidth: Optional[float] = None) -> pd.DataFrame:
+        """
+        연속 거래량 밀도 분석 (거래량 가중 KDE)
+        
+        고정된 가격 구간 대신 고운 격자 위에서 FFT 합성곱으로 매끄러운 밀도 곡선을 계산합니다.
+        
+        Args:
+            grid_size: 가격 격자 점 수
+            bandwidth: 커널 대역폭 (원), None이면 자동 선택
+            
+        Returns:
+            DataFrame: 격자 가격별 거래량 밀도 (price, volume_density, density)
+        """
+        return self._cached('volume_kde', {'grid_size': grid_size, 'bandwidth': bandwidth},
+                            lambda: core.calculate_volume_kde(self.series, grid_size=grid_size, bandwidth=bandwidth))
+    
+    def find_kde_density_zones(self, kde_df: pd.DataFrame, top_n: int = 5) -> pd.DataFrame:
+        """
+        연속 밀도 곡선에서 거래량 밀집 구간 찾기
+        
+        Args:
+            kde_df: calculate_volume_kde 결과
+            top_n: 상위 몇 개 밀집 구간을 반환할지
+            
+        Returns:
+            DataFrame: 밀집 구간 (경계, 최대 밀도 가격, 강도)
+        """
+        return core.find_kde_density_zones(kde_df, top_n=top_n)
+    
+    def calculate_kde_support_resistance(self, kde_df: pd.DataFrame, max_levels: int = 3) -> Dict:
+        """
+        연속 밀도 곡선의 봉우리 기반 지지선/저항선 분석
+        
+        Args:
+            kde_df: calculate_volume_kde 결과
+            max_levels: 최대 표시할 지지선/저항선 개수
+            
+        Returns:
+            Dict: 지지선/저항선 정보 (각 레벨은 price, density, strength 포함)
+        """
+        return core.calculate_kde_support_resistance(self.series, kde_df, max_levels=max_levels)
+    
+    def calculate_anchored_profiles(self, anchors, num_ranges: Union[int, str] = 20) -> Dict:
+        """
+        기준일(앵커)부터 현재까지의 거래량 프로파일 분석 (여러 앵커 동시 계산)
+        
+        이미 가져온 데이터 하나로 누적합을 이용해 모든 앵커를 한 번에 계산하므로
+        앵커마다 데이터를 다시 가져오거나 잘라낼 필요가 없습니다.
+        
+        Args:
+            anchors: 앵커 날짜 목록 ('YYYY-MM-DD', datetime 등). 휴장일이면 다음 거래일 사용
+            num_ranges: 가격 구간 수 또는 'auto' (모든 앵커가 같은 구간 공유)
+            
+        Returns:
+            Dict: 'profiles' (앵커별 가격 구간 거래량), 'summary' (앵커별 일수, 거래량, VWAP, 최대 거래량 가격)
+        """
+        return core.calculate_anchored_profiles(self.series, anchors, num_ranges=num_ranges)
+    
+    def suggest_anchors(self) -> pd.DataFrame:
+        """
+        앵커 후보 (52주 최고가/최저가 일, 큰 갭 발생일)
+        
+        Returns:
+            DataFrame: date, position, reason
+        """
+        return core.find_anchor_candidates(self.series)
+    
     def calculate_support_resistance(self, analysis_days=60, min_touches=3, max_levels=3) -> Dict:
         """
         지지선/저항선 분석
@@ -145,47 +291,38 @@ class StockDensityAnalyzer:
         Returns:
             Dict: 지지선/저항선 정보
         """
-        if self.data is None:
-            raise ValueError("먼저 데이터를 가져와야 합니다.")
-        
-        # 분석 기간 설정 (사용자 지정 가능)
-        recent_data = self.data.tail(analysis_days)
-        
-        # 지지선: 최저가 중에서 여러 번 터치된 가격대
-        support_levels = []
-        resistance_levels = []
+        params = {'analysis_days': analysis_days, 'min_touches': min_touches, 'max_levels': max_levels}
+        return self._cached('support_resistance', params,
+                            lambda: core.calculate_support_resistance(self.series, **params))
+    
+    def calculate_significance(self, num_ranges: Union[int, str] = 20, top_n: int = 5, analysis_days: int = 60,
+                               min_touches: int = 3, max_levels: int = 3, n_resamples: int = 1000,
+                               seed: Optional[int] = None, max_workers: Optional[int] = 1) -> Dict:
+        """
+        밀집 구간/지지선·저항선의 블록 부트스트랩 신뢰도
         
-        # 가격대별 터치 횟수 계산
-        price_touches = {}
+        Args:
+            num_ranges: 가격 구간 수
+            top_n: 밀집 구간 수
+            analysis_days: 지지선/저항선 분석 일수
+            min_touches: 지지선/저항선 최소 터치 횟수
+            max_levels: 지지선/저항선 각각 최대 개수
+            n_resamples: 재표본 수
+            seed: 난수 시드
+            max_workers: 프로세스 수 (1이면 순차 실행, None이면 CPU 수)
         
-        for _, row in recent_data.iterrows():
-            low_range = int(row['Low'] / 1000) * 1000  # 1000원 단위로 반올림
-            high_range = int(row['High'] / 1000) * 1000
-            
-            for price in range(low_range, high_range + 1000, 1000):
-                if price not in price_touches:
-                    price_touches[price] = 0
-                price_touches[price] += 1
-        
-        # 터치 횟수가 많은 상위 가격대
-        sorted_touches = sorted(price_touches.items(), key=lambda x: x[1], reverse=True)
-        
-        current_price = self.data['Close'].iloc[-1]
-        
-        for price, touches in sorted_touches[:20]:  # 상위 20개 중에서 선별
-            if touches >= min_touches:  # 사용자 지정 최소 터치 횟수
-                if price < current_price:
-                    support_levels.append({'price': price, 'touches': touches})
-                else:
-                    resistance_levels.append({'price': price, 'touches': touches})
-        
-        return {
-            'support_levels': support_levels[:max_levels],  # 사용자 지정 개수
-            'resistance_levels': resistance_levels[:max_levels],  # 사용자 지정 개수
-            'current_price': current_price,
-            'analysis_period': f"최근 {analysis_days}일",
-            'min_touches_used': min_touches
-        }
+        Returns:
+            Dict: 'zones' (밀집 구간 + confidence), 'levels' (지지선/저항선 + confidence)
+        """
+        print(f"부트스트랩 신뢰도 계산 중... ({n_resamples}회 재표본)")
+        params = {'num_ranges': num_ranges, 'top_n': top_n, 'analysis_days': analysis_days,
+                  'min_touches': min_touches, 'max_levels': max_levels, 'n_resamples': n_resamples}
+        # 시드가 없으면 매번 다른 재표본이므로 캐시하지 않음 (작업자 수는 결과에 영향 없음)
+        if seed is None:
+            return significance.bootstrap_significance(self.series, max_workers=max_workers, **params)
+        return self._cached('significance', dict(params, seed=seed),
+                            lambda: significance.bootstrap_significance(self.series, seed=seed,
+                                                                        max_workers=max_workers, **params))
     
     def plot_price_volume_analysis(self, price_ranges_df: pd.DataFrame, save_path: str = None):
         """
@@ -308,60 +445,12 @@ class StockDensityAnalyzer:
         Returns:
             str: 분석 보고서
         """
-        support_resistance = self.calculate_support_resistance()
-        
-        report = f"""
-=== {self.symbol} 거래량 밀집도 분석 보고서 ===
-분석 기간: {self.start_date} ~ {self.end_date}
-분석 일수: {len(self.data)}일
-
-【기본 정보】
-- 현재가: {self.data['Close'].iloc[-1]:,.0f}원
-- 기간 최고가: {self.data['High'].max():,.0f}원
-- 기간 최저가: {self.data['Low'].min():,.0f}원
-- 평균 거래량: {self.data['Volume'].mean():,.0f}주
-
-【거래량 밀집 구간 TOP 5】
-"""
-        
-        for i, (_, zone) in enumerate(high_density_zones.head().iterrows(), 1):
-            report += f"""
-{i}. {zone['range_start']:,.0f} ~ {zone['range_end']:,.0f}원
-   총 거래량: {zone['total_volume']:,.0f}주
-   해당 일수: {zone['days_count']:.0f}일
-   평균 거래량: {zone['avg_volume']:,.0f}주
-"""
-        
-        report += "\n【지지선/저항선 분석】"
-        
-        if support_resistance['support_levels']:
-            report += "\n<주요 지지선>"
-            for level in support_resistance['support_levels']:
-                report += f"\n- {level['price']:,.0f}원 (터치 {level['touches']}회)"
-        
-        if support_resistance['resistance_levels']:
-            report += "\n<주요 저항선>"
-            for level in support_resistance['resistance_levels']:
-                report += f"\n- {level['price']:,.0f}원 (터치 {level['touches']}회)"
-        
-        # 거래량 집중도 계산
-        total_volume = price_ranges_df['total_volume'].sum()
-        top_3_volume = high_density_zones.head(3)['total_volume'].sum()
-        concentration_ratio = (top_3_volume / total_volume) * 100
-        
-        report += f"""
-
-【거래량 집중도】
-- 상위 3개 구간 거래량 비중: {concentration_ratio:.1f}%
-- 거래 집중도: {"높음" if concentration_ratio > 30 else "보통" if concentration_ratio > 20 else "낮음"}
-
-【투자 참고사항】
-- 거래량이 집중된 구간은 향후 지지/저항 역할을 할 가능성이 높습니다.
-- 현재가 기준으로 위/아래 밀집 구간을 참고하여 매매 전략을 수립하세요.
-- 거래량 집중도가 높을수록 해당 가격대에서 치열한 매매가 이루어졌음을 의미합니다.
-"""
-        
-        return report
+        # 보고서 머리글의 종목/기간은 일봉 해시에 들어가지 않으므로 키에 함께 넣음
+        params = {'price_ranges': frame_digest(price_ranges_df), 'zones': frame_digest(high_density_zones),
+                  'symbol': self.series.symbol, 'start_date': self.series.start_date,
+                  'end_date': self.series.end_date}
+        return self._cached('report', params,
+                            lambda: core.generate_report(self.series, price_ranges_df, high_density_zones))
 
 
 def main():
@@ -0,0 +1,61 @@
+"""
+종목 목록
+웹 UI의 인기 종목/검색용 종목과 예열 작업(warmup.py)이 함께 쓰는 종목 코드 모음
+"""
+
+# 인기 종목 데이터
+POPULAR_STOCKS = {
+    "삼성전자": "005930",
+    "SK하이닉스": "000660",
+    "NAVER": "035420",
+    "현대차": "005380",
+    "현대모비스": "012330",
+    "LG화학": "051910",
+    "카카오": "035720",
+    "삼성바이오로직스": "207940",
+    "셀트리온": "068270",
+    "펄어비스": "263750",
+    "POSCO홀딩스": "005490",
+    "기아": "000270",
+    "LG에너지솔루션": "373220",
+    "KB금융": "105560",
+    "신한지주": "055550",
+    "하나금융지주": "086790",
+    "삼성SDI": "006400",
+    "LG전자": "066570",
+    "SK텔레콤": "017670",
+    "KT&G": "033780",
+    "삼성물산": "028260",
+    "현대글로비스": "086280",
+    "SK이노베이션": "096770",
+    "포스코케미칼": "003670",
+    "한국전력": "015760",
+    "CJ대한통운": "000120",
+    "두산에너빌리티": "034020",
+    "크래프톤": "259960",
+    "컴투스": "078340",
+    "위메이드": "112040",
+    "직접입력": "custom"
+}
+
+# 추가 종목 데이터베이스
+ADDITIONAL_STOCKS = {
+    "LG전자": "066570",
+    "포스코홀딩스": "005490",
+    "네이버": "035420",  # NAVER와 동일
+    "카카오뱅크": "323410",
+    "삼성SDI": "006400",
+    "LG에너지솔루션": "373220",
+    "SK이노베이션": "096770",
+    "현대중공업": "009540",
+    "기아": "000270",
+    "두산에너빌리티": "034020",
+    "POSCO": "005490",
+    "삼성물산": "028260",
+    "KB금융": "105560",
+    "신한지주": "055550",
+    "하나금융지주": "086790",
+    "SK텔레콤": "017670",
+    "KT": "030200",
+    "LG유플러스": "032640"
+}
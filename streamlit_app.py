@@ -1,6 +1,10 @@
 """
 주식 거래량 밀집도 분석기 - Streamlit Web UI
 사용자 친화적인 웹 인터페이스
+
+화면은 사이드바 설정, 기본 정보, 차트, 앵커 프로파일, 보고서 단위의 프래그먼트로 나뉘어
+한 섹션의 위젯을 조작하면 그 섹션만 다시 그립니다. 차트와 보고서는 분석 결과에 붙여
+캐시하므로 다시 그릴 때 새로 만들지 않습니다.
 """
 
 import streamlit as st
@@ -10,6 +14,14 @@ from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 import numpy as np
 from stock_density_analyzer import StockDensityAnalyzer
+from analysis_worker import AnalysisJob, AnalysisCancelled, history_manager
+from data_cache import format_age, stale_age
+from session_memory import memory_governor
+import profiling
+import trading_calendar
+from stock_lists import POPULAR_STOCKS, ADDITIONAL_STOCKS
+from concurrent.futures import CancelledError
+from streamlit_plotly_events import plotly_events
 import io
 import base64
 
@@ -21,8 +33,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS 스타일 적용 (다크모드 호환)
-st.markdown("""
+# CSS 스타일 (다크모드 호환)
+APP_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -137,160 +149,10 @@ st.markdown("""
         border: 1px solid rgba(40, 167, 69, 0.4);
     }
 </style>
-""", unsafe_allow_html=True)
-
-# 메인 헤더
-st.markdown('<h1 class="main-header">📈 주식 거래량 밀집도 분석기</h1>', unsafe_allow_html=True)
-st.markdown('<p class="subtitle">FinanceDataReader를 이용한 스마트 거래량 분석</p>', unsafe_allow_html=True)
-
-# 사이드바 설정
-st.sidebar.header("📊 분석 설정")
-
-# 인기 종목 데이터
-POPULAR_STOCKS = {
-    "삼성전자": "005930",
-    "SK하이닉스": "000660", 
-    "NAVER": "035420",
-    "현대차": "005380",
-    "현대모비스": "012330",
-    "LG화학": "051910",
-    "카카오": "035720",
-    "삼성바이오로직스": "207940",
-    "셀트리온": "068270",
-    "펄어비스": "263750",
-    "POSCO홀딩스": "005490",
-    "기아": "000270",
-    "LG에너지솔루션": "373220",
-    "KB금융": "105560",
-    "신한지주": "055550",
-    "하나금융지주": "086790",
-    "삼성SDI": "006400",
-    "LG전자": "066570",
-    "SK텔레콤": "017670",
-    "KT&G": "033780",
-    "삼성물산": "028260",
-    "현대글로비스": "086280",
-    "SK이노베이션": "096770",
-    "포스코케미칼": "003670",
-    "한국전력": "015760",
-    "CJ대한통운": "000120",
-    "두산에너빌리티": "034020",
-    "크래프톤": "259960",
-    "컴투스": "078340",
-    "위메이드": "112040",
-    "직접입력": "custom"
-}
-
-# 종목 선택
-st.sidebar.subheader("🎯 종목 선택")
-
-# 종목 검색 입력창
-search_input = st.sidebar.text_input(
-    "종목명 또는 종목코드 입력:",
-    value="",
-    placeholder="예: 삼성전자, 005930, SK하이닉스",
-    help="종목명(일부분도 가능) 또는 6자리 종목코드를 입력하세요"
-)
-
-# 검색 결과 처리
-if search_input:
-    # 종목코드인지 확인 (6자리 숫자)
-    if search_input.isdigit() and len(search_input) == 6:
-        stock_code = search_input
-        stock_name = f"종목코드_{search_input}"
-        st.sidebar.success(f"✅ 종목코드: {stock_code}")
-        
-    else:
-        # 종목명으로 검색
-        matched_stocks = []
-        search_lower = search_input.lower()
-        
-        # 인기 종목에서 검색
-        for name, code in POPULAR_STOCKS.items():
-            if name != "직접입력" and search_lower in name.lower():
-                matched_stocks.append((name, code))
-        
-        # 추가 종목 데이터베이스
-        additional_stocks = {
-            "LG전자": "066570",
-            "포스코홀딩스": "005490",
-            "네이버": "035420",  # NAVER와 동일
-            "카카오뱅크": "323410",
-            "삼성SDI": "006400",
-            "LG에너지솔루션": "373220",
-            "SK이노베이션": "096770",
-            "현대중공업": "009540",
-            "기아": "000270",
-            "두산에너빌리티": "034020",
-            "POSCO": "005490",
-            "삼성물산": "028260",
-            "KB금융": "105560",
-            "신한지주": "055550",
-            "하나금융지주": "086790",
-            "SK텔레콤": "017670",
-            "KT": "030200",
-            "LG유플러스": "032640"
-        }
-        
-        # 추가 종목에서도 검색
-        for name, code in additional_stocks.items():
-            if search_lower in name.lower():
-                matched_stocks.append((name, code))
-        
-        if matched_stocks:
-            if len(matched_stocks) == 1:
-                # 정확히 하나 매칭되면 자동 선택
-                stock_name, stock_code = matched_stocks[0]
-                st.sidebar.success(f"✅ {stock_name} ({stock_code})")
-            else:
-                # 여러 개 매칭되면 선택 옵션 제공
-                st.sidebar.write(f"🔍 {len(matched_stocks)}개 종목 발견:")
-                selected_match = st.sidebar.selectbox(
-                    "원하는 종목을 선택하세요:",
-                    options=[f"{name} ({code})" for name, code in matched_stocks],
-                    key="stock_search_results"
-                )
-                if selected_match:
-                    stock_name = selected_match.split(" (")[0]
-                    stock_code = selected_match.split("(")[1].replace(")", "")
-                    st.sidebar.success(f"✅ 선택됨: {stock_name} ({stock_code})")
-                else:
-                    stock_code = None
-                    stock_name = None
-        else:
-            # 매칭되는 종목이 없으면 직접 입력으로 처리
-            if len(search_input) >= 2:
-                st.sidebar.warning("⚠️ 매칭되는 종목을 찾을 수 없습니다.")
-                
-                # 숫자가 포함되어 있으면 종목코드로 가정
-                if any(char.isdigit() for char in search_input):
-                    manual_code = st.sidebar.text_input(
-                        "종목코드를 정확히 입력하세요 (6자리):",
-                        value=search_input,
-                        max_chars=6,
-                        key="manual_code_input"
-                    )
-                    if manual_code and manual_code.isdigit() and len(manual_code) == 6:
-                        stock_code = manual_code
-                        stock_name = f"직접입력_{manual_code}"
-                        st.sidebar.info(f"ℹ️ 종목코드 {stock_code}로 분석합니다")
-                    else:
-                        stock_code = None
-                        stock_name = None
-                else:
-                    st.sidebar.info("💡 정확한 종목명이나 6자리 종목코드를 입력해주세요")
-                    stock_code = None
-                    stock_name = None
-            else:
-                stock_code = None
-                stock_name = None
-else:
-    stock_code = None
-    stock_name = None
+"""
 
-# 분석 기간 설정
-st.sidebar.subheader("📅 분석 기간")
-period_options = {
+# 분석 기간 옵션
+PERIOD_OPTIONS = {
     "최근 1개월": 30,
     "최근 3개월": 90,
     "최근 6개월": 180,
@@ -302,355 +164,259 @@ period_options = {
     "사용자 정의": "custom"
 }
 
-selected_period = st.sidebar.selectbox(
-    "분석 기간을 선택하세요:",
-    options=list(period_options.keys()),
-    index=1  # 기본값: 최근 3개월
-)
 
-if selected_period == "사용자 정의":
-    col1, col2 = st.sidebar.columns(2)
-    with col1:
-        start_date = st.date_input(
-            "시작일",
-            value=datetime.now() - timedelta(days=90),
-            max_value=datetime.now()
+@st.cache_data(show_spinner=False)
+def search_stocks(query: str):
+    """종목명 일부로 인기 종목과 추가 종목 검색 (검색어별 결과 캐시)"""
+    search_lower = query.lower()
+    matched_stocks = [(name, code) for name, code in POPULAR_STOCKS.items()
+                      if name != "직접입력" and search_lower in name.lower()]
+    matched_stocks += [(name, code) for name, code in ADDITIONAL_STOCKS.items()
+                       if search_lower in name.lower()]
+    return matched_stocks
+
+
+def cached_result(data: dict, key, build):
+    """
+    분석 결과에 붙여 둔 계산 결과 재사용
+
+    차트 객체나 보고서처럼 분석 결과만으로 정해지는 값은 처음 한 번만 만들고 이후 재실행에서는
+    그대로 씁니다. 새로 분석하면 분석 결과 딕셔너리 자체가 바뀌므로 따로 무효화할 필요가 없습니다.
+
+    Args:
+        data: 분석 결과 (세션 슬롯의 analysis_data)
+        key: 캐시 키
+        build: 값을 만드는 함수 (인자 없음)
+    """
+    cache = data.setdefault('cache', {})
+    if key not in cache:
+        cache[key] = build()
+    return cache[key]
+
+
+def select_stock():
+    """종목 검색 입력과 결과 처리 (반환: 종목 코드, 종목명)"""
+    st.subheader("🎯 종목 선택")
+
+    # 종목 검색 입력창
+    search_input = st.text_input(
+        "종목명 또는 종목코드 입력:",
+        value="",
+        placeholder="예: 삼성전자, 005930, SK하이닉스",
+        help="종목명(일부분도 가능) 또는 6자리 종목코드를 입력하세요"
+    )
+
+    if not search_input:
+        return None, None
+
+    # 종목코드인지 확인 (6자리 숫자)
+    if search_input.isdigit() and len(search_input) == 6:
+        st.success(f"✅ 종목코드: {search_input}")
+        return search_input, f"종목코드_{search_input}"
+
+    # 종목명으로 검색
+    matched_stocks = search_stocks(search_input)
+
+    if matched_stocks:
+        if len(matched_stocks) == 1:
+            # 정확히 하나 매칭되면 자동 선택
+            stock_name, stock_code = matched_stocks[0]
+            st.success(f"✅ {stock_name} ({stock_code})")
+            return stock_code, stock_name
+
+        # 여러 개 매칭되면 선택 옵션 제공
+        st.write(f"🔍 {len(matched_stocks)}개 종목 발견:")
+        selected_match = st.selectbox(
+            "원하는 종목을 선택하세요:",
+            options=[f"{name} ({code})" for name, code in matched_stocks],
+            key="stock_search_results"
         )
-    with col2:
-        end_date = st.date_input(
-            "종료일",
-            value=datetime.now(),
-            max_value=datetime.now()
+        if selected_match:
+            stock_name = selected_match.split(" (")[0]
+            stock_code = selected_match.split("(")[1].replace(")", "")
+            st.success(f"✅ 선택됨: {stock_name} ({stock_code})")
+            return stock_code, stock_name
+        return None, None
+
+    # 매칭되는 종목이 없으면 직접 입력으로 처리
+    if len(search_input) < 2:
+        return None, None
+
+    st.warning("⚠️ 매칭되는 종목을 찾을 수 없습니다.")
+
+    # 숫자가 포함되어 있으면 종목코드로 가정
+    if any(char.isdigit() for char in search_input):
+        manual_code = st.text_input(
+            "종목코드를 정확히 입력하세요 (6자리):",
+            value=search_input,
+            max_chars=6,
+            key="manual_code_input"
         )
-    
-    start_date_str = start_date.strftime('%Y-%m-%d')
-    end_date_str = end_date.strftime('%Y-%m-%d')
-else:
-    days = period_options[selected_period]
-    end_date_str = datetime.now().strftime('%Y-%m-%d')
-    start_date_str = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-
-# 분석 옵션
-st.sidebar.subheader("⚙️ 분석 옵션")
-num_ranges = st.sidebar.slider(
-    "가격 구간 수",
-    min_value=10,
-    max_value=30,
-    value=15,
-    help="가격을 나눌 구간의 수를 설정합니다"
-)
+        if manual_code and manual_code.isdigit() and len(manual_code) == 6:
+            st.info(f"ℹ️ 종목코드 {manual_code}로 분석합니다")
+            return manual_code, f"직접입력_{manual_code}"
+    else:
+        st.info("💡 정확한 종목명이나 6자리 종목코드를 입력해주세요")
+    return None, None
 
-top_zones = st.sidebar.slider(
-    "상위 밀집 구간 수",
-    min_value=3,
-    max_value=10,
-    value=5,
-    help="표시할 상위 거래량 밀집 구간의 수입니다"
-)
 
-# 지지선/저항선 설정
-st.sidebar.subheader("📊 지지선/저항선 설정")
+@st.fragment
+def render_sidebar_settings():
+    """
+    사이드바 분석 설정 (프래그먼트)
 
-# 분석 기간 연동 옵션
-use_full_period = st.sidebar.checkbox(
-    "📅 전체 분석 기간 사용",
-    value=True,
-    help="체크 시 주 분석 기간과 동일하게 지지선/저항선을 분석합니다"
-)
+    검색어 입력처럼 분석 파라미터가 바뀌지 않는 조작은 사이드바만 다시 그리고,
+    파라미터가 바뀌면 전체 앱을 재실행해 분석과 결과 화면을 갱신합니다.
+    선택된 설정은 st.session_state.sidebar_params / sidebar_stock_name에 저장합니다.
+    """
+    stock_code, stock_name = select_stock()
+    # 종목을 고르면 분석 버튼을 누르기 전에 전체 기간(5년)을 미리 가져와 모든 기간 옵션을 잘라서 사용
+    if stock_code is not None:
+        history_manager.prefetch(stock_code)
 
-if use_full_period:
-    # 전체 기간 사용 시 계산된 일수 표시
-    if selected_period != "사용자 정의":
-        days = period_options[selected_period]
-        st.sidebar.info(f"🔗 지지선/저항선 분석 기간: {days}일 (주 분석 기간과 동일)")
-        support_resistance_days = days
-    else:
-        # 사용자 정의 기간의 일수 계산
-        from datetime import datetime
-        start_dt = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_dt = datetime.strptime(end_date_str, '%Y-%m-%d')
-        days_diff = (end_dt - start_dt).days
-        st.sidebar.info(f"🔗 지지선/저항선 분석 기간: {days_diff}일 (주 분석 기간과 동일)")
-        support_resistance_days = days_diff
-else:
-    # 별도 설정 사용
-    support_resistance_days = st.sidebar.slider(
-        "분석 기간 (일)",
-        min_value=30,
-        max_value=365,
-        value=60,
-        help="지지선/저항선 분석에 사용할 최근 데이터 일수"
+    # 분석 기간 설정
+    st.subheader("📅 분석 기간")
+    selected_period = st.selectbox(
+        "분석 기간을 선택하세요:",
+        options=list(PERIOD_OPTIONS.keys()),
+        index=1  # 기본값: 최근 3개월
     )
 
-min_touches = st.sidebar.slider(
-    "최소 터치 횟수",
-    min_value=2,
-    max_value=5,
-    value=3,
-    help="지지선/저항선으로 인정할 최소 터치 횟수"
-)
-
-max_sr_levels = st.sidebar.slider(
-    "최대 표시 개수",
-    min_value=2,
-    max_value=6,
-    value=3,
-    help="지지선과 저항선 각각 최대 표시할 개수"
-)
+    # 기본 종료일은 서버 시간대와 관계없이 한국 날짜 (예열 작업이 저장한 결과와 같은 키)
+    today = trading_calendar.now_kst().date()
+    if selected_period == "사용자 정의":
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input(
+                "시작일",
+                value=today - timedelta(days=90),
+                max_value=today
+            )
+        with col2:
+            end_date = st.date_input(
+                "종료일",
+                value=today,
+                max_value=today
+            )
 
-# 현재 분석 설정 요약 표시
-if stock_code is not None:
-    st.sidebar.markdown("### 📋 현재 분석 설정")
-    st.sidebar.write(f"**종목**: {stock_name} ({stock_code})")
-    st.sidebar.write(f"**기간**: {start_date_str} ~ {end_date_str}")
-    st.sidebar.write(f"**구간 수**: {num_ranges}개")
-    st.sidebar.write(f"**상위 표시**: {top_zones}개")
-    
-    if use_full_period:
-        st.sidebar.write(f"**지지/저항 분석**: 전체 기간 ({support_resistance_days}일)")
+        start_date_str = start_date.strftime('%Y-%m-%d')
+        end_date_str = end_date.strftime('%Y-%m-%d')
     else:
-        st.sidebar.write(f"**지지/저항 분석**: {support_resistance_days}일")
-    
-    st.sidebar.write(f"**최소 터치**: {min_touches}회")
-    st.sidebar.write(f"**지지/저항 표시**: 각 {max_sr_levels}개")
-    st.sidebar.markdown("---")# 세션 상태 초기화
-if 'analysis_done' not in st.session_state:
-    st.session_state.analysis_done = False
-if 'analyzer' not in st.session_state:
-    st.session_state.analyzer = None
-if 'analysis_data' not in st.session_state:
-    st.session_state.analysis_data = None
-if 'last_stock_code' not in st.session_state:
-    st.session_state.last_stock_code = None
-if 'last_analysis_params' not in st.session_state:
-    st.session_state.last_analysis_params = None
+        days = PERIOD_OPTIONS[selected_period]
+        end_date_str = today.strftime('%Y-%m-%d')
+        start_date_str = (today - timedelta(days=days)).strftime('%Y-%m-%d')
 
-# 세션 상태 초기화
-if 'analysis_done' not in st.session_state:
-    st.session_state.analysis_done = False
-if 'analyzer' not in st.session_state:
-    st.session_state.analyzer = None
-if 'analysis_data' not in st.session_state:
-    st.session_state.analysis_data = None
-if 'last_analysis_params' not in st.session_state:
-    st.session_state.last_analysis_params = None
+    # 분석 옵션
+    st.subheader("⚙️ 분석 옵션")
+    num_ranges = st.slider(
+        "가격 구간 수",
+        min_value=10,
+        max_value=30,
+        value=15,
+        help="가격을 나눌 구간의 수를 설정합니다"
+    )
 
-# 현재 분석 파라미터 생성
-current_params = {
-    'stock_code': stock_code,
-    'start_date': start_date_str,
-    'end_date': end_date_str,
-    'num_ranges': num_ranges,
-    'top_zones': top_zones,
-    'sr_days': support_resistance_days,
-    'min_touches': min_touches,
-    'max_sr_levels': max_sr_levels,
-    'use_full_period': use_full_period
-}
+    top_zones = st.slider(
+        "상위 밀집 구간 수",
+        min_value=3,
+        max_value=10,
+        value=5,
+        help="표시할 상위 거래량 밀집 구간의 수입니다"
+    )
 
-# 종목이나 분석 파라미터가 변경되었는지 확인하고 상태 초기화
-if current_params != st.session_state.last_analysis_params:
-    st.session_state.analysis_done = False
-    st.session_state.analyzer = None
-    st.session_state.analysis_data = None
-    st.session_state.last_analysis_params = current_params
-    st.session_state.last_stock_code = stock_code
+    use_kde = st.checkbox(
+        "🌊 연속 밀도(KDE) 모드",
+        value=False,
+        help="구간 경계 없이 거래량 가중 커널 밀도 곡선으로 밀집 구간과 지지/저항선을 추가로 분석합니다"
+    )
 
-# 분석 실행 버튼
-if stock_code is not None:
-    # 분석 상태 표시
-    if st.session_state.analysis_done and st.session_state.analysis_data:
-        # 현재 설정과 이전 분석 설정 비교
-        last_params = st.session_state.last_analysis_params
-        if (last_params and 
-            (current_params['start_date'] != last_params.get('start_date') or
-             current_params['end_date'] != last_params.get('end_date') or
-             current_params['num_ranges'] != last_params.get('num_ranges') or
-             current_params['top_zones'] != last_params.get('top_zones'))):
-            st.sidebar.warning("⚠️ 설정이 변경되었습니다. 재분석이 필요합니다.")
+    # 지지선/저항선 설정
+    st.subheader("📊 지지선/저항선 설정")
+
+    # 분석 기간 연동 옵션
+    use_full_period = st.checkbox(
+        "📅 전체 분석 기간 사용",
+        value=True,
+        help="체크 시 주 분석 기간과 동일하게 지지선/저항선을 분석합니다"
+    )
+
+    if use_full_period:
+        # 전체 기간 사용 시 계산된 일수 표시
+        if selected_period != "사용자 정의":
+            support_resistance_days = PERIOD_OPTIONS[selected_period]
         else:
-            st.sidebar.success(f"✅ 분석 완료: {stock_name} ({stock_code})")
+            # 사용자 정의 기간의 일수 계산
+            start_dt = datetime.strptime(start_date_str, '%Y-%m-%d')
+            end_dt = datetime.strptime(end_date_str, '%Y-%m-%d')
+            support_resistance_days = (end_dt - start_dt).days
+        st.info(f"🔗 지지선/저항선 분석 기간: {support_resistance_days}일 (주 분석 기간과 동일)")
     else:
-        st.sidebar.info(f"📋 선택됨: {stock_name} ({stock_code})")
-    
-    # 자동 분석 체크박스
-    auto_analyze = st.sidebar.checkbox(
-        "🔄 설정 변경 시 자동 재분석",
-        value=True,
-        help="종목이나 분석 설정이 변경되면 자동으로 재분석을 시작합니다"
+        # 별도 설정 사용
+        support_resistance_days = st.slider(
+            "분석 기간 (일)",
+            min_value=30,
+            max_value=365,
+            value=60,
+            help="지지선/저항선 분석에 사용할 최근 데이터 일수"
+        )
+
+    min_touches = st.slider(
+        "최소 터치 횟수",
+        min_value=2,
+        max_value=5,
+        value=3,
+        help="지지선/저항선으로 인정할 최소 터치 횟수"
     )
-    
-    # 설정 변경 감지 여부 표시
-    params_changed = current_params != st.session_state.last_analysis_params
-    if params_changed and auto_analyze:
-        st.sidebar.info("🔄 설정 변경 감지됨 - 자동 재분석 중...")
-    
-    analyze_button = st.sidebar.button(
-        "🔍 분석 시작" if not st.session_state.analysis_done else "🔄 재분석",
-        type="primary",
-        use_container_width=True,
-        help="선택된 종목의 거래량 밀집도 분석을 시작합니다"
+
+    max_sr_levels = st.slider(
+        "최대 표시 개수",
+        min_value=2,
+        max_value=6,
+        value=3,
+        help="지지선과 저항선 각각 최대 표시할 개수"
     )
-    
-    # 자동 분석 또는 버튼 클릭 시 분석 실행
-    should_analyze = analyze_button or (auto_analyze and stock_code is not None and params_changed)
-else:
-    st.sidebar.warning("⚠️ 종목을 먼저 선택해주세요")
-    should_analyze = False
 
-# 메인 컨텐츠 영역
-if should_analyze and stock_code is not None:
-    with st.spinner('📊 데이터를 수집하고 분석하는 중...'):
-        try:
-            # 분석기 초기화
-            analyzer = StockDensityAnalyzer()
-            
-            # 데이터 가져오기
-            data = analyzer.fetch_data(stock_code, start_date_str, end_date_str)
-            
-            if data is None:
-                st.error("❌ 데이터를 가져올 수 없습니다. 종목 코드와 날짜를 확인해주세요.")
-            else:
-                # 분석 실행
-                price_ranges = analyzer.calculate_price_ranges(num_ranges=num_ranges)
-                high_density_zones = analyzer.find_high_density_zones(price_ranges, top_n=top_zones)
-                support_resistance = analyzer.calculate_support_resistance(
-                    analysis_days=support_resistance_days,
-                    min_touches=min_touches,
-                    max_levels=max_sr_levels
-                )
-                
-                # 세션 상태에 저장
-                st.session_state.analyzer = analyzer
-                st.session_state.analysis_data = {
-                    'data': data,
-                    'price_ranges': price_ranges,
-                    'high_density_zones': high_density_zones,
-                    'support_resistance': support_resistance,
-                    'stock_name': stock_name,
-                    'stock_code': stock_code,
-                    'period': f"{start_date_str} ~ {end_date_str}"
-                }
-                st.session_state.analysis_done = True
-                
-                st.success("✅ 분석이 완료되었습니다!")
-                
-        except Exception as e:
-            st.error(f"❌ 분석 중 오류가 발생했습니다: {str(e)}")
-
-# 분석 결과 표시
-if st.session_state.analysis_done and st.session_state.analysis_data:
-    data = st.session_state.analysis_data
-    analyzer = st.session_state.analyzer
-    
-    # 기본 정보 표시
-    st.markdown("## 📊 기본 정보")
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    current_price = data['data']['Close'].iloc[-1]
-    max_price = data['data']['High'].max()
-    min_price = data['data']['Low'].min()
-    avg_volume = data['data']['Volume'].mean()
-    
-    with col1:
-        st.metric(
-            label="현재가",
-            value=f"{current_price:,}원",
-            delta=f"{((current_price - data['data']['Close'].iloc[-2]) / data['data']['Close'].iloc[-2] * 100):+.2f}%" if len(data['data']) > 1 else None
-        )
-    
-    with col2:
-        st.metric(
-            label="기간 최고가",
-            value=f"{max_price:,}원"
-        )
-    
-    with col3:
-        st.metric(
-            label="기간 최저가", 
-            value=f"{min_price:,}원"
-        )
-    
-    with col4:
-        st.metric(
-            label="평균 거래량",
-            value=f"{avg_volume:,.0f}주"
-        )
-    
-    # 거래량 밀집 구간 분석
-    st.markdown("## 🎯 거래량 밀집 구간 분석")
-    
-    col1, col2 = st.columns([1, 1])
-    
-    with col1:
-        st.markdown("### 📈 상위 밀집 구간")
-        
-        # 상위 밀집 구간 테이블
-        display_data = []
-        for i, (_, zone) in enumerate(data['high_density_zones'].head().iterrows(), 1):
-            display_data.append({
-                "순위": f"{i}위",
-                "가격 구간": f"{zone['range_start']:,.0f} ~ {zone['range_end']:,.0f}원",
-                "총 거래량": f"{zone['total_volume']:,.0f}주",
-                "해당 일수": f"{zone['days_count']:.0f}일",
-                "평균 거래량": f"{zone['avg_volume']:,.0f}주"
-            })
-        
-        df_display = pd.DataFrame(display_data)
-        st.dataframe(
-            df_display,
-            use_container_width=True,
-            hide_index=True
-        )
-    
-    with col2:
-        st.markdown("### 🔻🔺 지지선/저항선")
-        
-        support_data = data['support_resistance']
-        
-        # 분석 기간 정보 표시
-        if 'analysis_period' in support_data:
-            st.info(f"📊 {support_data['analysis_period']} 데이터 기반 분석")
-        
-        if support_data['support_levels']:
-            st.markdown("**🔻 주요 지지선:**")
-            for level in support_data['support_levels']:
-                st.write(f"• {level['price']:,}원 (터치 {level['touches']}회)")
-        else:
-            st.write("• 발견된 지지선이 없습니다")
-        
-        if support_data['resistance_levels']:
-            st.markdown("**🔺 주요 저항선:**")
-            for level in support_data['resistance_levels']:
-                st.write(f"• {level['price']:,}원 (터치 {level['touches']}회)")
-        else:
-            st.write("• 발견된 저항선이 없습니다")
-        
-        # 거래량 집중도 계산
-        total_volume = data['price_ranges']['total_volume'].sum()
-        top_3_volume = data['high_density_zones'].head(3)['total_volume'].sum()
-        concentration_ratio = (top_3_volume / total_volume) * 100
-        
-        st.markdown("**📊 거래량 집중도:**")
-        st.write(f"상위 3개 구간: {concentration_ratio:.1f}%")
-        
-        if concentration_ratio > 30:
-            concentration_level = "높음 🔥"
-            color = "success"
-        elif concentration_ratio > 20:
-            concentration_level = "보통 📊"
-            color = "warning"
+    # 현재 분석 설정 요약 표시
+    if stock_code is not None:
+        st.markdown("### 📋 현재 분석 설정")
+        st.write(f"**종목**: {stock_name} ({stock_code})")
+        st.write(f"**기간**: {start_date_str} ~ {end_date_str}")
+        st.write(f"**구간 수**: {num_ranges}개")
+        st.write(f"**상위 표시**: {top_zones}개")
+
+        if use_full_period:
+            st.write(f"**지지/저항 분석**: 전체 기간 ({support_resistance_days}일)")
         else:
-            concentration_level = "낮음 📉"
-            color = "info"
-        
-        st.markdown(f"집중도: :{color}[{concentration_level}]")
-    
-    # 차트 생성
-    st.markdown("## 📈 시각화 분석")
-    
-    # 인터랙티브 차트 생성
+            st.write(f"**지지/저항 분석**: {support_resistance_days}일")
+
+        st.write(f"**최소 터치**: {min_touches}회")
+        st.write(f"**지지/저항 표시**: 각 {max_sr_levels}개")
+        st.markdown("---")
+
+    params = {
+        'stock_code': stock_code,
+        'start_date': start_date_str,
+        'end_date': end_date_str,
+        'num_ranges': num_ranges,
+        'top_zones': top_zones,
+        'sr_days': support_resistance_days,
+        'min_touches': min_touches,
+        'max_sr_levels': max_sr_levels,
+        'use_full_period': use_full_period,
+        'use_kde': use_kde
+    }
+    st.session_state.sidebar_stock_name = stock_name
+    st.session_state.sidebar_params = params
+
+    # 프래그먼트 단독 재실행에서 파라미터가 바뀌었으면 전체 앱 재실행
+    if not st.session_state.get('sidebar_full_run') and params != st.session_state.get('last_analysis_params'):
+        st.rerun()
+
+
+def build_overview_figure(data: dict):
+    """주가/거래량/구간별 거래량/밀도 2x2 차트"""
+    support_data = data['support_resistance']
+
     fig = make_subplots(
         rows=2, cols=2,
         subplot_titles=(
@@ -662,7 +428,7 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
         specs=[[{"secondary_y": False}, {"secondary_y": False}],
                [{"secondary_y": False}, {"secondary_y": False}]]
     )
-    
+
     # 1. 주가 차트
     fig.add_trace(
         go.Scatter(
@@ -675,7 +441,7 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
         ),
         row=1, col=1
     )
-    
+
     # 지지선/저항선 추가
     for level in support_data['support_levels']:
         fig.add_hline(
@@ -685,16 +451,16 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
             annotation_text=f"지지선 {level['price']:,}원",
             row=1, col=1
         )
-    
+
     for level in support_data['resistance_levels']:
         fig.add_hline(
             y=level['price'],
-            line_dash="dash", 
+            line_dash="dash",
             line_color="red",
             annotation_text=f"저항선 {level['price']:,}원",
             row=1, col=1
         )
-    
+
     # 2. 거래량 차트
     fig.add_trace(
         go.Bar(
@@ -706,7 +472,7 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
         ),
         row=1, col=2
     )
-    
+
     # 3. 가격 구간별 거래량
     fig.add_trace(
         go.Bar(
@@ -718,7 +484,7 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
         ),
         row=2, col=1
     )
-    
+
     # 4. 거래량 밀도 스캐터
     fig.add_trace(
         go.Scatter(
@@ -737,7 +503,7 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
         ),
         row=2, col=2
     )
-    
+
     # 레이아웃 설정
     fig.update_layout(
         height=800,
@@ -745,43 +511,341 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
         title_text=f"{data['stock_name']}({data['stock_code']}) 거래량 밀집도 분석 - {data['period']}",
         title_x=0.5
     )
-    
+
     # 각 서브플롯의 축 설정
     fig.update_xaxes(title_text="날짜", row=1, col=1)
     fig.update_yaxes(title_text="가격 (원)", row=1, col=1)
-    
+
     fig.update_xaxes(title_text="날짜", row=1, col=2)
     fig.update_yaxes(title_text="거래량", row=1, col=2)
-    
+
     fig.update_xaxes(title_text="가격 (원)", row=2, col=1)
     fig.update_yaxes(title_text="총 거래량", row=2, col=1)
-    
+
     fig.update_xaxes(title_text="가격 (원)", row=2, col=2)
     fig.update_yaxes(title_text="총 거래량", row=2, col=2)
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # 분석 보고서
-    st.markdown("## 📋 분석 보고서")
-    
-    report = analyzer.generate_report(data['price_ranges'], data['high_density_zones'])
-    
-    # 보고서를 섹션별로 나누어 표시
-    report_sections = report.split('【')
-    
-    for section in report_sections[1:]:  # 첫 번째는 헤더이므로 제외
+    return fig
+
+
+def build_kde_figure(data: dict):
+    """연속 밀도(KDE) 곡선과 밀집 구간/지지·저항선 차트"""
+    kde_result = data['kde_result']
+    kde = kde_result['kde']
+    current_price = data['data']['Close'].iloc[-1]
+
+    kde_fig = go.Figure()
+    kde_fig.add_trace(
+        go.Scatter(
+            x=kde['price'],
+            y=kde['volume_density'],
+            mode='lines',
+            fill='tozeroy',
+            name='거래량 밀도',
+            line=dict(color='#1f77b4', width=2),
+            hovertemplate='가격: %{x:,.0f}원<br>원당 거래량: %{y:,.0f}주<extra></extra>'
+        )
+    )
+    for _, zone in kde_result['zones'].iterrows():
+        kde_fig.add_vrect(x0=zone['zone_start'], x1=zone['zone_end'],
+                          fillcolor="orange", opacity=0.15, line_width=0)
+    for level in kde_result['support_resistance']['support_levels']:
+        kde_fig.add_vline(x=level['price'], line_dash="dash", line_color="green")
+    for level in kde_result['support_resistance']['resistance_levels']:
+        kde_fig.add_vline(x=level['price'], line_dash="dash", line_color="red")
+    kde_fig.add_vline(x=current_price, line_color="gray",
+                      annotation_text=f"현재가 {current_price:,.0f}원")
+    kde_fig.update_layout(height=400, showlegend=False,
+                          xaxis_title="가격 (원)", yaxis_title="원당 거래량")
+    return kde_fig
+
+
+def build_anchor_figure(data: dict, anchor_dates):
+    """앵커 선택용 종가 차트 (선택된 앵커는 점선 표시)"""
+    anchor_fig = go.Figure(
+        go.Scatter(
+            x=data['data'].index,
+            y=data['data']['Close'],
+            mode='lines+markers',
+            marker=dict(size=4),
+            line=dict(color='#1f77b4', width=1.5),
+            hovertemplate='날짜: %{x}<br>종가: %{y:,}원<extra></extra>'
+        )
+    )
+    for anchor_date in anchor_dates:
+        anchor_fig.add_vline(x=anchor_date, line_dash="dot", line_color="purple")
+    anchor_fig.update_layout(height=300, margin=dict(t=20, b=20), xaxis_title="날짜", yaxis_title="가격 (원)")
+    return anchor_fig
+
+
+def build_anchored_profile_figure(anchored: dict, current_price: float):
+    """앵커별 거래량 프로파일 비교 차트"""
+    profile_fig = go.Figure()
+    for anchor_date, profile in anchored['profiles'].groupby('anchor'):
+        profile_fig.add_trace(
+            go.Scatter(
+                x=profile['total_volume'],
+                y=profile['range_center'],
+                mode='lines+markers',
+                name=f"{anchor_date:%Y-%m-%d}~",
+                hovertemplate='가격: %{y:,.0f}원<br>거래량: %{x:,}주<extra></extra>'
+            )
+        )
+    profile_fig.add_hline(y=current_price, line_color="gray", annotation_text=f"현재가 {current_price:,.0f}원")
+    profile_fig.update_layout(height=450, xaxis_title="총 거래량", yaxis_title="가격 (원)")
+    return profile_fig
+
+
+@st.fragment(run_every=0.5)
+def render_analysis_progress():
+    """
+    백그라운드 분석 진행 상황 (프래그먼트, 0.5초마다 이 섹션만 갱신)
+
+    작업이 끝나면 전체 앱을 재실행해 결과를 반영합니다.
+    """
+    job = st.session_state.analysis_job
+    if job is None or job.done():
+        st.rerun()
+
+    progress = job.progress()
+    st.markdown("## ⏳ 분석 진행 중")
+    st.progress(progress['fraction'],
+                text=f"{progress['stage']} ({progress['stages_done']}/{len(progress['stages'])} 단계 완료)")
+    if progress['chunks_total']:
+        st.caption(f"📥 {progress['rows']:,}일 데이터 수집 "
+                   f"(요청 {progress['chunks_done']}/{progress['chunks_total']})")
+
+    if st.button("⏹ 분석 취소"):
+        job.cancel()
+        st.session_state.analysis_job = None
+        st.rerun()
+
+
+def split_report(report: str):
+    """보고서를 【제목】 단위 (제목, 내용) 목록으로 분리"""
+    sections = []
+    for section in report.split('【')[1:]:  # 첫 번째는 헤더이므로 제외
         if section.strip():
             title = section.split('】')[0]
             content = section.split('】')[1] if '】' in section else section
-            
-            with st.expander(f"📊 {title}", expanded=True):
-                st.text(content.strip())
-    
+            sections.append((title, content.strip()))
+    return sections
+
+
+@st.fragment
+def render_metrics(data: dict):
+    """기본 정보와 밀집 구간/지지·저항선 표 (프래그먼트)"""
+    st.markdown("## 📊 기본 정보")
+
+    age = stale_age(data['data'])
+    if age is not None:
+        st.warning(f"⚠️ 데이터 소스 응답을 기다리지 않고 {format_age(age)} 전에 저장한 데이터를 표시합니다 "
+                   f"(백그라운드에서 갱신 중, 다시 분석하면 반영)")
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    current_price = data['data']['Close'].iloc[-1]
+    max_price = data['data']['High'].max()
+    min_price = data['data']['Low'].min()
+    avg_volume = data['data']['Volume'].mean()
+
+    with col1:
+        st.metric(
+            label="현재가",
+            value=f"{current_price:,}원",
+            delta=f"{((current_price - data['data']['Close'].iloc[-2]) / data['data']['Close'].iloc[-2] * 100):+.2f}%" if len(data['data']) > 1 else None
+        )
+
+    with col2:
+        st.metric(
+            label="기간 최고가",
+            value=f"{max_price:,}원"
+        )
+
+    with col3:
+        st.metric(
+            label="기간 최저가",
+            value=f"{min_price:,}원"
+        )
+
+    with col4:
+        st.metric(
+            label="평균 거래량",
+            value=f"{avg_volume:,.0f}주"
+        )
+
+    # 거래량 밀집 구간 분석
+    st.markdown("## 🎯 거래량 밀집 구간 분석")
+
+    col1, col2 = st.columns([1, 1])
+
+    with col1:
+        st.markdown("### 📈 상위 밀집 구간")
+
+        # 상위 밀집 구간 테이블
+        display_data = []
+        for i, (_, zone) in enumerate(data['high_density_zones'].head().iterrows(), 1):
+            display_data.append({
+                "순위": f"{i}위",
+                "가격 구간": f"{zone['range_start']:,.0f} ~ {zone['range_end']:,.0f}원",
+                "총 거래량": f"{zone['total_volume']:,.0f}주",
+                "해당 일수": f"{zone['days_count']:.0f}일",
+                "평균 거래량": f"{zone['avg_volume']:,.0f}주"
+            })
+
+        df_display = pd.DataFrame(display_data)
+        st.dataframe(
+            df_display,
+            use_container_width=True,
+            hide_index=True
+        )
+
+    with col2:
+        st.markdown("### 🔻🔺 지지선/저항선")
+
+        support_data = data['support_resistance']
+
+        # 분석 기간 정보 표시
+        if 'analysis_period' in support_data:
+            st.info(f"📊 {support_data['analysis_period']} 데이터 기반 분석")
+
+        if support_data['support_levels']:
+            st.markdown("**🔻 주요 지지선:**")
+            for level in support_data['support_levels']:
+                st.write(f"• {level['price']:,}원 (터치 {level['touches']}회)")
+        else:
+            st.write("• 발견된 지지선이 없습니다")
+
+        if support_data['resistance_levels']:
+            st.markdown("**🔺 주요 저항선:**")
+            for level in support_data['resistance_levels']:
+                st.write(f"• {level['price']:,}원 (터치 {level['touches']}회)")
+        else:
+            st.write("• 발견된 저항선이 없습니다")
+
+        # 거래량 집중도 계산
+        total_volume = data['price_ranges']['total_volume'].sum()
+        top_3_volume = data['high_density_zones'].head(3)['total_volume'].sum()
+        concentration_ratio = (top_3_volume / total_volume) * 100
+
+        st.markdown("**📊 거래량 집중도:**")
+        st.write(f"상위 3개 구간: {concentration_ratio:.1f}%")
+
+        if concentration_ratio > 30:
+            concentration_level = "높음 🔥"
+            color = "success"
+        elif concentration_ratio > 20:
+            concentration_level = "보통 📊"
+            color = "warning"
+        else:
+            concentration_level = "낮음 📉"
+            color = "info"
+
+        st.markdown(f"집중도: :{color}[{concentration_level}]")
+
+
+@st.fragment
+def render_charts(data: dict):
+    """시각화 차트와 연속 밀도(KDE) 결과 (프래그먼트, 차트 객체는 캐시)"""
+    st.markdown("## 📈 시각화 분석")
+    st.plotly_chart(cached_result(data, 'overview_figure', lambda: build_overview_figure(data)),
+                    use_container_width=True)
+
+    # 연속 밀도(KDE) 분석 결과
+    if data.get('kde_result'):
+        kde_result = data['kde_result']
+        kde = kde_result['kde']
+
+        st.markdown("## 🌊 연속 밀도(KDE) 분석")
+        st.caption(f"대역폭 {kde.attrs['bandwidth']:,.0f}원 · 격자 {len(kde)}점 · 구간 수와 무관한 매끄러운 거래량 분포")
+        st.plotly_chart(cached_result(data, 'kde_figure', lambda: build_kde_figure(data)),
+                        use_container_width=True)
+
+        kde_zone_display = [{
+            "순위": f"{i}위",
+            "밀집 구간": f"{zone['zone_start']:,.0f} ~ {zone['zone_end']:,.0f}원",
+            "최대 밀도 가격": f"{zone['peak_price']:,.0f}원",
+            "거래량 비중": f"{zone['strength'] * 100:.1f}%"
+        } for i, (_, zone) in enumerate(kde_result['zones'].iterrows(), 1)]
+        st.dataframe(pd.DataFrame(kde_zone_display), use_container_width=True, hide_index=True)
+
+
+@st.fragment
+def render_anchored_profiles(data: dict, analyzer: StockDensityAnalyzer, num_ranges: int):
+    """앵커 거래량 프로파일 (프래그먼트, 앵커 클릭/선택은 이 섹션만 다시 그림)"""
+    st.markdown("## ⚓ 앵커 거래량 프로파일")
+    st.caption("가격 차트에서 날짜를 클릭하거나 후보를 선택하면 그 날부터 현재까지의 거래량 프로파일을 비교합니다")
+
+    current_price = data['data']['Close'].iloc[-1]
+
+    # 종목/기간이 바뀌면 앵커 초기화
+    anchor_key = (data['stock_code'], data['period'])
+    if st.session_state.get('anchor_key') != anchor_key:
+        st.session_state.anchor_key = anchor_key
+        st.session_state.anchor_dates = []
+
+    clicked_anchors = tuple(st.session_state.anchor_dates)
+    anchor_fig = cached_result(data, ('anchor_figure', clicked_anchors),
+                               lambda: build_anchor_figure(data, clicked_anchors))
+
+    clicked = plotly_events(anchor_fig, click_event=True, key=f"anchor_events_{data['stock_code']}")
+    if clicked:
+        clicked_date = pd.Timestamp(clicked[0]['x']).normalize()
+        if clicked_date not in st.session_state.anchor_dates:
+            st.session_state.anchor_dates.append(clicked_date)
+            st.rerun(scope="fragment")
+
+    suggested = cached_result(data, 'suggested_anchors', analyzer.suggest_anchors)
+    suggested_options = {f"{row['date']:%Y-%m-%d} ({row['reason']})": row['date'] for _, row in suggested.iterrows()}
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        selected_suggestions = st.multiselect("앵커 후보", options=list(suggested_options), default=[])
+    with col2:
+        if st.button("앵커 초기화", use_container_width=True):
+            st.session_state.anchor_dates = []
+            st.rerun(scope="fragment")
+
+    anchor_dates = tuple(sorted(set(st.session_state.anchor_dates) |
+                                {suggested_options[option] for option in selected_suggestions}))
+
+    if anchor_dates:
+        anchored = cached_result(data, ('anchored_profiles', anchor_dates, num_ranges),
+                                 lambda: analyzer.calculate_anchored_profiles(list(anchor_dates), num_ranges=num_ranges))
+
+        profile_fig = cached_result(data, ('anchored_figure', anchor_dates, num_ranges),
+                                    lambda: build_anchored_profile_figure(anchored, current_price))
+        st.plotly_chart(profile_fig, use_container_width=True)
+
+        anchor_display = [{
+            "앵커": f"{row['anchor']:%Y-%m-%d}",
+            "일수": f"{row['days']:.0f}일",
+            "총 거래량": f"{row['total_volume']:,.0f}주",
+            "앵커 VWAP": f"{row['vwap']:,.0f}원",
+            "최대 거래량 가격": f"{row['poc_price']:,.0f}원"
+        } for _, row in anchored['summary'].iterrows()]
+        st.dataframe(pd.DataFrame(anchor_display), use_container_width=True, hide_index=True)
+    else:
+        st.info("📌 차트의 날짜를 클릭하거나 앵커 후보를 선택해주세요")
+
+
+@st.fragment
+def render_report(data: dict, analyzer: StockDensityAnalyzer):
+    """분석 보고서, 활용 팁과 다운로드 (프래그먼트, 보고서 텍스트는 캐시)"""
+    st.markdown("## 📋 분석 보고서")
+
+    report = cached_result(data, 'report',
+                           lambda: analyzer.generate_report(data['price_ranges'], data['high_density_zones']))
+
+    # 보고서를 섹션별로 나누어 표시
+    for title, content in cached_result(data, 'report_sections', lambda: split_report(report)):
+        with st.expander(f"📊 {title}", expanded=True):
+            st.text(content)
+
     # 투자 팁
     st.markdown("## 💡 투자 활용 팁")
-    
+
     col1, col2 = st.columns(2)
-    
+
     with col1:
         st.markdown("""
         <div class="analysis-result">
@@ -793,7 +857,7 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
         </ul>
         </div>
         """, unsafe_allow_html=True)
-    
+
     with col2:
         st.markdown("""
         <div class="analysis-result">
@@ -805,7 +869,7 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
         </ul>
         </div>
         """, unsafe_allow_html=True)
-    
+
     # 주의사항
     st.markdown("""
     <div class="warning-box">
@@ -817,12 +881,12 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
     </ul>
     </div>
     """, unsafe_allow_html=True)
-    
+
     # 보고서 다운로드
     st.markdown("## 💾 보고서 다운로드")
-    
+
     col1, col2 = st.columns(2)
-    
+
     with col1:
         # 텍스트 보고서 다운로드
         full_report = f"""
@@ -832,17 +896,18 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
 
 {report}
         """
-        
+
         st.download_button(
             label="📄 텍스트 보고서 다운로드",
             data=full_report,
             file_name=f"{data['stock_code']}_{data['stock_name']}_analysis_{datetime.now().strftime('%Y%m%d')}.txt",
             mime="text/plain"
         )
-    
+
     with col2:
         # CSV 데이터 다운로드
-        csv_data = data['price_ranges'].to_csv(index=False, encoding='utf-8-sig')
+        csv_data = cached_result(data, 'price_ranges_csv',
+                                 lambda: data['price_ranges'].to_csv(index=False, encoding='utf-8-sig'))
         st.download_button(
             label="📊 분석 데이터 (CSV)",
             data=csv_data,
@@ -850,6 +915,160 @@ if st.session_state.analysis_done and st.session_state.analysis_data:
             mime="text/csv"
         )
 
+
+# 재실행 프로파일링 (STOCK_DENSITY_PROFILE 설정, 'request'이면 주소에 ?profile=1을 붙인 세션만. 분석 작업도 함께)
+# st.rerun 등으로 끝까지 실행되지 않은 이전 재실행의 프로파일은 여기서 저장
+profile_requested = st.query_params.get('profile', '') not in ('', '0')
+if st.session_state.get('rerun_profiler') is not None:
+    st.session_state.rerun_profiler.stop()
+st.session_state.rerun_profiler = profiling.start('streamlit_rerun', requested=profile_requested)
+
+st.markdown(APP_CSS, unsafe_allow_html=True)
+
+# 메인 헤더
+st.markdown('<h1 class="main-header">📈 주식 거래량 밀집도 분석기</h1>', unsafe_allow_html=True)
+st.markdown('<p class="subtitle">FinanceDataReader를 이용한 스마트 거래량 분석</p>', unsafe_allow_html=True)
+
+# 세션 상태 초기화
+if 'analysis_done' not in st.session_state:
+    st.session_state.analysis_done = False
+# 분석기/분석 결과/데이터 키는 메모리 관리 대상인 세션 슬롯에 보관 (오래 쉬면 비웠다가 돌아오면 다시 분석)
+if 'memory_slot' not in st.session_state:
+    st.session_state.memory_slot = memory_governor.new_slot()
+if 'last_stock_code' not in st.session_state:
+    st.session_state.last_stock_code = None
+if 'last_analysis_params' not in st.session_state:
+    st.session_state.last_analysis_params = None
+if 'analysis_job' not in st.session_state:
+    st.session_state.analysis_job = None
+slot = st.session_state.memory_slot
+
+# 사이드바 설정 (전체 재실행 중임을 표시해 프래그먼트가 앱 재실행을 다시 요청하지 않게 함)
+st.sidebar.header("📊 분석 설정")
+st.session_state.sidebar_full_run = True
+with st.sidebar:
+    render_sidebar_settings()
+st.session_state.sidebar_full_run = False
+
+# 현재 분석 파라미터
+current_params = st.session_state.sidebar_params
+stock_code = current_params['stock_code']
+stock_name = st.session_state.sidebar_stock_name
+start_date_str = current_params['start_date']
+end_date_str = current_params['end_date']
+num_ranges = current_params['num_ranges']
+top_zones = current_params['top_zones']
+support_resistance_days = current_params['sr_days']
+min_touches = current_params['min_touches']
+max_sr_levels = current_params['max_sr_levels']
+use_kde = current_params['use_kde']
+
+# 설정 변경 여부 (상태 초기화 전에 기록)
+params_changed = current_params != st.session_state.last_analysis_params
+
+# 종목이나 분석 파라미터가 변경되었는지 확인하고 상태 초기화
+# (분석기는 남겨 두고, 종목/기간이 같으면 불러온 데이터를 재사용)
+if params_changed:
+    st.session_state.analysis_done = False
+    slot.clear()
+    st.session_state.last_analysis_params = current_params
+    st.session_state.last_stock_code = stock_code
+
+# 분석 실행 버튼
+if stock_code is not None:
+    # 분석 상태 표시
+    if st.session_state.analysis_done and slot.analysis_data:
+        st.sidebar.success(f"✅ 분석 완료: {stock_name} ({stock_code})")
+    elif st.session_state.analysis_job is not None and st.session_state.analysis_job.params == current_params:
+        st.sidebar.info(f"⏳ 분석 중: {stock_name} ({stock_code})")
+    else:
+        st.sidebar.info(f"📋 선택됨: {stock_name} ({stock_code})")
+
+    # 자동 분석 체크박스
+    auto_analyze = st.sidebar.checkbox(
+        "🔄 설정 변경 시 자동 재분석",
+        value=True,
+        help="종목이나 분석 설정이 변경되면 자동으로 재분석을 시작합니다"
+    )
+
+    # 설정 변경 감지 여부 표시
+    if params_changed and auto_analyze:
+        st.sidebar.info("🔄 설정 변경 감지됨 - 자동 재분석 중...")
+
+    analyze_button = st.sidebar.button(
+        "🔍 분석 시작" if not st.session_state.analysis_done else "🔄 재분석",
+        type="primary",
+        use_container_width=True,
+        help="선택된 종목의 거래량 밀집도 분석을 시작합니다"
+    )
+
+    # 자동 분석 또는 버튼 클릭 시 분석 실행
+    should_analyze = analyze_button or (auto_analyze and stock_code is not None and params_changed)
+else:
+    st.sidebar.warning("⚠️ 종목을 먼저 선택해주세요")
+    should_analyze = False
+
+# 파라미터가 바뀌면 진행 중인 이전 분석은 취소하고 결과도 버림
+job = st.session_state.analysis_job
+if job is not None and job.params != current_params:
+    job.cancel()
+    st.session_state.analysis_job = None
+
+# 메인 컨텐츠 영역 (수집과 분석은 작업 스레드에서 실행)
+if should_analyze and stock_code is not None:
+    if st.session_state.analysis_job is not None:
+        st.session_state.analysis_job.cancel()
+
+    # 종목/기간이 같으면 불러온 데이터와 프로파일 재사용 (구간 수 변경은 재구간화만 수행)
+    # 저장된 데이터를 대신 쓴 분석기는 재사용하지 않아 그동안 갱신된 캐시를 반영
+    data_key = (stock_code, start_date_str, end_date_str)
+    analyzer = slot.analyzer if slot.data_key == data_key else None
+    if analyzer is not None and stale_age(analyzer.data) is not None:
+        analyzer = None
+    st.session_state.analysis_job = AnalysisJob(current_params, stock_name, analyzer=analyzer,
+                                                profile=profile_requested).start()
+
+# 메모리 예산 때문에 비워진 결과는 같은 파라미터로 다시 분석 (데이터와 결과는 캐시에서 바로 읽음)
+if (slot.evicted and slot.params == current_params and st.session_state.analysis_job is None
+        and stock_code is not None):
+    st.info("💤 오래 사용하지 않아 비워 둔 분석 결과를 다시 불러오는 중입니다...")
+    st.session_state.analysis_job = AnalysisJob(slot.params, slot.stock_name, profile=profile_requested).start()
+
+# 끝난 작업 결과 반영
+job = st.session_state.analysis_job
+if job is not None and job.done():
+    st.session_state.analysis_job = None
+    try:
+        result = job.result()
+        if result['analysis_data'] is None:
+            st.error("❌ 데이터를 가져올 수 없습니다. 종목 코드와 날짜를 확인해주세요.")
+        else:
+            # 세션 슬롯에 저장 (다시 불러온 결과이면 완료 메시지 생략)
+            rebuilt = slot.evicted
+            memory_governor.store(slot, result['analyzer'], result['data_key'], result['analysis_data'],
+                                  job.params, job.stock_name)
+            st.session_state.analysis_done = True
+
+            if not rebuilt:
+                st.success("✅ 분석이 완료되었습니다!")
+    except (AnalysisCancelled, CancelledError):
+        pass
+    except Exception as e:
+        st.error(f"❌ 분석 중 오류가 발생했습니다: {str(e)}")
+
+# 분석 결과 표시 (섹션별 프래그먼트)
+if st.session_state.analysis_done and slot.analysis_data:
+    data = slot.analysis_data
+    analyzer = slot.analyzer
+
+    render_metrics(data)
+    render_charts(data)
+    render_anchored_profiles(data, analyzer, num_ranges)
+    render_report(data, analyzer)
+
+elif st.session_state.analysis_job is not None:
+    render_analysis_progress()
+
 else:
     # 초기 화면
     st.markdown("## 🚀 시작하기")
@@ -911,3 +1130,22 @@ st.markdown(
     "</div>",
     unsafe_allow_html=True
 )
+
+# 세션 사용 시각/크기 갱신 (전체 예산을 넘으면 오래 쉰 다른 세션의 분석 결과를 비움)
+memory_governor.touch(slot)
+with st.sidebar.expander("🧠 서버 메모리", expanded=False):
+    metrics = memory_governor.metrics()
+    st.caption(f"세션 {metrics['sessions']}개 (비워 둔 세션 {metrics['evicted_sessions']}개) · "
+               f"이 세션 {slot.size / 1024 ** 2:.1f}MB")
+    st.caption(f"전체 {metrics['total_bytes'] / 1024 ** 2:.1f}MB / 예산 {metrics['budget_bytes'] / 1024 ** 2:.0f}MB "
+               f"(공용 데이터 {metrics['shared_bytes'] / 1024 ** 2:.1f}MB)")
+    st.caption(f"중복 제거 {metrics['dedup_hits']}회 ({metrics['dedup_saved_bytes'] / 1024 ** 2:.1f}MB 절약) · "
+               f"비우기 {metrics['evictions']}회 · 다시 불러오기 {metrics['rebuilds']}회")
+
+# 재실행 프로파일 저장
+rerun_profiler = st.session_state.rerun_profiler
+if rerun_profiler is not None:
+    st.session_state.rerun_profiler = None
+    profile_paths = rerun_profiler.stop()
+    if profile_paths:
+        st.sidebar.caption(f"🔬 프로파일 저장: {profile_paths[1]} (분석 작업은 같은 디렉터리에 따로 저장)")
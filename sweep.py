@@ -0,0 +1,260 @@
+"""
+분석 설정 파라미터 스윕
+num_ranges, analysis_days, min_touches, max_levels 조합을 한 번에 평가해
+조합별 밀집 구간/지지·저항선과 안정성 지표를 정리된 표로 제공
+"""
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import product
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from volume_profile import (MultiResolutionProfile, batch_touch_counts, select_support_resistance,
+                            top_n_indices)
+
+# 기본 스윕 범위 (Streamlit 슬라이더와 대화형 분석기 권장 범위 기준)
+DEFAULT_GRID = {
+    'num_ranges': [10, 15, 20, 30],
+    'analysis_days': [30, 60, 120],
+    'min_touches': [2, 3, 4],
+    'max_levels': [3]
+}
+
+GRID_KEYS = ['num_ranges', 'analysis_days', 'min_touches', 'max_levels']
+
+
+def _sweep_symbol(args) -> pd.DataFrame:
+    """
+    한 종목의 스윕 (프로세스 풀 작업 단위)
+
+    중간 결과를 조합 사이에서 공유합니다.
+    - 가격 구간: MultiResolutionProfile 하나를 만들어 num_ranges마다 재구간화만 수행
+    - 터치 횟수: analysis_days 값들을 NaN으로 채운 행으로 쌓아 batch_touch_counts 한 번에 계산하고,
+      min_touches/max_levels 조합은 그 결과에서 선택만 반복
+    """
+    symbol, data, grid, top_zones = args
+    current_price = float(data['Close'].iloc[-1])
+    profile = MultiResolutionProfile(data['Low'].values, data['High'].values, data['Volume'].values)
+
+    zone_rows = {}
+    for num_ranges in grid['num_ranges']:
+        ranges = profile.rebin(num_ranges)
+        volume = ranges['total_volume'].values.astype(float)
+        top = top_n_indices(volume, top_zones)
+        zone_rows[num_ranges] = pd.DataFrame({
+            'kind': 'zone',
+            'rank': np.arange(1, len(top) + 1),
+            'low': ranges['range_start'].values[top],
+            'high': ranges['range_end'].values[top],
+            'strength': volume[top],
+            'share': volume[top] / volume.sum() if volume.sum() > 0 else 0.0
+        })
+
+    days_list = list(grid['analysis_days'])
+    longest = max(days_list)
+    low = np.full((len(days_list), longest), np.nan)
+    high = np.full((len(days_list), longest), np.nan)
+    for i, days in enumerate(days_list):
+        recent = data.tail(days)
+        low[i, longest - len(recent):] = recent['Low'].values
+        high[i, longest - len(recent):] = recent['High'].values
+    base_price, touches, first_touch = batch_touch_counts(low, high)
+    current = np.full(len(days_list), current_price)
+
+    level_rows = {}
+    for min_touches, max_levels in product(grid['min_touches'], grid['max_levels']):
+        levels = select_support_resistance(base_price, touches, first_touch, current, min_touches, max_levels)
+        for i, days in enumerate(days_list):
+            at_row = levels['row'] == i
+            kind = np.where(levels['is_support'][at_row], 'support', 'resistance')
+            rank = np.zeros(len(kind), dtype=int)
+            for side in ('support', 'resistance'):
+                rank[kind == side] = np.arange(1, (kind == side).sum() + 1)
+            level_rows[(days, min_touches, max_levels)] = pd.DataFrame({
+                'kind': kind,
+                'rank': rank,
+                'low': levels['price'][at_row],
+                'high': levels['price'][at_row],
+                'strength': levels['touches'][at_row].astype(float),
+                'share': np.nan
+            })
+
+    frames = []
+    for num_ranges, (days, min_touches, max_levels) in product(grid['num_ranges'], level_rows):
+        rows = pd.concat([zone_rows[num_ranges], level_rows[(days, min_touches, max_levels)]],
+                         ignore_index=True)
+        rows.insert(0, 'max_levels', max_levels)
+        rows.insert(0, 'min_touches', min_touches)
+        rows.insert(0, 'analysis_days', days)
+        rows.insert(0, 'num_ranges', num_ranges)
+        frames.append(rows)
+
+    result = pd.concat(frames, ignore_index=True)
+    result.insert(0, 'current_price', current_price)
+    result.insert(0, 'symbol', symbol)
+    return result
+
+
+def summarize_stability(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    조합별 요약과 안정성 지표
+
+    - zone_agreement: 같은 종목의 다른 num_ranges 설정들 중 최상위 밀집 구간이
+      이 설정의 최상위 구간 중심가를 포함하는 비율 (1에 가까울수록 구간 수에 둔감)
+    - level_persistence: 이 설정의 지지/저항선 가격이 같은 종목의 다른
+      (analysis_days, min_touches, max_levels) 설정에서도 나타나는 평균 비율
+
+    Args:
+        results: run_sweep의 results 표
+
+    Returns:
+        DataFrame: 종목/조합별 최상위 구간, 집중도, 레벨 수, 최근접 지지/저항선, 안정성 지표
+    """
+    keys = ['symbol'] + GRID_KEYS
+    zones = results[results['kind'] == 'zone']
+    levels = results[results['kind'] != 'zone']
+
+    top = zones[zones['rank'] == 1].set_index(keys)[['low', 'high']]
+    summary = top.rename(columns={'low': 'top_zone_low', 'high': 'top_zone_high'})
+    summary['top_zone_center'] = (summary['top_zone_low'] + summary['top_zone_high']) / 2
+    summary['concentration'] = zones[zones['rank'] <= 3].groupby(keys)['share'].sum() * 100
+    summary = summary.reset_index()
+
+    price = results.groupby('symbol')['current_price'].first()
+    summary['current_price'] = summary['symbol'].map(price)
+
+    counts = levels.groupby(keys + ['kind']).size().unstack('kind')
+    for kind in ('support', 'resistance'):
+        column = counts[kind] if kind in counts else pd.Series(dtype=float)
+        summary[f'{kind}_count'] = summary.set_index(keys).index.map(column).fillna(0).astype(int)
+    nearest_support = levels[levels['kind'] == 'support'].groupby(keys)['low'].max()
+    nearest_resistance = levels[levels['kind'] == 'resistance'].groupby(keys)['low'].min()
+    index = summary.set_index(keys).index
+    summary['nearest_support'] = index.map(nearest_support)
+    summary['nearest_resistance'] = index.map(nearest_resistance)
+
+    # 구간 수에 대한 최상위 구간 일치도
+    agreement = []
+    for symbol, group in summary.groupby('symbol'):
+        per_range = group.drop_duplicates('num_ranges').set_index('num_ranges')
+        lows = per_range['top_zone_low'].values
+        highs = per_range['top_zone_high'].values
+        centers = per_range['top_zone_center']
+        covered = (lows[None, :] <= centers.values[:, None]) & (highs[None, :] >= centers.values[:, None])
+        agreement.append(pd.Series(covered.mean(axis=1), index=pd.MultiIndex.from_product(
+            [[symbol], per_range.index], names=['symbol', 'num_ranges'])))
+    agreement = pd.concat(agreement) if agreement else pd.Series(dtype=float)
+    summary['zone_agreement'] = summary.set_index(['symbol', 'num_ranges']).index.map(agreement)
+
+    # 지지/저항선 설정 간 지속성
+    level_keys = ['symbol', 'analysis_days', 'min_touches', 'max_levels']
+    unique_levels = levels.drop_duplicates(level_keys + ['low'])
+    settings = levels.drop_duplicates(level_keys).groupby('symbol').size()
+    appearances = unique_levels.groupby(['symbol', 'low']).size()
+    persistence = unique_levels.assign(
+        persistence=unique_levels.set_index(['symbol', 'low']).index.map(appearances).values
+        / unique_levels['symbol'].map(settings).values
+    ).groupby(level_keys)['persistence'].mean()
+    summary['level_persistence'] = summary.set_index(level_keys).index.map(persistence)
+
+    return summary
+
+
+def run_sweep(data_by_symbol: Dict[str, pd.DataFrame], grid: Optional[Dict[str, List[int]]] = None,
+              top_zones: int = 5, max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    여러 종목에 대해 분석 설정 조합을 병렬로 평가
+
+    종목 수가 작업자 수보다 적으면 analysis_days 값별로 작업을 나누어 프로세스 풀에 고르게 분산합니다.
+    한 작업 안의 조합들은 가격 프로파일과 터치 배열을 공유합니다.
+
+    Args:
+        data_by_symbol: 종목 코드별 OHLCV 데이터
+        grid: 설정별 후보 값 (num_ranges, analysis_days, min_touches, max_levels), 없는 키는 기본값
+        top_zones: 조합마다 기록할 밀집 구간 수
+        max_workers: 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 순차 실행)
+
+    Returns:
+        Dict: 'results' (조합별 구간/레벨 표), 'stability' (조합별 요약과 안정성 지표)
+    """
+    grid = {key: list(grid.get(key, DEFAULT_GRID[key])) if grid else list(DEFAULT_GRID[key])
+            for key in GRID_KEYS}
+    data_by_symbol = {symbol: data for symbol, data in data_by_symbol.items()
+                      if data is not None and not data.empty}
+
+    tasks = []
+    split_days = max_workers != 1 and len(data_by_symbol) < (max_workers or 2)
+    for symbol, data in data_by_symbol.items():
+        day_chunks = [[days] for days in grid['analysis_days']] if split_days else [grid['analysis_days']]
+        for days in day_chunks:
+            tasks.append((symbol, data, dict(grid, analysis_days=days), top_zones))
+
+    if max_workers == 1 or len(tasks) <= 1:
+        frames = [_sweep_symbol(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            frames = list(executor.map(_sweep_symbol, tasks))
+
+    if not frames:
+        return {'results': pd.DataFrame(), 'stability': pd.DataFrame()}
+
+    results = pd.concat(frames, ignore_index=True).sort_values(
+        ['symbol'] + GRID_KEYS + ['kind', 'rank'], kind='stable', ignore_index=True)
+    return {'results': results, 'stability': summarize_stability(results)}
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="거래량 밀집도 분석 설정 파라미터 스윕")
+    parser.add_argument('symbols', nargs='+', help="종목 코드 (예: 005930 000660)")
+    parser.add_argument('--start', default=(datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'),
+                        help="시작 날짜 (YYYY-MM-DD, 기본 1년 전)")
+    parser.add_argument('--end', default=datetime.now().strftime('%Y-%m-%d'), help="종료 날짜 (YYYY-MM-DD)")
+    parser.add_argument('--num-ranges', type=int, nargs='+', default=DEFAULT_GRID['num_ranges'])
+    parser.add_argument('--analysis-days', type=int, nargs='+', default=DEFAULT_GRID['analysis_days'])
+    parser.add_argument('--min-touches', type=int, nargs='+', default=DEFAULT_GRID['min_touches'])
+    parser.add_argument('--max-levels', type=int, nargs='+', default=DEFAULT_GRID['max_levels'])
+    parser.add_argument('--top-zones', type=int, default=5, help="조합마다 기록할 밀집 구간 수")
+    parser.add_argument('--workers', type=int, default=None, help="프로세스 수 (기본 CPU 수)")
+    parser.add_argument('--table', choices=['stability', 'results'], default='stability',
+                        help="출력할 표 (기본 stability)")
+    parser.add_argument('--output', help="CSV 저장 경로 (없으면 표준 출력)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """명령행 스윕 실행"""
+    from stock_density_analyzer import StockDensityAnalyzer
+
+    args = _parse_args(argv)
+    grid = {
+        'num_ranges': args.num_ranges,
+        'analysis_days': args.analysis_days,
+        'min_touches': args.min_touches,
+        'max_levels': args.max_levels
+    }
+
+    # 진행 메시지는 표준 오류로 보내 CSV 출력과 섞이지 않게 함
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        data_by_symbol = {symbol: StockDensityAnalyzer().fetch_data(symbol, args.start, args.end)
+                          for symbol in args.symbols}
+        result = run_sweep(data_by_symbol, grid, top_zones=args.top_zones, max_workers=args.workers)
+    finally:
+        sys.stdout = stdout
+
+    table = result[args.table]
+    if args.output:
+        table.to_csv(args.output, index=False, encoding='utf-8-sig')
+        print(f"스윕 결과가 {args.output}에 저장되었습니다. ({len(table)}행)", file=sys.stderr)
+    else:
+        table.to_csv(sys.stdout, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+워크포워드 백테스트 신호의 강도(strength)가 신호 종류와 관계없이 창 안의 비중이고,
+지지선/저항선 가격대에 돌파 여유가 한 번만 적용되는지 확인
+"""
+
+import numpy as np
+import pandas as pd
+
+from backtest import _evaluate, walk_forward_backtest
+
+
+def _random_frame(seed: int, days: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 40000 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    spread = close * rng.uniform(0.005, 0.04, days)
+    return pd.DataFrame({
+        'Low': np.round(close - spread),
+        'High': np.round(close + spread),
+        'Close': np.round(close),
+        'Volume': rng.integers(1000, 100000, days)
+    }, index=pd.bdate_range('2022-01-03', periods=days))
+
+
+def test_strength_is_share_of_window():
+    for seed in range(5):
+        data = _random_frame(seed)
+        events = walk_forward_backtest(data, lookback=120, horizon=20, analysis_days=60)
+        assert set(events['signal']) == {'zone', 'level'}
+        assert events['strength'].between(0, 1).all()
+
+        # 밀집 구간: lookback일 거래량 중 구간 거래량 비중
+        zones = events[events['signal'] == 'zone']
+        first = zones['date'] == zones['date'].iloc[0]
+        end = data.index.get_loc(zones['date'].iloc[0])
+        window = data.iloc[end - 119:end + 1]
+        for _, zone in zones[first].iterrows():
+            overlaps = (window['High'] >= zone['band_low']) & (window['Low'] <= zone['band_high'])
+            assert 0 < zone['strength'] <= window.loc[overlaps, 'Volume'].sum() / window['Volume'].sum() + 1e-12
+
+        # 지지선/저항선: analysis_days일 중 터치한 날 비중 (최소 터치 3회 이상)
+        levels = events[events['signal'] == 'level']
+        touches = levels['strength'] * 60
+        assert np.allclose(touches, np.round(touches))
+        assert (np.round(touches) >= 3).all()
+
+
+def test_level_band_is_the_level_price():
+    events = walk_forward_backtest(_random_frame(1), lookback=120, horizon=20, tolerance=0.01)
+    levels = events[events['signal'] == 'level']
+    assert not levels.empty
+    assert (levels['band_low'] == levels['band_high']).all()
+    assert (levels['band_low'] % 1000 == 0).all()
+
+
+def test_tolerance_applied_once_for_levels():
+    level = np.array([40000.0, 40000.0])
+    is_support = np.array([True, True])
+    fwd_low = np.array([39900.0, 39900.0])
+    fwd_high = np.array([41000.0, 41000.0])
+    # 종가 39,700원은 레벨 -0.75%로 여유 1% 안, 39,500원은 -1.25%로 돌파
+    close_min = np.array([39700.0, 39500.0])
+    touched, outcome = _evaluate(level, level, is_support, fwd_low, fwd_high, close_min, fwd_high, 0.01)
+    assert touched.all()
+    assert list(outcome) == ['bounce', 'break']
+    # 레벨 +0.5% 위에서 멈춘 저가는 터치가 아님
+    touched, outcome = _evaluate(level, level, is_support, level * 1.005, fwd_high, level, fwd_high, 0.01)
+    assert not touched.any()
+    assert list(outcome) == ['untouched', 'untouched']
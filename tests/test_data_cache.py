@@ -0,0 +1,134 @@
+"""
+일봉 디스크 캐시(DataCache)가 빠진 거래일만 가져오고, 이어지는 기간을 합쳐 저장하고,
+오래된 데이터를 바로 반환한 뒤 백그라운드에서 갱신하는지 확인
+"""
+
+import threading
+import time
+
+import pandas as pd
+
+import trading_calendar
+from data_cache import CircuitBreaker, DataCache, stale_age
+
+
+def _bars(start: str, end: str) -> pd.DataFrame:
+    days = trading_calendar.trading_days(start, end)
+    return pd.DataFrame({'Close': range(1, len(days) + 1), 'Volume': 1000}, index=days)
+
+
+def _cache(tmp_path, **kwargs) -> DataCache:
+    return DataCache(str(tmp_path), breaker=CircuitBreaker(), **kwargs)
+
+
+def test_missing_ranges_without_entry_is_whole_request(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.missing_ranges('005930', '2024-03-04', '2024-03-29') == [('2024-03-04', '2024-03-29')]
+    # 주말뿐인 기간은 가져올 것이 없음
+    assert cache.missing_ranges('005930', '2024-03-09', '2024-03-10') == []
+
+
+def test_missing_ranges_only_head_and_tail(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put('005930', '2024-03-04', '2024-03-29', _bars('2024-03-04', '2024-03-29'))
+
+    assert cache.missing_ranges('005930', '2024-03-04', '2024-03-29') == []
+    assert cache.missing_ranges('005930', '2024-02-01', '2024-04-30') == [
+        ('2024-02-01', '2024-03-03'), ('2024-03-30', '2024-04-30')]
+    # 뒤쪽이 주말(3/30, 3/31)뿐이면 캐시로 충분
+    assert cache.missing_ranges('005930', '2024-03-11', '2024-03-31') == []
+    assert cache.get('005930', '2024-03-11', '2024-03-31').index.max() == pd.Timestamp('2024-03-29')
+
+
+def test_missing_ranges_refetches_after_last_row_when_source_lagged(tmp_path):
+    cache = _cache(tmp_path, max_age=0)
+    # 데이터 소스가 3/29 일봉을 아직 반영하지 않았으면 (max_age가 지난 뒤) 3/28 다음 날부터 다시 가져옴
+    cache.put('005930', '2024-03-04', '2024-03-29', _bars('2024-03-04', '2024-03-28'))
+    assert cache.missing_ranges('005930', '2024-03-04', '2024-03-29') == [('2024-03-29', '2024-03-29')]
+
+
+def test_put_merges_adjacent_ranges(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put('005930', '2024-03-04', '2024-03-15', _bars('2024-03-04', '2024-03-15'))
+    cache.put('005930', '2024-03-16', '2024-03-29', _bars('2024-03-16', '2024-03-29'))
+
+    entry = cache.load('005930')
+    assert (entry['start_date'], entry['end_date']) == ('2024-03-04', '2024-03-29')
+    assert entry['complete_through'] == '2024-03-29'
+    assert entry['data'].index.equals(trading_calendar.trading_days('2024-03-04', '2024-03-29'))
+
+    # 앞쪽에 이어지는 기간도 합치고, 겹치는 날짜는 새로 가져온 값으로
+    front = _bars('2024-02-19', '2024-03-04')
+    front['Close'] = -1
+    cache.put('005930', '2024-02-19', '2024-03-04', front)
+    entry = cache.load('005930')
+    assert (entry['start_date'], entry['end_date']) == ('2024-02-19', '2024-03-29')
+    assert entry['complete_through'] == '2024-03-29'
+    assert entry['data'].index.is_unique and entry['data'].index.is_monotonic_increasing
+    assert entry['data'].loc['2024-03-04', 'Close'] == -1
+    assert cache.missing_ranges('005930', '2024-02-19', '2024-03-29') == []
+
+
+def test_put_replaces_disjoint_range(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put('005930', '2024-03-04', '2024-03-15', _bars('2024-03-04', '2024-03-15'))
+    cache.put('005930', '2024-05-06', '2024-05-31', _bars('2024-05-06', '2024-05-31'))
+
+    entry = cache.load('005930')
+    assert (entry['start_date'], entry['end_date']) == ('2024-05-06', '2024-05-31')
+    assert entry['data'].index.min() > pd.Timestamp('2024-03-31')
+
+
+def test_fetch_returns_stale_data_and_refreshes_in_background(tmp_path):
+    cache = _cache(tmp_path, max_stale=3600)
+    cache.put('005930', '2024-03-04', '2024-03-29', _bars('2024-03-04', '2024-03-29'))
+    release, calls = threading.Event(), []
+
+    def reader(symbol, start, end):
+        calls.append((start, end))
+        release.wait(5)
+        return _bars(start, end)
+
+    data = cache.fetch('005930', '2024-03-04', '2024-04-30', reader)
+    # 갱신을 기다리지 않고 저장된 데이터를 나이와 함께 반환
+    assert data.index.max() == pd.Timestamp('2024-03-29')
+    assert stale_age(data) is not None
+    release.set()
+
+    deadline = time.monotonic() + 5
+    while cache.load('005930')['end_date'] != '2024-04-30' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert calls == [('2024-03-30', '2024-04-30')]
+    assert cache.load('005930')['start_date'] == '2024-03-04'
+
+    data = cache.fetch('005930', '2024-03-04', '2024-04-30', reader)
+    assert stale_age(data) is None
+    assert data.index.max() == pd.Timestamp('2024-04-30')
+    assert len(calls) == 1
+
+
+def test_fetch_waits_when_stale_serving_disabled(tmp_path):
+    cache = _cache(tmp_path, max_stale=0)
+    cache.put('005930', '2024-03-04', '2024-03-29', _bars('2024-03-04', '2024-03-29'))
+    calls = []
+
+    def reader(symbol, start, end):
+        calls.append((start, end))
+        return _bars(start, end)
+
+    data = cache.fetch('005930', '2024-03-04', '2024-04-30', reader)
+    assert calls == [('2024-03-30', '2024-04-30')]
+    assert stale_age(data) is None
+    assert data.index.max() == pd.Timestamp('2024-04-30')
+
+
+def test_fetch_falls_back_to_stored_data_when_source_fails(tmp_path):
+    cache = _cache(tmp_path, max_stale=0)
+    cache.put('005930', '2024-03-04', '2024-03-29', _bars('2024-03-04', '2024-03-29'))
+
+    def reader(symbol, start, end):
+        raise ConnectionError("down")
+
+    data = cache.fetch('005930', '2024-03-04', '2024-04-30', reader)
+    assert stale_age(data) is not None
+    assert data.index.max() == pd.Timestamp('2024-03-29')
@@ -0,0 +1,109 @@
+"""
+종목별 일봉 보관소(HistoryManager)가 같은 종목의 동시 요청을 수집 한 번으로 처리하고,
+먼저 시작한 수집이 실패하면 기다리던 요청이 대신 가져오는지 확인
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('FinanceDataReader')
+
+import analysis_worker  # noqa: E402
+import trading_calendar  # noqa: E402
+from analysis_worker import HistoryManager  # noqa: E402
+
+
+class _Source:
+    """fetch_in_chunks 대신 호출 횟수를 세고 release 전까지 응답을 미루는 데이터 소스"""
+
+    def __init__(self, fail_first: bool = False, empty: bool = False):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.fail_first = fail_first
+        self.empty = empty
+
+    def __call__(self, symbol, start_date, end_date, on_chunk=None, cancel_event=None):
+        self.calls.append((symbol, start_date, end_date))
+        self.started.set()
+        self.release.wait(5)
+        if self.fail_first and len(self.calls) == 1:
+            raise ConnectionError("down")
+        if self.empty:
+            return pd.DataFrame()
+        days = trading_calendar.trading_days(start_date, end_date)
+        return pd.DataFrame({'Close': range(len(days)), 'Volume': 1000}, index=days)
+
+
+def _recent_range(days: int):
+    today = trading_calendar.now_kst()
+    return (today - timedelta(days=days)).strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')
+
+
+def _concurrent_gets(manager: HistoryManager, source: _Source, ranges):
+    results, errors = [None] * len(ranges), []
+
+    def run(i, start_date, end_date):
+        try:
+            results[i] = manager.get('005930', start_date, end_date)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i, *dates)) for i, dates in enumerate(ranges)]
+    threads[0].start()
+    assert source.started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # 나머지 요청이 진행 중인 수집을 기다리기 시작할 시간
+    time.sleep(0.2)
+    source.release.set()
+    for thread in threads:
+        thread.join(10)
+    return results, errors
+
+
+def test_concurrent_gets_share_one_fetch(monkeypatch):
+    source = _Source()
+    monkeypatch.setattr(analysis_worker, 'fetch_in_chunks', source)
+    manager = HistoryManager(history_days=365)
+
+    ranges = [_recent_range(90), _recent_range(30), _recent_range(180)]
+    results, errors = _concurrent_gets(manager, source, ranges)
+
+    assert errors == []
+    assert len(source.calls) == 1
+    for (start_date, end_date), data in zip(ranges, results):
+        assert not data.empty
+        assert data.index.min() >= pd.Timestamp(start_date)
+        assert data.index.max() <= pd.Timestamp(end_date)
+    # 이후 요청은 보관 중인 데이터에서 잘라 반환
+    manager.get('005930', *_recent_range(60))
+    assert len(source.calls) == 1
+
+
+def test_waiter_fetches_when_owner_fails(monkeypatch):
+    source = _Source(fail_first=True)
+    monkeypatch.setattr(analysis_worker, 'fetch_in_chunks', source)
+    manager = HistoryManager(history_days=365)
+
+    results, errors = _concurrent_gets(manager, source, [_recent_range(90), _recent_range(30)])
+
+    assert [type(e) for e in errors] == [ConnectionError]
+    assert len(source.calls) == 2
+    assert results[1] is not None and not results[1].empty
+
+
+def test_empty_symbol_is_not_refetched_by_waiters(monkeypatch):
+    source = _Source(empty=True)
+    monkeypatch.setattr(analysis_worker, 'fetch_in_chunks', source)
+    manager = HistoryManager(history_days=365)
+
+    results, errors = _concurrent_gets(manager, source, [_recent_range(90), _recent_range(30)])
+
+    assert errors == []
+    assert len(source.calls) == 1
+    assert all(data.empty for data in results)
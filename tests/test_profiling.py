@@ -0,0 +1,59 @@
+"""
+프로파일링이 환경 변수로 허용한 경우에만 켜지고 (주소 요청 포함), 저장 디렉터리에 최근
+MAX_PROFILES개만 남기는지 확인
+"""
+
+import os
+
+import profiling
+from profiling import DEFAULT_PROFILE_DIR, PROFILE_ENV, profile_dir, profiled, prune_profiles
+
+
+def test_request_needs_explicit_env(monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    assert profile_dir() is None
+    assert profile_dir(requested=True) is None
+
+    for value in ('0', 'off'):
+        monkeypatch.setenv(PROFILE_ENV, value)
+        assert profile_dir(requested=True) is None
+
+
+def test_request_mode_profiles_requested_runs_only(monkeypatch, tmp_path):
+    monkeypatch.setenv(PROFILE_ENV, 'request')
+    assert profile_dir() is None
+    assert profile_dir(requested=True) == DEFAULT_PROFILE_DIR
+
+    monkeypatch.setenv(PROFILE_ENV, f'request:{tmp_path}')
+    assert profile_dir() is None
+    assert profile_dir(requested=True) == str(tmp_path)
+
+
+def test_all_runs_mode(monkeypatch, tmp_path):
+    monkeypatch.setenv(PROFILE_ENV, '1')
+    assert profile_dir() == DEFAULT_PROFILE_DIR
+    monkeypatch.setenv(PROFILE_ENV, str(tmp_path))
+    assert profile_dir() == profile_dir(requested=True) == str(tmp_path)
+
+
+def test_keeps_latest_profiles_only(monkeypatch, tmp_path):
+    for i in range(5):
+        for suffix in ('folded', 'txt'):
+            (tmp_path / f"20240101-0000{i:02d}-000000_old.{suffix}").write_text('')
+    (tmp_path / 'notes.txt').write_text('keep')
+
+    assert prune_profiles(str(tmp_path), keep=3) == 2
+    names = sorted(os.listdir(tmp_path))
+    assert 'notes.txt' in names
+    assert len(names) == 7
+    assert not any(name.startswith(('20240101-000000', '20240101-000001')) for name in names)
+
+    # 저장할 때마다 한도를 넘는 오래된 프로파일을 지움
+    monkeypatch.setattr(profiling, 'MAX_PROFILES', 2)
+    monkeypatch.setenv(PROFILE_ENV, str(tmp_path))
+    with profiled('analysis_005930') as profiler:
+        sum(range(10000))
+    assert profiler.paths is not None
+    profiles = {name.rsplit('.', 1)[0] for name in os.listdir(tmp_path) if name != 'notes.txt'}
+    assert len(profiles) == 2
+    assert os.path.basename(profiler.paths[0]).rsplit('.', 1)[0] in profiles
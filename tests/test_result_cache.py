@@ -0,0 +1,64 @@
+"""
+분석 결과 캐시(ResultCache)가 디스크 한도를 넘으면 가장 오래 쓰지 않은 항목부터 한도의 90%까지
+지우는지 확인
+"""
+
+import os
+import pickle
+import time
+
+from result_cache import ResultCache, ResultStore, cache_key
+
+VALUE = b'x' * 1000
+SIZE = len(pickle.dumps(VALUE, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _keys(count: int):
+    return [cache_key('analysis', f'fingerprint-{i}', {}) for i in range(count)]
+
+
+def test_evicts_least_recently_used_down_to_90_percent(tmp_path):
+    # 메모리 캐시를 끄고 디스크만 확인
+    cache = ResultCache(str(tmp_path), max_bytes=10 * SIZE, memory_bytes=0)
+    keys = _keys(11)
+    base = time.time() - 100
+    for i, key in enumerate(keys[:10]):
+        cache.put(key, VALUE)
+        os.utime(cache._path(key), (base + i, base + i))
+    assert cache.stats['evicted'] == 0
+
+    # 읽으면 마지막 사용 시각이 갱신되어 가장 오래된 항목이 아니게 됨
+    assert cache.get(keys[0]) == VALUE
+    cache.put(keys[10], VALUE)
+
+    # 11개(한도 초과) -> 9개(한도의 90%) : 읽지 않은 가장 오래된 두 항목이 삭제
+    remaining = [key for key in keys if os.path.exists(cache._path(key))]
+    assert remaining == [keys[0]] + keys[3:]
+    assert cache.stats['evicted'] == 2
+    assert sum(size for _, size, _ in cache._scan()) <= 0.9 * cache.max_bytes
+    assert cache.get(keys[1]) is None
+
+
+def test_disk_size_survives_restart(tmp_path):
+    keys = _keys(10)
+    cache = ResultCache(str(tmp_path), max_bytes=10 * SIZE, memory_bytes=0)
+    for key in keys:
+        cache.put(key, VALUE)
+
+    # 새 프로세스는 첫 저장 때 디렉터리를 훑어 기존 사용량부터 셈
+    reopened = ResultCache(str(tmp_path), max_bytes=10 * SIZE, memory_bytes=0)
+    reopened.put(cache_key('analysis', 'new', {}), VALUE)
+    assert reopened.stats['evicted'] == 2
+    assert len(reopened._scan()) == 9
+
+
+def test_result_store_shares_the_budget(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10 * SIZE, memory_bytes=0)
+    store = ResultStore(cache)
+    store.put('005930|2024-01-01|2024-03-29', '2024-03-29', '{"ok": true}')
+    assert store.get('005930|2024-01-01|2024-03-29') == '{"ok": true}'
+
+    for key in _keys(20):
+        cache.put(key, VALUE)
+    # 요청 결과도 같은 LRU 한도 안에서 밀려남
+    assert store.get('005930|2024-01-01|2024-03-29') is None
@@ -0,0 +1,70 @@
+"""
+배치 지지선/저항선 선택(volume_profile)이 StockDensityAnalyzer의 calculate_support_resistance와
+같은 레벨을 고르는지 무작위 일봉으로 확인 (터치 횟수 동점 정렬 포함)
+"""
+
+import numpy as np
+import pandas as pd
+
+from analysis_core import PriceSeries, calculate_support_resistance
+from volume_profile import batch_support_resistance, batch_touch_counts, select_support_resistance
+
+
+def _random_frame(rng: np.random.Generator, days: int) -> pd.DataFrame:
+    close = 40000 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    spread = close * rng.uniform(0.005, 0.04, days)
+    return pd.DataFrame({
+        'Low': np.round(close - spread),
+        'High': np.round(close + spread),
+        'Close': np.round(close),
+        'Volume': rng.integers(1000, 100000, days)
+    }, index=pd.bdate_range('2024-01-01', periods=days))
+
+
+def _levels(selected, row: int):
+    at_row = selected['row'] == row
+    pairs = [(int(price), int(touches)) for price, touches in
+             zip(selected['price'][at_row], selected['touches'][at_row])]
+    support = [pair for pair, below in zip(pairs, selected['is_support'][at_row]) if below]
+    resistance = [pair for pair, below in zip(pairs, selected['is_support'][at_row]) if not below]
+    return support, resistance
+
+
+def _core_levels(frame: pd.DataFrame, analysis_days: int, min_touches: int, max_levels: int):
+    result = calculate_support_resistance(PriceSeries.from_frame(frame), analysis_days=analysis_days,
+                                          min_touches=min_touches, max_levels=max_levels)
+    return ([(level['price'], level['touches']) for level in result['support_levels']],
+            [(level['price'], level['touches']) for level in result['resistance_levels']])
+
+
+def test_batch_matches_analyzer_on_random_series():
+    rng = np.random.default_rng(20240101)
+    frames = [_random_frame(rng, 60) for _ in range(300)]
+    low = np.stack([frame['Low'].to_numpy(float) for frame in frames])
+    high = np.stack([frame['High'].to_numpy(float) for frame in frames])
+    current = np.array([frame['Close'].iloc[-1] for frame in frames], dtype=float)
+
+    selected = batch_support_resistance(low, high, current, min_touches=3, max_levels=3)
+    for row, frame in enumerate(frames):
+        assert _levels(selected, row) == _core_levels(frame, 60, 3, 3), f"row {row}"
+
+
+def test_select_matches_analyzer_with_nan_padded_windows():
+    # sweep.py처럼 분석 일수가 다른 기간을 앞쪽 NaN으로 채워 한 배열에 쌓은 경우
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        frame = _random_frame(rng, 120)
+        days_list = [20, 60, 120]
+        low = np.full((len(days_list), 120), np.nan)
+        high = np.full((len(days_list), 120), np.nan)
+        for i, days in enumerate(days_list):
+            low[i, 120 - days:] = frame['Low'].to_numpy(float)[-days:]
+            high[i, 120 - days:] = frame['High'].to_numpy(float)[-days:]
+        base_price, touches, first_touch = batch_touch_counts(low, high)
+        current = np.full(len(days_list), float(frame['Close'].iloc[-1]))
+
+        for min_touches, max_levels in [(2, 3), (4, 5)]:
+            selected = select_support_resistance(base_price, touches, first_touch, current,
+                                                 min_touches, max_levels)
+            for i, days in enumerate(days_list):
+                assert _levels(selected, i) == _core_levels(frame, days, min_touches, max_levels)
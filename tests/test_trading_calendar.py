@@ -0,0 +1,87 @@
+"""
+거래일 달력이 주말/휴장일과 한국 시각 자정 전후에 올바른 최근 일봉과 필요한 마지막 거래일을
+고르는지 확인 (시스템 시간대와 관계없이 한국 시각 기준)
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+from trading_calendar import KST, latest_bar, last_final_bar, missing_ranges, required_end, unchanged_since
+
+
+def _kst(*args) -> datetime:
+    return datetime(*args, tzinfo=KST)
+
+
+def test_latest_bar_over_weekend():
+    friday = date(2024, 3, 29)
+    assert latest_bar(_kst(2024, 3, 29, 15, 59)) == (friday, False)
+    assert latest_bar(_kst(2024, 3, 29, 23, 59)) == (friday, True)
+    assert latest_bar(_kst(2024, 3, 30, 0, 1)) == (friday, True)
+    assert latest_bar(_kst(2024, 3, 31, 23, 59)) == (friday, True)
+    assert latest_bar(_kst(2024, 4, 1, 8, 59)) == (friday, True)
+    assert latest_bar(_kst(2024, 4, 1, 9, 0)) == (date(2024, 4, 1), False)
+    assert latest_bar(_kst(2024, 4, 1, 16, 0)) == (date(2024, 4, 1), True)
+
+
+def test_latest_bar_uses_kst_date_for_other_timezones():
+    # 일요일 15:30 UTC = 월요일 00:30 KST (개장 전), 월요일 00:30 UTC = 월요일 09:30 KST (장중)
+    assert latest_bar(datetime(2024, 3, 31, 15, 30, tzinfo=timezone.utc)) == (date(2024, 3, 29), True)
+    assert latest_bar(datetime(2024, 4, 1, 0, 30, tzinfo=timezone.utc)) == (date(2024, 4, 1), False)
+    # 금요일 14:59 UTC = 금요일 23:59 KST, 15:01 UTC = 토요일 00:01 KST
+    assert latest_bar(datetime(2024, 3, 29, 14, 59, tzinfo=timezone.utc)) == (date(2024, 3, 29), True)
+    assert latest_bar(datetime(2024, 3, 29, 15, 1, tzinfo=timezone.utc)) == (date(2024, 3, 29), True)
+    # epoch 초와 시간대 없는 값(한국 시각으로 간주)도 같은 결과
+    moment = _kst(2024, 4, 1, 0, 30)
+    assert latest_bar(moment.timestamp()) == latest_bar(moment.replace(tzinfo=None)) == (date(2024, 3, 29), True)
+
+
+def test_latest_bar_on_holidays():
+    # 2024-04-10 국회의원 선거일 (수요일)
+    assert latest_bar(_kst(2024, 4, 10, 12, 0)) == (date(2024, 4, 9), True)
+    assert latest_bar(_kst(2024, 4, 11, 0, 0)) == (date(2024, 4, 9), True)
+    assert latest_bar(_kst(2024, 4, 11, 10, 0)) == (date(2024, 4, 11), False)
+    # 2024 추석 연휴 (9/16~18 월~수): 직전 거래일은 금요일
+    assert latest_bar(_kst(2024, 9, 18, 15, 0)) == (date(2024, 9, 13), True)
+    # 새해 첫 거래일은 10:00 개장, 연말 휴장일(12/29) 건너뜀
+    assert latest_bar(_kst(2024, 1, 2, 9, 30)) == (date(2023, 12, 28), True)
+    assert latest_bar(_kst(2024, 1, 2, 10, 0)) == (date(2024, 1, 2), False)
+
+
+def test_last_final_bar_during_session_is_previous_trading_day():
+    assert last_final_bar(_kst(2024, 4, 1, 10, 0)) == date(2024, 3, 29)
+    assert last_final_bar(_kst(2024, 4, 11, 10, 0)) == date(2024, 4, 9)
+    assert last_final_bar(_kst(2024, 4, 11, 16, 0)) == date(2024, 4, 11)
+
+
+def test_required_end_across_kst_midnight():
+    # 종료일이 주말이면 직전 거래일, 미래이면 그 시점에 있을 수 있는 마지막 일봉
+    assert required_end('2024-03-31', _kst(2024, 4, 1, 8, 0)) == date(2024, 3, 29)
+    assert required_end('2024-12-31', _kst(2024, 4, 1, 8, 59)) == date(2024, 3, 29)
+    assert required_end('2024-12-31', _kst(2024, 4, 1, 9, 0)) == date(2024, 4, 1)
+    # 토요일 00:30 UTC = 토요일 09:30 KST: 장이 없으므로 금요일
+    assert required_end('2024-04-30', datetime(2024, 3, 30, 0, 30, tzinfo=timezone.utc)) == date(2024, 3, 29)
+    # 휴장일이 종료일이면 직전 거래일
+    assert required_end('2024-04-10', _kst(2024, 5, 1, 12, 0)) == date(2024, 4, 9)
+    assert required_end('2024-09-18', _kst(2024, 10, 1, 12, 0)) == date(2024, 9, 13)
+
+
+def test_unchanged_since_over_weekend():
+    saved = _kst(2024, 3, 29, 17, 0)
+    assert unchanged_since('2024-04-30', saved, _kst(2024, 4, 1, 8, 59))
+    assert not unchanged_since('2024-04-30', saved, _kst(2024, 4, 1, 9, 0))
+    # 종료일이 금요일까지면 월요일 장이 열려도 그대로
+    assert unchanged_since('2024-03-31', saved, _kst(2024, 4, 1, 9, 0))
+    # 장중에 저장한 결과는 그날 일봉이 확정되지 않았으므로 다시 계산
+    assert not unchanged_since('2024-03-29', _kst(2024, 3, 29, 14, 0), _kst(2024, 3, 30, 0, 0))
+
+
+def test_missing_ranges_waits_for_next_session():
+    covered = ('2024-03-04', '2024-03-29')
+    monday_midnight = datetime(2024, 3, 31, 15, 0, tzinfo=timezone.utc)
+    assert missing_ranges('2024-03-04', '2024-04-30', *covered, moment=monday_midnight) == []
+    monday_open = monday_midnight + timedelta(hours=9)
+    assert missing_ranges('2024-03-04', '2024-04-30', *covered, moment=monday_open) == [
+        ('2024-03-30', '2024-04-30')]
+    # 휴장일 다음 날 개장 전에는 가져올 것이 없음
+    assert missing_ranges('2024-04-01', '2024-04-30', '2024-04-01', '2024-04-09',
+                          moment=_kst(2024, 4, 11, 8, 0)) == []
@@ -0,0 +1,48 @@
+"""
+스크리너 인덱스(build_zone_index)의 strength가 밀집 구간과 지지선/저항선 모두 0~1 비중이고
+종목별 분석기 결과와 같은지 확인 (데이터가 짧은 종목 포함)
+"""
+
+import numpy as np
+import pandas as pd
+
+from analysis_core import PriceSeries, calculate_price_ranges, calculate_support_resistance
+from zone_screener import build_zone_index
+
+
+def _random_frame(rng: np.random.Generator, days: int) -> pd.DataFrame:
+    close = 40000 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    spread = close * rng.uniform(0.005, 0.04, days)
+    return pd.DataFrame({
+        'Low': np.round(close - spread),
+        'High': np.round(close + spread),
+        'Close': np.round(close),
+        'Volume': rng.integers(1000, 100000, days)
+    }, index=pd.bdate_range(end='2024-06-28', periods=days))
+
+
+def test_strength_is_share_for_zones_and_levels():
+    rng = np.random.default_rng(7)
+    # 'SHORT'는 analysis_days(60)보다 짧아 NaN으로 채워진 행
+    data_by_symbol = {'A': _random_frame(rng, 180), 'B': _random_frame(rng, 120), 'SHORT': _random_frame(rng, 40)}
+    index = build_zone_index(data_by_symbol, num_ranges=20, top_n=5, analysis_days=60)
+
+    for symbol, data in data_by_symbol.items():
+        intervals = index.lookup(symbol, 0, np.inf)
+        assert intervals['strength'].between(0, 1).all()
+        series = PriceSeries.from_frame(data)
+
+        ranges = calculate_price_ranges(series, 20)
+        share = ranges['total_volume'] / data['Volume'].sum()
+        zones = intervals[intervals['kind'] == 'zone']
+        assert len(zones) == 5
+        for _, zone in zones.iterrows():
+            match = np.isclose(ranges['range_start'], zone['low']) & np.isclose(ranges['range_end'], zone['high'])
+            assert np.isclose(share[match].iloc[0], zone['strength'])
+
+        expected = calculate_support_resistance(series, analysis_days=60, min_touches=3, max_levels=3)
+        days = min(60, len(data))
+        for kind, key in (('support', 'support_levels'), ('resistance', 'resistance_levels')):
+            levels = intervals[intervals['kind'] == kind].set_index('low')['strength']
+            for level in expected[key]:
+                assert np.isclose(levels[level['price']], level['touches'] / days)
@@ -0,0 +1,208 @@
+"""
+한국거래소(KRX) 거래일 달력
+휴장일과 정규장 시간으로 어떤 날의 일봉이 이미 확정되었는지 판단해, 캐시된 데이터가 요청 기간에 대해
+완전한지와 새로 가져와야 하는 최소 기간을 계산하는 모듈
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+
+import pandas as pd
+
+# 한국 표준시 (일광 절약 시간 없음)
+KST = timezone(timedelta(hours=9), 'KST')
+
+# 정규장 시간 (새해 첫 거래일은 10:00 개장)
+SESSION_OPEN = time(9, 0)
+FIRST_DAY_OPEN = time(10, 0)
+SESSION_CLOSE = time(15, 30)
+# 장 마감 후 일봉이 데이터 소스에 확정 반영되었다고 보는 시각
+DATA_READY = time(16, 0)
+
+# 매년 같은 날짜의 휴장일 (신정, 삼일절, 근로자의 날, 어린이날, 현충일, 광복절, 개천절, 한글날, 성탄절)
+FIXED_HOLIDAYS = ['01-01', '03-01', '05-01', '05-05', '06-06', '08-15', '10-03', '10-09', '12-25']
+
+# 해마다 달라지는 평일 휴장일 (설날/추석/부처님오신날, 대체공휴일, 선거일, 임시공휴일)
+# 목록에 없는 해는 고정 휴장일과 주말만 반영되며, 빠진 휴장일은 불필요한 요청 한 번으로 이어질 뿐
+# 데이터가 누락되지는 않습니다.
+VARIABLE_HOLIDAYS = {
+    2019: ['2019-02-04', '2019-02-05', '2019-02-06', '2019-05-06', '2019-09-12', '2019-09-13'],
+    2020: ['2020-01-24', '2020-01-27', '2020-04-15', '2020-04-30', '2020-08-17', '2020-09-30',
+           '2020-10-01', '2020-10-02'],
+    2021: ['2021-02-11', '2021-02-12', '2021-05-19', '2021-08-16', '2021-09-20', '2021-09-21',
+           '2021-09-22', '2021-10-04', '2021-10-11'],
+    2022: ['2022-01-31', '2022-02-01', '2022-02-02', '2022-03-09', '2022-06-01', '2022-09-09',
+           '2022-09-12', '2022-10-10'],
+    2023: ['2023-01-23', '2023-01-24', '2023-05-29', '2023-09-28', '2023-09-29', '2023-10-02'],
+    2024: ['2024-02-09', '2024-02-12', '2024-04-10', '2024-05-06', '2024-05-15', '2024-09-16',
+           '2024-09-17', '2024-09-18', '2024-10-01'],
+    2025: ['2025-01-27', '2025-01-28', '2025-01-29', '2025-01-30', '2025-03-03', '2025-05-06',
+           '2025-06-03', '2025-10-06', '2025-10-07', '2025-10-08'],
+    2026: ['2026-02-16', '2026-02-17', '2026-02-18', '2026-03-02', '2026-05-25', '2026-06-03',
+           '2026-08-17', '2026-09-24', '2026-09-25', '2026-10-05'],
+    2027: ['2027-02-08', '2027-02-09', '2027-05-13', '2027-08-16', '2027-09-14', '2027-09-15',
+           '2027-09-16', '2027-10-04', '2027-10-11', '2027-12-27'],
+}
+
+DateLike = Union[str, date, datetime, pd.Timestamp]
+
+
+def _to_date(value: DateLike) -> date:
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def now_kst() -> datetime:
+    """현재 한국 시각"""
+    return datetime.now(KST)
+
+
+def _to_kst(moment: Union[datetime, float, None]) -> datetime:
+    """시각을 한국 시각으로 (None이면 현재, 숫자는 epoch 초, 시간대 없는 값은 한국 시각으로 간주)"""
+    if moment is None:
+        return now_kst()
+    if isinstance(moment, (int, float)):
+        return datetime.fromtimestamp(moment, KST)
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=KST)
+    return moment.astimezone(KST)
+
+
+@lru_cache(maxsize=64)
+def _holidays(year: int) -> frozenset:
+    """해당 연도 평일 휴장일"""
+    days = {date(year, int(md[:2]), int(md[3:])) for md in FIXED_HOLIDAYS}
+    days.update(_to_date(day) for day in VARIABLE_HOLIDAYS.get(year, []))
+    # 연말 휴장일: 12월 31일 (주말/공휴일이면 직전 영업일)
+    year_end = date(year, 12, 31)
+    while year_end.weekday() >= 5 or year_end in days:
+        year_end -= timedelta(days=1)
+    days.add(year_end)
+    return frozenset(day for day in days if day.weekday() < 5)
+
+
+def is_trading_day(day: DateLike) -> bool:
+    """정규장이 열리는 날인지"""
+    day = _to_date(day)
+    return day.weekday() < 5 and day not in _holidays(day.year)
+
+
+def previous_trading_day(day: DateLike) -> date:
+    """day 이전(당일 제외) 가장 가까운 거래일"""
+    day = _to_date(day) - timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def last_trading_day_on_or_before(day: DateLike) -> date:
+    """day 당일 또는 그 이전 가장 가까운 거래일"""
+    day = _to_date(day)
+    return day if is_trading_day(day) else previous_trading_day(day)
+
+
+def trading_days(start: DateLike, end: DateLike) -> pd.DatetimeIndex:
+    """기간 안의 거래일"""
+    days = pd.bdate_range(_to_date(start), _to_date(end))
+    return days[[is_trading_day(day) for day in days.date]]
+
+
+def has_trading_day(start: DateLike, end: DateLike) -> bool:
+    """기간 안에 거래일이 하루라도 있는지"""
+    day, end = _to_date(start), _to_date(end)
+    while day <= end:
+        if is_trading_day(day):
+            return True
+        day += timedelta(days=1)
+    return False
+
+
+def session_open(day: DateLike) -> time:
+    """개장 시각 (새해 첫 거래일은 10:00)"""
+    day = _to_date(day)
+    first_day = date(day.year, 1, 1)
+    while not is_trading_day(first_day):
+        first_day += timedelta(days=1)
+    return FIRST_DAY_OPEN if day == first_day else SESSION_OPEN
+
+
+def latest_bar(moment: Union[datetime, float, None] = None) -> Tuple[date, bool]:
+    """
+    moment 시점에 데이터 소스에 있을 수 있는 가장 최근 일봉
+
+    Returns:
+        Tuple[date, bool]: (날짜, 확정 여부). 장중이면 오늘 (미확정), 개장 전이나 휴장일이면
+                           직전 거래일 (확정)
+    """
+    moment = _to_kst(moment)
+    today = moment.date()
+    if is_trading_day(today):
+        if moment.time() >= DATA_READY:
+            return today, True
+        if moment.time() >= session_open(today):
+            return today, False
+    return previous_trading_day(today), True
+
+
+def last_final_bar(moment: Union[datetime, float, None] = None) -> date:
+    """moment 시점에 확정된 가장 최근 일봉 날짜"""
+    day, final = latest_bar(moment)
+    return day if final else previous_trading_day(day)
+
+
+def required_end(end_date: DateLike, moment: Union[datetime, float, None] = None) -> date:
+    """
+    end_date까지 요청했을 때 moment 시점에 데이터가 있어야 하는 마지막 거래일
+
+    종료일이 미래이거나 주말/휴장일이면 실제로 존재할 수 있는 마지막 일봉 날짜로 줄입니다.
+    """
+    latest, _ = latest_bar(moment)
+    return min(last_trading_day_on_or_before(end_date), latest)
+
+
+def unchanged_since(end_date: DateLike, saved_at: Union[datetime, float],
+                    moment: Union[datetime, float, None] = None) -> bool:
+    """
+    saved_at에 저장한 end_date까지의 데이터(또는 그 분석 결과)가 moment에도 그대로인지
+
+    저장 시점에 확정된 일봉이 요청 기간의 마지막 거래일까지 모두 포함했으면 이후 바뀔 것이 없습니다.
+    """
+    return required_end(end_date, moment) <= last_final_bar(saved_at)
+
+
+def missing_ranges(start_date: DateLike, end_date: DateLike, covered_start: Optional[DateLike] = None,
+                   complete_through: Optional[DateLike] = None,
+                   moment: Union[datetime, float, None] = None) -> List[Tuple[str, str]]:
+    """
+    캐시가 [covered_start, complete_through]를 확정 데이터로 갖고 있을 때 [start_date, end_date]를
+    채우려면 새로 가져와야 하는 기간 목록 (거래일이 없는 기간은 제외)
+
+    Args:
+        start_date: 요청 시작 날짜
+        end_date: 요청 종료 날짜
+        covered_start: 캐시가 포함하는 시작 날짜 (캐시가 없으면 None)
+        complete_through: 캐시에 확정 데이터가 있는 마지막 날짜
+        moment: 기준 시각 (None이면 현재)
+
+    Returns:
+        List[Tuple[str, str]]: ('YYYY-MM-DD', 'YYYY-MM-DD') 기간 목록 (비어 있으면 캐시로 충분)
+    """
+    start, end = _to_date(start_date), _to_date(end_date)
+    last_needed = required_end(end, moment)
+    if covered_start is None or complete_through is None:
+        return [(start.isoformat(), end.isoformat())] if has_trading_day(start, last_needed) else []
+
+    covered_start, complete_through = _to_date(covered_start), _to_date(complete_through)
+    ranges = []
+    if start < covered_start:
+        head_end = covered_start - timedelta(days=1)
+        if has_trading_day(start, head_end):
+            ranges.append((start.isoformat(), head_end.isoformat()))
+    tail_start = max(start, complete_through + timedelta(days=1))
+    if tail_start <= last_needed and has_trading_day(tail_start, last_needed):
+        ranges.append((tail_start.isoformat(), end.isoformat()))
+    return ranges
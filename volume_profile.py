@@ -0,0 +1,920 @@
+"""
+거래량 프로파일 계산 모듈
+가격 구간별 거래량 프로파일에서 밀집 구간(zone)을 추출하고
+거래량 가중 커널 밀도를 추정하는 벡터화 함수 모음
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# 자동 구간 수(num_ranges='auto') 범위
+AUTO_MIN_RANGES = 5
+AUTO_MAX_RANGES = 100
+
+
+def top_n_indices(values: np.ndarray, n: int) -> np.ndarray:
+    """
+    값이 큰 순서대로 상위 n개 위치 반환 (부분 선택)
+
+    전체 정렬 대신 np.argpartition으로 상위 n개만 골라낸 뒤 그 n개만 정렬합니다.
+    동점은 pandas nlargest(keep='first')와 같이 앞쪽 위치가 우선합니다.
+
+    Args:
+        values: 1차원 값 배열
+        n: 반환할 개수
+
+    Returns:
+        ndarray: 값 내림차순으로 정렬된 위치 배열
+    """
+    values = np.asarray(values, dtype=float)
+    size = len(values)
+    n = max(0, min(int(n), size))
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if n < size:
+        # n번째로 큰 값을 경계로 삼아 경계보다 큰 값은 모두, 경계와 같은 값은 앞에서부터 채움
+        kth = values[np.argpartition(-values, n - 1)[n - 1]]
+        above = np.flatnonzero(values > kth)
+        ties = np.flatnonzero(values == kth)[:n - len(above)]
+        selected = np.concatenate([above, ties])
+    else:
+        selected = np.arange(size)
+
+    order = np.lexsort((selected, -values[selected]))
+    return selected[order]
+
+
+def smooth_profile(values: np.ndarray, window: int = 3) -> np.ndarray:
+    """
+    이동평균으로 프로파일 평활화
+
+    양 끝은 창에 실제로 포함된 구간 수로 나누어 가장자리 값이 줄어들지 않게 합니다.
+    2차원 배열(종목 x 구간)이 주어지면 마지막 축을 따라 평활화합니다.
+
+    Args:
+        values: 프로파일 값 (1차원 또는 2차원)
+        window: 이동평균 창 크기 (1이면 평활화하지 않음)
+
+    Returns:
+        ndarray: 평활화된 프로파일
+    """
+    values = np.asarray(values, dtype=float)
+    if window <= 1 or values.shape[-1] == 0:
+        return values.copy()
+
+    left = (window - 1) // 2
+    right = window - 1 - left
+    pad = [(0, 0)] * (values.ndim - 1) + [(left, right)]
+
+    # 누적합 차분으로 창 합계 계산 (구간 수에 선형)
+    padded = np.pad(values, pad)
+    cumsum = np.cumsum(padded, axis=-1)
+    cumsum = np.concatenate([np.zeros(values.shape[:-1] + (1,)), cumsum], axis=-1)
+    window_sum = cumsum[..., window:] - cumsum[..., :-window]
+
+    counts = np.convolve(np.ones(values.shape[-1]), np.ones(window), mode='full')[right:right + values.shape[-1]]
+    return window_sum / counts
+
+
+def find_local_extrema(values: np.ndarray):
+    """
+    프로파일의 국소 최대/최소 위치 찾기
+
+    같은 값이 이어지는 평탄 구간은 다음 변화 방향을 이어받아 처리하므로
+    평탄한 봉우리는 그 구간의 첫 위치 하나로 잡힙니다.
+
+    Args:
+        values: 1차원 프로파일
+
+    Returns:
+        Tuple[ndarray, ndarray]: (국소 최대 위치, 국소 최소 위치)
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) < 3:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    slope = np.sign(np.diff(values))
+
+    # 기울기 0인 곳은 뒤쪽의 0이 아닌 기울기로 채움
+    nonzero = np.flatnonzero(slope)
+    if len(nonzero) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    next_nonzero = np.searchsorted(nonzero, np.arange(len(slope)))
+    next_nonzero = np.minimum(next_nonzero, len(nonzero) - 1)
+    filled = slope[nonzero[next_nonzero]]
+
+    turn = np.diff(filled)
+    peaks = np.flatnonzero(turn < 0) + 1
+    troughs = np.flatnonzero(turn > 0) + 1
+    return peaks, troughs
+
+
+def extract_zones(range_start: np.ndarray, range_end: np.ndarray, volume: np.ndarray,
+                  top_n: int = 5, smooth_window: int = 3, threshold_ratio: float = 1.0,
+                  split_at_troughs: bool = True) -> pd.DataFrame:
+    """
+    인접한 고거래량 구간을 하나의 밀집 구간으로 병합
+
+    1. 프로파일을 이동평균으로 평활화
+    2. 평활화 값이 평균 x threshold_ratio 이상인 구간을 고거래량 구간으로 표시
+    3. 연속된 고거래량 구간을 하나로 묶되, 내부의 국소 최소점에서는 나눔
+    4. 각 밀집 구간의 경계, 최대 거래량 가격, 강도 계산 후 강도 상위 top_n개 선택
+
+    Args:
+        range_start: 구간 시작 가격 배열
+        range_end: 구간 끝 가격 배열
+        volume: 구간별 거래량 배열
+        top_n: 반환할 밀집 구간 수
+        smooth_window: 평활화 이동평균 창 크기
+        threshold_ratio: 고거래량 판정 기준 (평활화 평균 대비 배수)
+        split_at_troughs: 연속 구간 내부의 국소 최소점에서 구간을 나눌지 여부
+
+    Returns:
+        DataFrame: 강도 내림차순으로 정렬된 밀집 구간
+    """
+    columns = ['zone_start', 'zone_end', 'peak_price', 'peak_volume', 'total_volume',
+               'bins_count', 'start_bin', 'end_bin', 'strength']
+
+    range_start = np.asarray(range_start, dtype=float)
+    range_end = np.asarray(range_end, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    if len(volume) == 0 or volume.sum() <= 0:
+        return pd.DataFrame(columns=columns)
+
+    smoothed = smooth_profile(volume, smooth_window)
+    high = smoothed >= smoothed.mean() * threshold_ratio
+
+    # 고거래량 구간이 새로 시작되는 위치 표시
+    starts = high & ~np.concatenate([[False], high[:-1]])
+    if split_at_troughs:
+        _, troughs = find_local_extrema(smoothed)
+        # 최소점 다음 구간부터 새 밀집 구간 시작 (최소점은 왼쪽 구간에 포함)
+        split = np.zeros(len(volume), dtype=bool)
+        split[troughs[troughs + 1 < len(volume)] + 1] = True
+        starts |= split & high & np.concatenate([[False], high[:-1]])
+
+    members = np.flatnonzero(high)
+    if len(members) == 0:
+        return pd.DataFrame(columns=columns)
+
+    # 밀집 구간 번호를 매긴 뒤 reduceat으로 구간별 집계
+    labels = np.cumsum(starts)[members] - 1
+    boundaries = np.flatnonzero(np.diff(np.concatenate([[-1], labels])))
+    member_volume = volume[members]
+
+    zone_volume = np.add.reduceat(member_volume, boundaries)
+    zone_peak = np.maximum.reduceat(member_volume, boundaries)
+    zone_count = np.diff(np.concatenate([boundaries, [len(members)]]))
+    first_bin = members[boundaries]
+    last_bin = members[boundaries + zone_count - 1]
+
+    # 구간별 최대 거래량 위치: 최대값과 같은 첫 위치
+    is_peak = member_volume == np.repeat(zone_peak, zone_count)
+    peak_pos = np.flatnonzero(is_peak)
+    first_peak = peak_pos[np.unique(labels[peak_pos], return_index=True)[1]]
+    peak_bin = members[first_peak]
+
+    zones = pd.DataFrame({
+        'zone_start': range_start[first_bin],
+        'zone_end': range_end[last_bin],
+        'peak_price': (range_start[peak_bin] + range_end[peak_bin]) / 2,
+        'peak_volume': zone_peak,
+        'total_volume': zone_volume,
+        'bins_count': zone_count,
+        'start_bin': first_bin,
+        'end_bin': last_bin,
+        'strength': zone_volume / volume.sum(),
+    })
+
+    return zones.iloc[top_n_indices(zones['strength'].values, top_n)].reset_index(drop=True)
+
+
+def extract_density_zones(price_ranges_df: pd.DataFrame, top_n: int = 5, smooth_window: int = 3,
+                          threshold_ratio: float = 1.0, split_at_troughs: bool = True) -> pd.DataFrame:
+    """
+    calculate_price_ranges 결과에서 병합된 밀집 구간 추출
+
+    Args:
+        price_ranges_df: 가격 구간별 거래량 데이터
+        top_n: 반환할 밀집 구간 수
+        smooth_window: 평활화 이동평균 창 크기
+        threshold_ratio: 고거래량 판정 기준 (평활화 평균 대비 배수)
+        split_at_troughs: 연속 구간 내부의 국소 최소점에서 구간을 나눌지 여부
+
+    Returns:
+        DataFrame: 강도 내림차순으로 정렬된 밀집 구간
+    """
+    return extract_zones(
+        price_ranges_df['range_start'].values,
+        price_ranges_df['range_end'].values,
+        price_ranges_df['total_volume'].values,
+        top_n=top_n,
+        smooth_window=smooth_window,
+        threshold_ratio=threshold_ratio,
+        split_at_troughs=split_at_troughs
+    )
+
+
+def _uniform_mass_cdf(low: np.ndarray, high: np.ndarray, volume: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    일별 거래량을 [저가, 고가]에 균등 분포시켰을 때 points 이하에 놓인 누적 거래량
+
+    F(x) = Σ v·clip((x-l)/(h-l), 0, 1) 을 저가/고가 정렬 후 누적합으로 계산하므로
+    points 개수와 일수에 대해 O((n + m) log n) 입니다. 저가와 고가가 같은 날은
+    해당 가격에 거래량 전체가 놓인 것으로 처리합니다.
+    """
+    width = high - low
+    spread = width > 0
+
+    def ramp(start, weight, weight_start):
+        # Σ_{start < x} weight·(x - start) = x·Σweight - Σweight·start
+        order = np.argsort(start)
+        start = start[order]
+        cum_w = np.concatenate([[0.0], np.cumsum(weight[order])])
+        cum_ws = np.concatenate([[0.0], np.cumsum(weight_start[order])])
+        idx = np.searchsorted(start, points, side='left')
+        return points * cum_w[idx] - cum_ws[idx]
+
+    l, h, v, w = low[spread], high[spread], volume[spread], width[spread]
+    slope = v / w
+    cdf = ramp(l, slope, slope * l) - ramp(h, slope, slope * h)
+
+    # 저가 = 고가인 날: 해당 가격 이상에서 계단형으로 누적
+    if (~spread).any():
+        point_price = np.sort(low[~spread])
+        point_volume = np.concatenate([[0.0], np.cumsum(volume[~spread][np.argsort(low[~spread])])])
+        cdf = cdf + point_volume[np.searchsorted(point_price, points, side='right')]
+    return cdf
+
+
+def weighted_silverman_bandwidth(prices: np.ndarray, weights: np.ndarray) -> float:
+    """
+    거래량 가중 Silverman 규칙 대역폭
+
+    h = 0.9 · min(표준편차, IQR/1.34) · n_eff^(-1/5), n_eff = (Σw)² / Σw²
+
+    Args:
+        prices: 가격 배열 (보통 일별 (고가+저가)/2)
+        weights: 가중치 배열 (거래량)
+
+    Returns:
+        float: 대역폭 (원), 계산할 수 없으면 0
+    """
+    weights = np.asarray(weights, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    total = weights.sum()
+    if total <= 0 or len(prices) < 2:
+        return 0.0
+
+    mean = np.dot(weights, prices) / total
+    std = np.sqrt(np.dot(weights, (prices - mean) ** 2) / total)
+
+    order = np.argsort(prices)
+    cum = np.cumsum(weights[order]) / total
+    q1, q3 = np.interp([0.25, 0.75], cum, prices[order])
+    iqr = (q3 - q1) / 1.34
+    spread = min(std, iqr) if iqr > 0 else std
+
+    n_eff = total ** 2 / np.dot(weights, weights)
+    return float(0.9 * spread * n_eff ** (-0.2))
+
+
+def volume_weighted_quantiles(low: np.ndarray, high: np.ndarray, volume: np.ndarray,
+                              quantiles) -> np.ndarray:
+    """
+    일별 거래량을 [저가, 고가]에 균등 분포시킨 거래량 분포의 분위수
+
+    누적 거래량 F(x)는 저가/고가 사이에서 선형이므로 저가·고가 지점에서만 계산해
+    선형 보간으로 역함수를 구합니다 (O(n log n)).
+
+    Args:
+        low: 일별 저가 배열
+        high: 일별 고가 배열
+        volume: 일별 거래량 배열
+        quantiles: 분위 (0~1)
+
+    Returns:
+        ndarray: 분위수 가격
+    """
+    points = np.unique(np.concatenate([low, high]))
+    cdf = _uniform_mass_cdf(low, high, volume, points)
+    total = cdf[-1]
+    return np.interp(np.asarray(quantiles, dtype=float) * total, cdf, points)
+
+
+def freedman_diaconis_num_ranges(low: np.ndarray, high: np.ndarray, volume: np.ndarray,
+                                 min_ranges: int = AUTO_MIN_RANGES, max_ranges: int = AUTO_MAX_RANGES) -> int:
+    """
+    거래량 가중 Freedman–Diaconis 규칙으로 가격 구간 수 결정
+
+    구간 폭 h = 2 · IQR · n_eff^(-1/3) (IQR은 거래량 분포의 사분위 범위,
+    n_eff = (Σv)² / Σv²) 로, 거래량이 좁은 가격대에 몰린 종목은 구간을 잘게,
+    변동이 크거나 기간이 짧은 종목은 구간을 굵게 나눕니다.
+
+    Args:
+        low: 일별 저가 배열
+        high: 일별 고가 배열
+        volume: 일별 거래량 배열
+        min_ranges: 최소 구간 수
+        max_ranges: 최대 구간 수
+
+    Returns:
+        int: 가격 구간 수 (계산할 수 없으면 min_ranges)
+    """
+    low = np.asarray(low, dtype=float)
+    high = np.asarray(high, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    valid = np.isfinite(low) & np.isfinite(high) & (volume > 0)
+    low, high, volume = low[valid], high[valid], volume[valid]
+    if len(volume) < 2:
+        return min_ranges
+
+    q1, q3 = volume_weighted_quantiles(low, high, volume, [0.25, 0.75])
+    n_eff = volume.sum() ** 2 / np.dot(volume, volume)
+    width = 2 * (q3 - q1) * n_eff ** (-1 / 3)
+    price_span = high.max() - low.min()
+    if width <= 0 or price_span <= 0:
+        return min_ranges
+    return int(np.clip(np.ceil(price_span / width), min_ranges, max_ranges))
+
+
+def volume_kde(low: np.ndarray, high: np.ndarray, volume: np.ndarray, grid_size: int = 512,
+               bandwidth: Optional[float] = None) -> pd.DataFrame:
+    """
+    거래량 가중 커널 밀도 추정 (FFT 합성곱)
+
+    일별 거래량을 저가~고가 사이에 균등하게 나누어 고운 격자에 정확히 배분한 뒤
+    가우시안 커널과의 합성곱을 FFT로 계산합니다. 격자 배분은 정렬 한 번과
+    searchsorted로 끝나고, 평활화는 일수와 무관하게 O(grid log grid) 입니다.
+    구간 경계가 없으므로 구간 수를 바꿔도 결과가 튀지 않습니다.
+
+    Args:
+        low: 일별 저가 배열
+        high: 일별 고가 배열
+        volume: 일별 거래량 배열
+        grid_size: 가격 격자 점 수
+        bandwidth: 커널 대역폭 (원), None이면 거래량 가중 Silverman 규칙 사용
+
+    Returns:
+        DataFrame: 격자 가격별 거래량 밀도
+            - price: 격자 가격
+            - volume_density: 원당 거래량
+            - density: 합이 1이 되도록 정규화한 확률 밀도
+          attrs['bandwidth'], attrs['grid_step']에 사용한 대역폭과 격자 간격 저장
+    """
+    low = np.asarray(low, dtype=float)
+    high = np.asarray(high, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    valid = np.isfinite(low) & np.isfinite(high) & np.isfinite(volume)
+    low, high, volume = low[valid], high[valid], volume[valid]
+    if len(volume) == 0:
+        raise ValueError("밀도를 추정할 데이터가 없습니다.")
+
+    price_min, price_max = low.min(), high.max()
+    span = price_max - price_min
+    if bandwidth is None:
+        bandwidth = weighted_silverman_bandwidth((low + high) / 2, volume)
+    # 격자 간격의 2배보다 좁은 대역폭은 격자에서 표현되지 않음
+    bandwidth = max(float(bandwidth), 2 * span / grid_size if span > 0 else 1.0)
+
+    # 커널 꼬리가 잘리지 않도록 양쪽으로 3 대역폭만큼 격자 확장
+    grid_min = price_min - 3 * bandwidth
+    grid_max = price_max + 3 * bandwidth
+    step = (grid_max - grid_min) / grid_size
+    edges = grid_min + step * np.arange(grid_size + 1)
+    mass = np.diff(_uniform_mass_cdf(low, high, volume, edges))
+
+    # 순환 합성곱이 반대편으로 넘어가지 않도록 커널 폭만큼 0을 덧붙여 FFT
+    pad = int(np.ceil(4 * bandwidth / step))
+    n_fft = 1 << int(np.ceil(np.log2(grid_size + pad)))
+    freq = np.fft.rfftfreq(n_fft, d=step)
+    kernel_hat = np.exp(-0.5 * (2 * np.pi * freq * bandwidth) ** 2)
+    smoothed = np.fft.irfft(np.fft.rfft(mass, n_fft) * kernel_hat, n_fft)
+    smoothed = np.clip(smoothed[:grid_size], 0, None)
+
+    volume_density = smoothed / step
+    total = smoothed.sum()
+    kde = pd.DataFrame({
+        'price': (edges[:-1] + edges[1:]) / 2,
+        'volume_density': volume_density,
+        'density': volume_density / total if total > 0 else volume_density,
+    })
+    kde.attrs['bandwidth'] = bandwidth
+    kde.attrs['grid_step'] = float(step)
+    return kde
+
+
+def kde_density_zones(kde_df: pd.DataFrame, top_n: int = 5, threshold_ratio: float = 1.0) -> pd.DataFrame:
+    """
+    연속 밀도 곡선에서 밀집 구간 추출
+
+    Args:
+        kde_df: volume_kde 결과
+        top_n: 반환할 밀집 구간 수
+        threshold_ratio: 고밀도 판정 기준 (평균 밀도 대비 배수)
+
+    Returns:
+        DataFrame: 강도 내림차순으로 정렬된 밀집 구간 (extract_zones와 같은 컬럼)
+    """
+    price = kde_df['price'].values
+    half_step = kde_df.attrs.get('grid_step', np.diff(price).mean() if len(price) > 1 else 0) / 2
+    # 곡선이 이미 매끄러우므로 추가 평활화 없이 고밀도 영역만 병합
+    return extract_zones(price - half_step, price + half_step,
+                         kde_df['volume_density'].values * half_step * 2,
+                         top_n=top_n, smooth_window=1, threshold_ratio=threshold_ratio)
+
+
+def kde_support_resistance(kde_df: pd.DataFrame, current_price: float, max_levels: int = 3) -> Dict:
+    """
+    연속 밀도 곡선의 봉우리로 지지선/저항선 추출
+
+    Args:
+        kde_df: volume_kde 결과
+        current_price: 현재가
+        max_levels: 지지선/저항선 각각 최대 개수
+
+    Returns:
+        Dict: 지지선/저항선 정보 (각 레벨은 price, density, strength 포함)
+    """
+    price = kde_df['price'].values
+    density = kde_df['density'].values
+    peaks, _ = find_local_extrema(density)
+    peak_max = density[peaks].max() if len(peaks) else 0
+
+    def levels(mask):
+        candidates = peaks[mask]
+        chosen = candidates[top_n_indices(density[candidates], max_levels)]
+        return [{'price': float(price[i]), 'density': float(density[i]),
+                 'strength': float(density[i] / peak_max) if peak_max > 0 else 0.0}
+                for i in chosen]
+
+    below = price[peaks] < current_price
+    return {
+        'support_levels': levels(below),
+        'resistance_levels': levels(~below),
+        'current_price': current_price,
+        'analysis_period': "연속 밀도(KDE)",
+        'bandwidth': kde_df.attrs.get('bandwidth')
+    }
+
+
+class MultiResolutionProfile:
+    """
+    한 번 계산해 두고 구간 수만 바꿔 즉시 재구간화하는 가격 구간 프로파일
+
+    calculate_price_ranges는 저가~고가가 구간과 겹치는 날의 거래량 전체를 그 구간에
+    더합니다. 이 정의에서는 어떤 구간 [a, b]의 거래량이
+
+        전체 거래량 - (고가 < a 인 날의 거래량) - (저가 > b 인 날의 거래량)
+
+    으로 정확히 분해되므로, 저가/고가를 한 번 정렬해 누적 거래량을 만들어 두면
+    임의의 구간 경계에 대해 searchsorted만으로 결과를 얻습니다. 고운 기본 해상도를
+    합쳐서 근사하는 방식과 달리 경계가 맞지 않는 구간 수에서도 보간이 필요 없고,
+    재구간화 비용은 일수와 무관하게 O(구간 수 · log 일수) 입니다.
+    """
+
+    def __init__(self, low: np.ndarray, high: np.ndarray, volume: np.ndarray):
+        """
+        Args:
+            low: 일별 저가 배열
+            high: 일별 고가 배열
+            volume: 일별 거래량 배열
+        """
+        low = np.asarray(low, dtype=float)
+        high = np.asarray(high, dtype=float)
+        volume = np.asarray(volume)
+        valid = np.isfinite(low) & np.isfinite(high)
+        low, high, volume = low[valid], high[valid], volume[valid]
+
+        low_order = np.argsort(low, kind='stable')
+        high_order = np.argsort(high, kind='stable')
+        self._low_sorted = low[low_order]
+        self._high_sorted = high[high_order]
+        self._low_cum_volume = np.concatenate([[0], np.cumsum(volume[low_order])])
+        self._high_cum_volume = np.concatenate([[0], np.cumsum(volume[high_order])])
+
+        self.days = len(volume)
+        self.total_volume = self._low_cum_volume[-1]
+        self.price_min = self._low_sorted[0] if self.days else np.nan
+        self.price_max = self._high_sorted[-1] if self.days else np.nan
+
+    def overlap_totals(self, edges: np.ndarray):
+        """
+        연속된 구간 경계에 대해 구간별 거래량 합계와 일수 계산
+
+        Args:
+            edges: 오름차순 구간 경계 배열 (구간 수 + 1개)
+
+        Returns:
+            Tuple[ndarray, ndarray]: (구간별 거래량 합계, 구간별 일수)
+        """
+        edges = np.asarray(edges, dtype=float)
+        starts, ends = edges[:-1], edges[1:]
+
+        # 고가 < 구간 시작 인 날 (구간보다 아래에 있는 날)
+        below = np.searchsorted(self._high_sorted, starts, side='left')
+        # 저가 > 구간 끝 인 날 (구간보다 위에 있는 날)
+        not_above = np.searchsorted(self._low_sorted, ends, side='right')
+
+        volume = self._low_cum_volume[not_above] - self._high_cum_volume[below]
+        days = not_above - below
+        return volume, days
+
+    def rebin(self, num_ranges: int = 20) -> pd.DataFrame:
+        """
+        최저가~최고가를 num_ranges개 균등 구간으로 나눈 프로파일
+
+        Args:
+            num_ranges: 가격 구간 수
+
+        Returns:
+            DataFrame: calculate_price_ranges와 같은 컬럼의 가격 구간별 거래량 정보
+        """
+        edges = np.linspace(self.price_min, self.price_max, num_ranges + 1)
+        return self.profile_for_edges(edges)
+
+    def profile_for_edges(self, edges: np.ndarray) -> pd.DataFrame:
+        """
+        임의의 구간 경계에 대한 프로파일
+
+        Args:
+            edges: 오름차순 구간 경계 배열
+
+        Returns:
+            DataFrame: calculate_price_ranges와 같은 컬럼의 가격 구간별 거래량 정보
+        """
+        edges = np.asarray(edges, dtype=float)
+        volume, days = self.overlap_totals(edges)
+        range_start, range_end = edges[:-1], edges[1:]
+        width = range_end - range_start
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_volume = np.where(days > 0, volume / np.maximum(days, 1), 0)
+            volume_density = np.where(width != 0, volume / np.where(width != 0, width, 1), 0)
+
+        return pd.DataFrame({
+            'range_start': range_start,
+            'range_end': range_end,
+            'range_center': (range_start + range_end) / 2,
+            'total_volume': volume,
+            'days_count': days,
+            'avg_volume': avg_volume,
+            'volume_density': volume_density
+        })
+
+
+def _batch_bin_edges(price_min: np.ndarray, price_max: np.ndarray, num_ranges: int) -> np.ndarray:
+    """행별 np.linspace(price_min, price_max, num_ranges + 1)와 같은 구간 경계 (N, num_ranges + 1)"""
+    step = (price_max - price_min) / num_ranges
+    edges = price_min[:, None] + step[:, None] * np.arange(num_ranges + 1)
+    edges[:, -1] = price_max
+    return edges
+
+
+def batch_price_profiles(low: np.ndarray, high: np.ndarray, volume: np.ndarray,
+                         num_ranges: int = 20) -> Dict[str, np.ndarray]:
+    """
+    여러 종목의 가격 구간 프로파일을 한 번의 벡터 연산으로 계산
+
+    (종목 수 N x 일수 D) 배열을 받아 종목마다 자기 최저가~최고가를 num_ranges개
+    구간으로 나눈 가격 공간으로 정규화하고, 일별 저가~고가가 겹치는 구간 범위의
+    시작/끝에 +거래량/-거래량을 기록한 차분 배열을 bincount 한 번으로 만든 뒤
+    누적합을 취합니다. 종목별 파이썬 호출 없이 O(N·D + N·구간 수) 이므로
+    전 종목 스캔이 메모리 대역폭에 묶입니다.
+
+    상장 기간이 달라 길이가 다른 종목은 NaN으로 채워 넘기면 해당 칸은 무시합니다.
+    결과는 종목별 calculate_price_ranges(num_ranges)의 total_volume, days_count와 같습니다.
+
+    Args:
+        low: 저가 배열 (N, D)
+        high: 고가 배열 (N, D)
+        volume: 거래량 배열 (N, D)
+        num_ranges: 가격 구간 수
+
+    Returns:
+        Dict: 'range_start', 'range_end', 'total_volume', 'days_count' (각각 N x num_ranges)
+    """
+    low = np.atleast_2d(np.asarray(low, dtype=float))
+    high = np.atleast_2d(np.asarray(high, dtype=float))
+    volume = np.atleast_2d(np.asarray(volume, dtype=float))
+    rows = low.shape[0]
+
+    valid = np.isfinite(low) & np.isfinite(high) & np.isfinite(volume)
+    weight = np.where(valid, volume, 0.0)
+    with np.errstate(invalid='ignore'):
+        price_min = np.nanmin(np.where(valid, low, np.nan), axis=1)
+        price_max = np.nanmax(np.where(valid, high, np.nan), axis=1)
+    edges = _batch_bin_edges(price_min, price_max, num_ranges)
+
+    # 구간 번호 추정 후 실제 경계와 비교해 한 칸씩 보정 (np.linspace 경계와 정확히 일치)
+    step = (price_max - price_min)[:, None] / num_ranges
+    safe_step = np.where(step > 0, step, 1.0)
+    low_filled = np.where(valid, low, price_min[:, None])
+    high_filled = np.where(valid, high, price_min[:, None])
+    last = num_ranges - 1
+
+    # 첫 구간: 구간 끝 >= 저가 인 첫 번째 구간
+    first_bin = np.clip(np.floor((low_filled - price_min[:, None]) / safe_step), 0, last).astype(np.intp)
+    first_bin -= (first_bin > 0) & (np.take_along_axis(edges, first_bin, axis=1) >= low_filled)
+    first_bin += (first_bin < last) & (np.take_along_axis(edges, first_bin + 1, axis=1) < low_filled)
+
+    # 마지막 구간: 구간 시작 <= 고가 인 마지막 구간
+    last_bin = np.clip(np.floor((high_filled - price_min[:, None]) / safe_step), 0, last).astype(np.intp)
+    last_bin -= (last_bin > 0) & (np.take_along_axis(edges, last_bin, axis=1) > high_filled)
+    last_bin += (last_bin < last) & (np.take_along_axis(edges, last_bin + 1, axis=1) <= high_filled)
+    # 최저가 = 최고가인 종목은 모든 구간 경계가 같으므로 모든 구간에 포함
+    last_bin = np.where(step > 0, last_bin, last)
+
+    size = rows * (num_ranges + 1)
+    row_offset = (np.arange(rows) * (num_ranges + 1))[:, None]
+    enter = (row_offset + first_bin).ravel()
+    leave = (row_offset + last_bin + 1).ravel()
+    counted = valid.ravel().astype(float)
+
+    total_volume = (np.bincount(enter, weights=weight.ravel(), minlength=size)
+                    - np.bincount(leave, weights=weight.ravel(), minlength=size))
+    days_count = (np.bincount(enter, weights=counted, minlength=size)
+                  - np.bincount(leave, weights=counted, minlength=size))
+
+    return {
+        'range_start': edges[:, :-1],
+        'range_end': edges[:, 1:],
+        'total_volume': np.cumsum(total_volume.reshape(rows, -1), axis=1)[:, :num_ranges],
+        'days_count': np.rint(np.cumsum(days_count.reshape(rows, -1), axis=1)[:, :num_ranges]).astype(np.int64)
+    }
+
+
+def stack_ohlcv(data_by_symbol: Dict[str, pd.DataFrame], days: Optional[int] = None,
+                columns=('Low', 'High', 'Close', 'Volume')):
+    """
+    종목별 OHLCV를 오른쪽(최근일) 기준으로 맞춘 (N x D) 배열로 쌓기
+
+    최근 일자가 같은 열에 오도록 정렬하고 데이터가 짧은 종목의 앞부분은 NaN으로 채웁니다.
+
+    Args:
+        data_by_symbol: 종목 코드별 OHLCV 데이터
+        days: 사용할 최근 일수 (None이면 가장 긴 종목 기준)
+        columns: 쌓을 컬럼
+
+    Returns:
+        Tuple[List[str], Dict[str, ndarray]]: (종목 코드 목록, 컬럼별 (N, D) 배열)
+    """
+    symbols = list(data_by_symbol)
+    if days is None:
+        days = max((len(data) for data in data_by_symbol.values()), default=0)
+
+    stacked = {column: np.full((len(symbols), days), np.nan) for column in columns}
+    for i, symbol in enumerate(symbols):
+        tail = data_by_symbol[symbol].tail(days)
+        for column in columns:
+            stacked[column][i, days - len(tail):] = tail[column].to_numpy(dtype=float)
+    return symbols, stacked
+
+
+# 지지선/저항선 터치 계산 단위 (calculate_support_resistance와 동일한 1000원 단위)
+TOUCH_UNIT = 1000
+# calculate_support_resistance가 후보로 보는 터치 상위 개수
+TOUCH_CANDIDATES = 20
+
+
+def batch_touch_counts(low: np.ndarray, high: np.ndarray, unit: int = TOUCH_UNIT):
+    """
+    여러 종목(또는 여러 기간)의 가격대별 터치 횟수를 한 번에 계산
+
+    calculate_support_resistance와 같이 일별 저가~고가를 unit원 단위 가격대로 내려
+    포함되는 가격대마다 터치 1회를 더합니다. 행마다 자기 최저 가격대를 기준으로
+    차분 배열을 만들어 bincount로 집계하므로 가격 수준이 크게 다른 종목도 함께
+    처리할 수 있습니다. NaN 칸은 무시합니다.
+
+    Args:
+        low: 저가 배열 (N, D)
+        high: 고가 배열 (N, D)
+        unit: 가격대 단위 (원)
+
+    Returns:
+        Tuple[ndarray, ndarray, ndarray]: (행별 첫 가격대 가격 (N,), 터치 횟수 (N, B),
+            가격대를 처음 터치한 날 번호 (N, B), 터치가 없으면 D)
+            j번째 가격대 가격은 base_price + j * unit
+    """
+    low = np.atleast_2d(np.asarray(low, dtype=float))
+    high = np.atleast_2d(np.asarray(high, dtype=float))
+    rows = low.shape[0]
+    valid = np.isfinite(low) & np.isfinite(high)
+
+    low_bucket = np.floor(np.where(valid, low, np.nan) / unit)
+    high_bucket = np.floor(np.where(valid, high, np.nan) / unit)
+    with np.errstate(invalid='ignore'):
+        base = np.nan_to_num(np.nanmin(low_bucket, axis=1)).astype(np.int64)
+        top = np.nan_to_num(np.nanmax(high_bucket, axis=1)).astype(np.int64)
+    buckets = int(max((top - base).max(initial=0), 0)) + 1
+
+    low_index = np.where(valid, np.nan_to_num(low_bucket) - base[:, None], 0).astype(np.intp)
+    high_index = np.where(valid, np.nan_to_num(high_bucket) - base[:, None], 0).astype(np.intp)
+    counted = valid.ravel().astype(float)
+
+    size = rows * (buckets + 1)
+    row_offset = (np.arange(rows) * (buckets + 1))[:, None]
+    diff = (np.bincount((row_offset + low_index).ravel(), weights=counted, minlength=size)
+            - np.bincount((row_offset + high_index + 1).ravel(), weights=counted, minlength=size))
+    touches = np.rint(np.cumsum(diff.reshape(rows, -1), axis=1)[:, :buckets]).astype(np.int64)
+
+    # 일별 [저가대, 고가대]를 (행, 날짜) 순서로 펼쳐 가격대마다 처음 나타난 날 (동점 정렬 기준)
+    days = low.shape[1]
+    widths = np.where(valid, high_index - low_index + 1, 0).ravel()
+    starts = np.cumsum(widths) - widths
+    cells = np.repeat(np.arange(widths.size), widths)
+    flat = ((cells // days) * buckets + low_index.ravel()[cells]
+            + np.arange(widths.sum()) - np.repeat(starts, widths))
+    seen, first_index = np.unique(flat, return_index=True)
+    first_touch = np.full(rows * buckets, days, dtype=np.int64)
+    first_touch[seen] = cells[first_index] % days
+    return base * unit, touches, first_touch.reshape(rows, buckets)
+
+
+def select_support_resistance(base_price: np.ndarray, touches: np.ndarray, first_touch: np.ndarray,
+                              current_price: np.ndarray, min_touches: int = 3, max_levels: int = 3,
+                              unit: int = TOUCH_UNIT) -> Dict[str, np.ndarray]:
+    """
+    터치 횟수 배열에서 calculate_support_resistance 규칙으로 지지선/저항선 선택
+
+    터치 횟수 상위 20개 가격대 중 min_touches 이상인 것을 현재가 아래(지지)/이상(저항)으로
+    나누고 각각 터치 순으로 max_levels개까지 남깁니다. 터치 횟수가 같으면 처음 터치된 날이
+    빠른 가격대가, 같은 날이면 낮은 가격대가 먼저 옵니다. batch_touch_counts 결과를 재사용하면
+    최소 터치/최대 개수만 바꿔 여러 번 선택해도 터치 계산을 반복하지 않습니다.
+
+    Args:
+        base_price: batch_touch_counts의 행별 첫 가격대 가격 (N,)
+        touches: batch_touch_counts의 터치 횟수 (N, B)
+        first_touch: batch_touch_counts의 가격대별 처음 터치한 날 번호 (N, B)
+        current_price: 행별 현재가 (N,)
+        min_touches: 최소 터치 횟수
+        max_levels: 지지선/저항선 각각 최대 개수
+        unit: 가격대 단위 (원)
+
+    Returns:
+        Dict: 선택된 레벨을 펼친 배열 'row', 'price', 'touches', 'is_support'
+    """
+    current_price = np.asarray(current_price, dtype=float).reshape(-1)
+
+    order = np.lexsort((first_touch, -touches), axis=-1)[:, :TOUCH_CANDIDATES]
+    cand_touches = np.take_along_axis(touches, order, axis=1)
+    cand_price = base_price[:, None] + order * unit
+    valid = cand_touches >= min_touches
+    below = cand_price < current_price[:, None]
+
+    # 지지/저항 각각 터치 순서대로 max_levels개까지
+    support_rank = np.cumsum(valid & below, axis=1)
+    resistance_rank = np.cumsum(valid & ~below, axis=1)
+    keep = valid & (np.where(below, support_rank, resistance_rank) <= max_levels)
+    row, pos = np.nonzero(keep)
+
+    return {
+        'row': row,
+        'price': cand_price[row, pos].astype(float),
+        'touches': cand_touches[row, pos],
+        'is_support': below[row, pos]
+    }
+
+
+def batch_support_resistance(low: np.ndarray, high: np.ndarray, current_price: np.ndarray,
+                             min_touches: int = 3, max_levels: int = 3,
+                             unit: int = TOUCH_UNIT) -> Dict[str, np.ndarray]:
+    """
+    여러 행의 지지선/저항선을 calculate_support_resistance 규칙으로 한 번에 선택
+
+    Args:
+        low: 저가 배열 (N, D), 각 행은 분석 기간(최근 analysis_days일)
+        high: 고가 배열 (N, D)
+        current_price: 행별 현재가 (N,)
+        min_touches: 최소 터치 횟수
+        max_levels: 지지선/저항선 각각 최대 개수
+        unit: 가격대 단위 (원)
+
+    Returns:
+        Dict: 선택된 레벨을 펼친 배열 'row', 'price', 'touches', 'is_support'
+    """
+    base_price, touches, first_touch = batch_touch_counts(low, high, unit)
+    return select_support_resistance(base_price, touches, first_touch, current_price, min_touches,
+                                     max_levels, unit)
+
+
+def anchored_profiles(low: np.ndarray, high: np.ndarray, volume: np.ndarray, anchors,
+                      num_ranges: int = 20, close: Optional[np.ndarray] = None) -> Dict:
+    """
+    여러 기준일(앵커)부터 마지막 날까지의 가격 구간 프로파일을 한 번에 계산
+
+    모든 앵커가 마지막 날까지 이어지므로 가장 이른 앵커의 최저가~최고가로 만든
+    공통 구간 위에서, 인접한 앵커 사이 구간(segment)별 프로파일을 bincount 한 번으로
+    구한 뒤 뒤에서부터 누적합하면 각 앵커의 프로파일이 됩니다. 앵커 수와 무관하게
+    전체 이력을 한 번만 훑고, 데이터를 다시 가져오거나 잘라내지 않습니다.
+    거래량 가중 평균가(앵커 VWAP)도 같은 방식으로 함께 계산합니다.
+
+    Args:
+        low: 일별 저가 배열
+        high: 일별 고가 배열
+        volume: 일별 거래량 배열
+        anchors: 앵커 위치(0부터 시작하는 일 번호) 목록
+        num_ranges: 가격 구간 수
+        close: 일별 종가 배열 (주면 VWAP에 (고가+저가+종가)/3 사용, 없으면 (고가+저가)/2)
+
+    Returns:
+        Dict:
+            - anchors: 정렬된 고유 앵커 위치 (K,)
+            - range_start, range_end: 공통 구간 경계 (num_ranges,)
+            - total_volume, days_count: 앵커별 구간 거래량/일수 (K, num_ranges)
+            - days, volume, vwap, poc_price: 앵커별 일수, 총 거래량, VWAP, 최대 거래량 구간 중심가 (K,)
+    """
+    low = np.asarray(low, dtype=float)
+    high = np.asarray(high, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    anchors = np.unique(np.clip(np.asarray(anchors, dtype=np.intp), 0, len(low) - 1))
+    if len(anchors) == 0:
+        raise ValueError("앵커를 하나 이상 지정해야 합니다.")
+
+    first = anchors[0]
+    edges = np.linspace(low[first:].min(), high[first:].max(), num_ranges + 1)
+    last = num_ranges - 1
+
+    # calculate_price_ranges와 같은 겹침 규칙: 저가 <= 구간 끝, 고가 >= 구간 시작
+    days = np.arange(first, len(low))
+    first_bin = np.clip(np.searchsorted(edges[1:], low[first:], side='left'), 0, last)
+    last_bin = np.clip(np.searchsorted(edges[:-1], high[first:], side='right') - 1, 0, last)
+    if edges[0] == edges[-1]:
+        first_bin[:], last_bin[:] = 0, last
+
+    segment = np.searchsorted(anchors, days, side='right') - 1
+    count = len(anchors)
+    size = count * (num_ranges + 1)
+    enter = segment * (num_ranges + 1) + first_bin
+    leave = segment * (num_ranges + 1) + last_bin + 1
+    vol = volume[first:]
+
+    def suffix(values):
+        # 앵커 k의 값 = 구간(segment) k, k+1, ... 의 합
+        return np.cumsum(values[::-1], axis=0)[::-1]
+
+    segment_volume = np.cumsum((np.bincount(enter, weights=vol, minlength=size)
+                                - np.bincount(leave, weights=vol, minlength=size)).reshape(count, -1),
+                               axis=1)[:, :num_ranges]
+    segment_days = np.cumsum((np.bincount(enter, minlength=size)
+                              - np.bincount(leave, minlength=size)).reshape(count, -1),
+                             axis=1)[:, :num_ranges]
+
+    if close is not None:
+        typical = (high[first:] + low[first:] + np.asarray(close, dtype=float)[first:]) / 3
+    else:
+        typical = (high[first:] + low[first:]) / 2
+    total_volume = suffix(segment_volume)
+    anchored_volume = suffix(np.bincount(segment, weights=vol, minlength=count))
+    anchored_value = suffix(np.bincount(segment, weights=vol * typical, minlength=count))
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vwap = np.where(anchored_volume > 0, anchored_value / anchored_volume, np.nan)
+
+    return {
+        'anchors': anchors,
+        'range_start': edges[:-1],
+        'range_end': edges[1:],
+        'total_volume': total_volume,
+        'days_count': suffix(segment_days),
+        'days': len(low) - anchors,
+        'volume': anchored_volume,
+        'vwap': vwap,
+        'poc_price': centers[total_volume.argmax(axis=1)]
+    }
+
+
+def suggest_anchors(data: pd.DataFrame, gap_pct: float = 0.03, max_gaps: int = 3,
+                    high_window: int = 250) -> pd.DataFrame:
+    """
+    자주 쓰는 앵커 후보 찾기 (최근 52주 최고가/최저가 일, 큰 갭 발생일)
+
+    Args:
+        data: OHLCV 데이터 (Open, High, Low, Close 컬럼)
+        gap_pct: 갭으로 볼 시가/전일 종가 변화율
+        max_gaps: 갭 후보 최대 개수 (갭 크기 순)
+        high_window: 최고가/최저가를 볼 최근 일수 (기본 약 52주)
+
+    Returns:
+        DataFrame: date, position, reason
+    """
+    candidates = []
+    recent = data.tail(high_window)
+    offset = len(data) - len(recent)
+    candidates.append((offset + int(np.argmax(recent['High'].values)), "52주 최고가"))
+    candidates.append((offset + int(np.argmin(recent['Low'].values)), "52주 최저가"))
+
+    if 'Open' in data and len(data) > 1:
+        gap = data['Open'].values[1:] / data['Close'].values[:-1] - 1
+        gap_days = np.flatnonzero(np.abs(gap) >= gap_pct)
+        for i in gap_days[top_n_indices(np.abs(gap[gap_days]), max_gaps)]:
+            candidates.append((int(i) + 1, f"갭 {'상승' if gap[i] > 0 else '하락'} {gap[i] * 100:+.1f}%"))
+
+    anchors = pd.DataFrame(candidates, columns=['position', 'reason'])
+    anchors = anchors.drop_duplicates('position').sort_values('position', ignore_index=True)
+    anchors.insert(0, 'date', data.index[anchors['position'].values])
+    return anchors
@@ -0,0 +1,206 @@
+"""
+장 시작 전/마감 후 캐시 예열 작업
+인기 종목과 관심 종목의 데이터를 미리 가져와 공용 데이터 캐시에 넣고, 자주 쓰는 기간의
+분석 결과를 공용 결과 보관소에 저장해 두어 그날 첫 사용자도 캐시된 결과를 받도록 하는 모듈
+
+사용 예:
+    python warmup.py --once                        # 지금 한 번 실행
+    python warmup.py --at 08:00 --at 16:00         # 거래일 08:00, 16:00마다 실행 (중단할 때까지)
+    python warmup.py --watchlist watchlist.txt --no-popular --workers 4
+"""
+
+import os
+
+# 분석기(matplotlib) 불러오기 전에 비대화형 백엔드 지정
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+import cli
+import data_cache
+import result_cache
+import trading_calendar
+# 데이터 캐시에 미리 넣을 기간은 웹 UI가 종목마다 가져오는 전체 기간과 같게 (짧은 기간은 여기서 잘라 씀)
+from analysis_worker import HISTORY_DAYS
+from stock_lists import POPULAR_STOCKS
+
+# 분석 결과를 미리 계산할 기간 (일, 명령행/서비스 요청의 기본 기간)
+WARMUP_PERIODS = [365]
+# 기본 실행 시각 (장 시작 전, 장 마감 후 일봉 확정 뒤)
+DEFAULT_TIMES = ['08:00', '16:00']
+
+
+def load_watchlist(path: str) -> List[str]:
+    """
+    관심 종목 파일 읽기
+
+    한 줄에 종목 코드 하나 (코드 뒤에 공백/쉼표로 종목명을 붙여도 됨, # 뒤는 주석)
+
+    Returns:
+        List[str]: 종목 코드 목록
+    """
+    symbols = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                symbols.append(line.replace(',', ' ').split()[0])
+    return symbols
+
+
+def _warm_symbol(args) -> List[Dict]:
+    """프로세스 풀 작업 단위 (종목 하나 예열)"""
+    symbol, end_date, history_days, periods = args
+    # 예열은 최신 데이터를 넣는 작업이므로 저장된 데이터를 대신 쓰지 않음
+    data_cache.set_max_stale(0)
+    session = cli.AnalysisSession()
+    store = result_cache.default_result_store()
+    rows = []
+
+    # 가장 긴 기간을 한 번 가져와 데이터 캐시에 넣으면 아래 기간별 분석은 캐시에서 잘라 씀
+    started = time.perf_counter()
+    history_start = (datetime.strptime(end_date, '%Y-%m-%d')
+                     - timedelta(days=history_days)).strftime('%Y-%m-%d')
+    fetched = session.get_analyzer(symbol, history_start, end_date) is not None
+    rows.append({'symbol': symbol, 'days': history_days, 'kind': 'data', 'ok': fetched,
+                 'seconds': time.perf_counter() - started})
+    if not fetched:
+        return rows
+
+    for days in periods:
+        started = time.perf_counter()
+        symbol, start_date, end_date, options = cli.parse_request(
+            {'symbol': symbol, 'days': days, 'end_date': end_date}
+        )
+        result = session.analyze(symbol, start_date, end_date, **options)
+        ok = 'error' not in result
+        # 데이터 소스 실패로 예전 데이터를 쓴 결과는 보관하지 않음
+        if ok and store is not None and 'data_age' not in result:
+            key = cli.request_key(symbol, start_date, end_date, options)
+            result['key'] = key
+            store.put(key, end_date, cli.to_json(result))
+        rows.append({'symbol': symbol, 'days': days, 'kind': 'result', 'ok': ok,
+                     'seconds': time.perf_counter() - started})
+    return rows
+
+
+def run_warmup(symbols: Iterable[str], periods: Iterable[int] = WARMUP_PERIODS,
+               history_days: int = HISTORY_DAYS, end_date: Optional[str] = None,
+               max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    종목들을 병렬로 예열
+
+    Args:
+        symbols: 종목 코드 목록
+        periods: 분석 결과를 미리 계산할 기간 목록 (일)
+        history_days: 데이터 캐시에 넣을 기간 (일)
+        end_date: 종료 날짜 (None이면 한국 시각 기준 오늘, 서비스/웹 UI의 기본 종료일과 같음)
+        max_workers: 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 순차 실행)
+
+    Returns:
+        DataFrame: symbol, days, kind('data'/'result'), ok, seconds
+    """
+    end_date = end_date or trading_calendar.now_kst().strftime('%Y-%m-%d')
+    periods = list(periods)
+    tasks = [(symbol, end_date, history_days, periods) for symbol in dict.fromkeys(symbols)]
+
+    if max_workers == 1 or len(tasks) <= 1:
+        results = [_warm_symbol(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_warm_symbol, tasks))
+
+    rows = [row for symbol_rows in results for row in symbol_rows]
+    return pd.DataFrame(rows, columns=['symbol', 'days', 'kind', 'ok', 'seconds'])
+
+
+def next_run(now: datetime, times: List[str]) -> datetime:
+    """
+    now 이후 가장 가까운 거래일 실행 시각 (주말과 KRX 휴장일 제외)
+
+    실행 시각은 서버 시간대와 관계없이 한국 시각으로 해석하며, 반환값도 한국 시각(시간대 포함)입니다.
+    """
+    # 휴장일/주말 판단은 한국 날짜로 (시간대 없는 값은 한국 시각으로 간주)
+    now = now.astimezone(trading_calendar.KST) if now.tzinfo else now.replace(tzinfo=trading_calendar.KST)
+    day = now.replace(second=0, microsecond=0)
+    for offset in range(15):
+        date = (day + timedelta(days=offset)).date()
+        if not trading_calendar.is_trading_day(date):
+            continue
+        for at in sorted(times):
+            hour, minute = map(int, at.split(':'))
+            candidate = datetime.combine(date, datetime.min.time(), tzinfo=trading_calendar.KST).replace(
+                hour=hour, minute=minute)
+            if candidate > now:
+                return candidate
+    raise ValueError("실행 시각을 찾을 수 없습니다")
+
+
+def _print_summary(summary: pd.DataFrame, elapsed: float):
+    data_rows = summary[summary['kind'] == 'data']
+    result_rows = summary[summary['kind'] == 'result']
+    print(f"예열 완료: 데이터 {int(data_rows['ok'].sum())}/{len(data_rows)}종목, "
+          f"분석 결과 {int(result_rows['ok'].sum())}/{len(result_rows)}개 ({elapsed:.1f}초)")
+    failed = data_rows.loc[~data_rows['ok'], 'symbol'].tolist()
+    if failed:
+        print(f"  데이터를 가져오지 못한 종목: {', '.join(failed)}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="인기/관심 종목 캐시 예열 (장 시작 전/마감 후)")
+    parser.add_argument('--once', action='store_true', help="지금 한 번만 실행")
+    parser.add_argument('--at', action='append', metavar='HH:MM',
+                        help=f"거래일 실행 시각 (여러 번 지정 가능, 기본 {' '.join(DEFAULT_TIMES)})")
+    parser.add_argument('--watchlist', help="관심 종목 파일 (한 줄에 종목 코드 하나)")
+    parser.add_argument('--symbols', nargs='+', default=[], help="추가 종목 코드")
+    parser.add_argument('--no-popular', action='store_true', help="인기 종목 제외")
+    parser.add_argument('--periods', type=int, nargs='+', default=WARMUP_PERIODS,
+                        help="분석 결과를 미리 계산할 기간 (일)")
+    parser.add_argument('--history-days', type=int, default=HISTORY_DAYS, help="데이터 캐시에 넣을 기간 (일)")
+    parser.add_argument('--workers', type=int, help="프로세스 수 (기본 CPU 수)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if data_cache.cache_dir() is None:
+        print("캐시 디렉터리가 설정되지 않았습니다 (STOCK_DENSITY_CACHE_DIR).", file=sys.stderr)
+        return 1
+
+    symbols = [] if args.no_popular else [code for code in POPULAR_STOCKS.values() if code != 'custom']
+    if args.watchlist:
+        symbols += load_watchlist(args.watchlist)
+    symbols += args.symbols
+    if not symbols:
+        print("예열할 종목이 없습니다.", file=sys.stderr)
+        return 1
+
+    times = args.at or DEFAULT_TIMES
+    print(f"예열 대상: {len(dict.fromkeys(symbols))}종목, 캐시: {data_cache.cache_dir()}")
+    try:
+        while True:
+            if not args.once:
+                run_at = next_run(trading_calendar.now_kst(), times)
+                print(f"다음 예열: {run_at:%Y-%m-%d %H:%M} (KST)")
+                time.sleep(max(0.0, (run_at - trading_calendar.now_kst()).total_seconds()))
+
+            started = time.perf_counter()
+            summary = run_warmup(symbols, periods=args.periods, history_days=args.history_days,
+                                 max_workers=args.workers)
+            _print_summary(summary, time.perf_counter() - started)
+            if args.once:
+                return 0 if summary['ok'].all() else 1
+    except KeyboardInterrupt:
+        print("\n예열 작업을 종료합니다.")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
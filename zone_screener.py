@@ -0,0 +1,283 @@
+"""
+밀집 구간 근접 종목 스크리너
+전 종목의 거래량 밀집 구간과 지지선/저항선을 하나의 구간 인덱스에 모아 두고
+"현재가가 밀집 구간/지지·저항선의 X% 이내인 종목"을 범위 조회로 찾는 모듈
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from volume_profile import batch_price_profiles, batch_support_resistance, stack_ohlcv
+
+
+class ZoneIntervalIndex:
+    """
+    전 종목 밀집 구간/지지·저항선 구간 인덱스
+
+    구간은 (종목 번호, 하단가) 순으로 정렬된 끝점 배열에 저장하고 종목별 시작
+    위치(offsets)를 둡니다. 스크리닝은 각 구간에 자기 종목의 현재가를 offsets로
+    펼쳐 붙인 뒤 [하단, 상단]과 [현재가 x (1 - X%), 현재가 x (1 + X%)]의 겹침을
+    한 번에 판정하므로, 종목마다 분석기를 다시 돌리지 않고 수천 종목을 밀리초
+    단위로 조회합니다. 한 종목의 가격 범위 조회는 그 종목 구간에서 searchsorted로
+    찾습니다.
+    """
+
+    def __init__(self):
+        self._intervals: Dict[str, pd.DataFrame] = {}
+        self._prices: Dict[str, float] = {}
+        self._as_of: Dict[str, str] = {}
+        self._built = None
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._intervals
+
+    def set_symbol(self, symbol: str, intervals: pd.DataFrame, current_price: float, as_of=None):
+        """
+        종목의 구간 목록 교체 (새 일봉이 들어오면 해당 종목만 다시 호출)
+
+        Args:
+            symbol: 종목 코드
+            intervals: kind, low, high, strength 컬럼의 구간 목록 (strength는 구간 종류와 관계없이 비교할
+                       수 있는 0~1 비중, build_zone_index 참고)
+            current_price: 구간을 계산한 시점의 현재가
+            as_of: 구간을 계산한 데이터의 마지막 일자
+        """
+        self.set_arrays(symbol, intervals['kind'].to_numpy(dtype=object), intervals['low'].to_numpy(dtype=float),
+                        intervals['high'].to_numpy(dtype=float), intervals['strength'].to_numpy(dtype=float),
+                        current_price, as_of)
+
+    def set_arrays(self, symbol: str, kind: np.ndarray, low: np.ndarray, high: np.ndarray,
+                   strength: np.ndarray, current_price: float, as_of=None):
+        """set_symbol과 같지만 DataFrame 대신 컬럼 배열을 바로 받음 (대량 적재용)"""
+        self._intervals[symbol] = (kind, low, high, strength)
+        self._prices[symbol] = float(current_price)
+        self._as_of[symbol] = str(as_of) if as_of is not None else ''
+        self._built = None
+
+    def remove(self, symbol: str):
+        """종목 삭제"""
+        self._intervals.pop(symbol, None)
+        self._prices.pop(symbol, None)
+        self._as_of.pop(symbol, None)
+        self._built = None
+
+    def _build(self):
+        """정렬된 끝점 배열 생성 (변경이 있을 때만)"""
+        if self._built is not None:
+            return self._built
+
+        symbols = sorted(self._intervals)
+        columns = list(zip(*(self._intervals[symbol] for symbol in symbols))) or [[], [], [], []]
+        counts = np.array([len(kind) for kind in columns[0]], dtype=np.intp)
+        kind, low, high, strength = (np.concatenate(column) if len(column) else np.empty(0)
+                                     for column in columns)
+
+        symbol_id = np.repeat(np.arange(len(symbols)), counts)
+        order = np.lexsort((low, symbol_id))
+
+        self._built = {
+            'symbols': np.array(symbols, dtype=object),
+            'offsets': np.concatenate([[0], np.cumsum(counts)]).astype(np.intp),
+            'symbol_id': symbol_id[order],
+            'kind': kind.astype(object)[order],
+            'low': low.astype(float)[order],
+            'high': high.astype(float)[order],
+            'strength': strength.astype(float)[order],
+            'price': np.array([self._prices[symbol] for symbol in symbols], dtype=float)
+        }
+        return self._built
+
+    def screen(self, pct: float = 0.02, prices: Optional[Dict[str, float]] = None,
+               kinds: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        현재가가 구간/레벨의 pct 이내인 종목 찾기
+
+        Args:
+            pct: 허용 거리 비율 (0.02면 ±2%)
+            prices: 종목별 현재가 (None이면 인덱스 생성 시점의 종가, 일부만 주면 나머지는 기존 값)
+            kinds: 조회할 구간 종류 ('zone', 'support', 'resistance'), None이면 전체
+
+        Returns:
+            DataFrame: symbol, kind, low, high, strength, price, distance_pct
+                       (distance_pct는 현재가가 구간 밖이면 가까운 끝까지 거리, 안이면 0)
+        """
+        built = self._build()
+        price = built['price']
+        if prices:
+            price = price.copy()
+            position = {symbol: i for i, symbol in enumerate(built['symbols'])}
+            for symbol, value in prices.items():
+                if symbol in position:
+                    price[position[symbol]] = value
+
+        interval_price = price[built['symbol_id']]
+        mask = (built['low'] <= interval_price * (1 + pct)) & (built['high'] >= interval_price * (1 - pct))
+        if kinds is not None:
+            mask &= np.isin(built['kind'], list(kinds))
+
+        hit = np.flatnonzero(mask)
+        hit_price = interval_price[hit]
+        gap = np.maximum(np.maximum(built['low'][hit] - hit_price, hit_price - built['high'][hit]), 0)
+        result = pd.DataFrame({
+            'symbol': built['symbols'][built['symbol_id'][hit]],
+            'kind': built['kind'][hit],
+            'low': built['low'][hit],
+            'high': built['high'][hit],
+            'strength': built['strength'][hit],
+            'price': hit_price,
+            'distance_pct': gap / hit_price * 100
+        })
+        return result.sort_values(['distance_pct', 'symbol'], kind='stable', ignore_index=True)
+
+    def lookup(self, symbol: str, price_low: float, price_high: float) -> pd.DataFrame:
+        """
+        한 종목에서 [price_low, price_high]와 겹치는 구간
+
+        Args:
+            symbol: 종목 코드
+            price_low: 조회 하단가
+            price_high: 조회 상단가
+
+        Returns:
+            DataFrame: kind, low, high, strength
+        """
+        built = self._build()
+        position = np.searchsorted(built['symbols'], symbol)
+        if position >= len(built['symbols']) or built['symbols'][position] != symbol:
+            raise KeyError(symbol)
+
+        begin, end = built['offsets'][position], built['offsets'][position + 1]
+        # 하단가 정렬이므로 하단 <= price_high 인 앞부분만 본 뒤 상단 조건으로 거름
+        stop = begin + np.searchsorted(built['low'][begin:end], price_high, side='right')
+        rows = np.arange(begin, stop)
+        rows = rows[built['high'][rows] >= price_low]
+        return pd.DataFrame({key: built[key][rows] for key in ('kind', 'low', 'high', 'strength')})
+
+    def save(self, path: str):
+        """인덱스를 .npz 파일로 저장"""
+        built = self._build()
+        np.savez_compressed(
+            path,
+            symbols=built['symbols'].astype(str),
+            offsets=built['offsets'],
+            kind=built['kind'].astype(str),
+            low=built['low'],
+            high=built['high'],
+            strength=built['strength'],
+            price=built['price'],
+            as_of=np.array([self._as_of[symbol] for symbol in built['symbols']], dtype=str)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'ZoneIntervalIndex':
+        """save로 저장한 인덱스 불러오기"""
+        index = cls()
+        with np.load(path) as saved:
+            offsets = saved['offsets']
+            kind = saved['kind'].astype(object)
+            low, high, strength = saved['low'], saved['high'], saved['strength']
+            for i, symbol in enumerate(saved['symbols']):
+                rows = slice(offsets[i], offsets[i + 1])
+                index.set_arrays(str(symbol), kind[rows], low[rows], high[rows], strength[rows],
+                                 saved['price'][i], str(saved['as_of'][i]) or None)
+        return index
+
+
+def build_zone_index(data_by_symbol: Dict[str, pd.DataFrame], num_ranges: int = 20, top_n: int = 5,
+                     analysis_days: int = 60, min_touches: int = 3, max_levels: int = 3,
+                     index: Optional[ZoneIntervalIndex] = None) -> ZoneIntervalIndex:
+    """
+    여러 종목의 밀집 구간과 지지선/저항선을 한 번에 계산해 인덱스에 넣기
+
+    batch_price_profiles와 batch_support_resistance로 전 종목을 한 번의 배열 연산으로
+    계산하므로 종목마다 StockDensityAnalyzer를 돌리는 것과 같은 결과를 훨씬 빠르게 얻습니다.
+    strength는 밀집 구간이면 전체 기간 거래량 중 구간 거래량 비중(find_high_density_zones의
+    strength와 같음), 지지선/저항선이면 analysis_days일 중 레벨을 터치한 날의 비중입니다.
+
+    Args:
+        data_by_symbol: 종목 코드별 OHLCV 데이터
+        num_ranges: 가격 구간 수
+        top_n: 종목별 밀집 구간 수 (거래량 상위)
+        analysis_days: 지지선/저항선 분석 일수
+        min_touches: 지지선/저항선 최소 터치 횟수
+        max_levels: 지지선/저항선 각각 최대 개수
+        index: 갱신할 기존 인덱스 (None이면 새로 생성)
+
+    Returns:
+        ZoneIntervalIndex: 구간 인덱스
+    """
+    index = index if index is not None else ZoneIntervalIndex()
+    data_by_symbol = {symbol: data for symbol, data in data_by_symbol.items()
+                      if data is not None and not data.empty}
+    if not data_by_symbol:
+        return index
+
+    symbols, stacked = stack_ohlcv(data_by_symbol)
+    current = np.array([data_by_symbol[symbol]['Close'].iloc[-1] for symbol in symbols], dtype=float)
+
+    profiles = batch_price_profiles(stacked['Low'], stacked['High'], stacked['Volume'], num_ranges)
+    k = min(top_n, num_ranges)
+    top = np.argpartition(-profiles['total_volume'], k - 1, axis=1)[:, :k]
+
+    recent = slice(-analysis_days, None)
+    levels = batch_support_resistance(stacked['Low'][:, recent], stacked['High'][:, recent], current,
+                                      min_touches=min_touches, max_levels=max_levels)
+
+    # 레벨은 행 순서로 나오므로 종목별 시작 위치로 잘라 씀
+    level_offsets = np.searchsorted(levels['row'], np.arange(len(symbols) + 1))
+    level_kind = np.where(levels['is_support'], 'support', 'resistance').astype(object)
+    zone_kind = np.full(k, 'zone', dtype=object)
+    rows = np.arange(len(symbols))[:, None]
+    zone_low = profiles['range_start'][rows, top]
+    zone_high = profiles['range_end'][rows, top]
+    total_volume = np.nansum(stacked['Volume'], axis=1)
+    zone_strength = np.divide(profiles['total_volume'][rows, top], total_volume[:, None],
+                              out=np.zeros(top.shape), where=total_volume[:, None] > 0)
+    # 데이터가 analysis_days보다 짧은 종목은 실제 일수로 나눔
+    level_days = np.isfinite(stacked['Low'][:, recent]).sum(axis=1)
+    level_strength = levels['touches'] / np.maximum(level_days[levels['row']], 1)
+
+    for i, symbol in enumerate(symbols):
+        at_level = slice(level_offsets[i], level_offsets[i + 1])
+        level_price = levels['price'][at_level]
+        index.set_arrays(
+            symbol,
+            np.concatenate([zone_kind, level_kind[at_level]]),
+            np.concatenate([zone_low[i], level_price]),
+            np.concatenate([zone_high[i], level_price]),
+            np.concatenate([zone_strength[i], level_strength[at_level]]),
+            current[i],
+            data_by_symbol[symbol].index[-1]
+        )
+    return index
+
+
+def main():
+    """인기 종목 중 밀집 구간/지지·저항선 근처에서 거래 중인 종목 찾기 예제"""
+    from stock_density_analyzer import StockDensityAnalyzer
+    from interactive_analyzer import POPULAR_STOCKS
+
+    end_date = datetime.now().strftime('%Y-%m-%d')
+    start_date = (datetime.now() - timedelta(days=180)).strftime('%Y-%m-%d')
+
+    print("=== 밀집 구간 근접 종목 스크리너 ===")
+    names = {code: name for code, name in POPULAR_STOCKS.values()}
+    data_by_symbol = {code: StockDensityAnalyzer().fetch_data(code, start_date, end_date) for code in names}
+    index = build_zone_index(data_by_symbol)
+
+    kind_names = {'zone': '밀집 구간', 'support': '지지선', 'resistance': '저항선'}
+    print("\n현재가 ±2% 이내 구간:")
+    for _, row in index.screen(pct=0.02).iterrows():
+        print(f"  - {names.get(row['symbol'], row['symbol'])} ({row['symbol']}) "
+              f"{kind_names[row['kind']]} {row['low']:,.0f} ~ {row['high']:,.0f}원, "
+              f"현재가 {row['price']:,.0f}원 (거리 {row['distance_pct']:.2f}%)")
+
+
+if __name__ == "__main__":
+    main()